@@ -0,0 +1,72 @@
+"""
+Times the pre-fusion (stepwise) stats pipeline against the fused calc_all_stats &
+the row-wise danger area classification against the vectorized danger_area.
+
+Usage: python -m benchmarks.clean_pbp_stats
+"""
+
+import logging
+import timeit
+
+import numpy as np
+
+from tests.pbp_data import make_sample_pbp, run_all_stats_stepwise
+
+import clean_pbp  # noqa: E402 (put on the path by tests.pbp_data)
+
+
+def benchmark_all_stats(sizes=(300, 3000, 300000), repeat=3):
+    """ Returns a list of {rows, stepwise_ms, fused_ms, speedup} (best of repeat runs). """
+
+    logging.disable(logging.INFO)
+    results = []
+    for rows in sizes:
+        df = make_sample_pbp(rows)
+        stepwise_s = min(timeit.repeat(lambda: run_all_stats_stepwise(df.copy()), number=1, repeat=repeat))
+        fused_s = min(timeit.repeat(lambda: clean_pbp.calc_all_stats(df.copy()), number=1, repeat=repeat))
+        results.append(
+            {
+                "rows": rows,
+                "stepwise_ms": round(stepwise_s * 1000, 2),
+                "fused_ms": round(fused_s * 1000, 2),
+                "speedup": round(stepwise_s / fused_s, 1),
+            }
+        )
+    logging.disable(logging.NOTSET)
+
+    return results
+
+
+def benchmark_danger_area(sizes=(300, 3000, 300000), repeat=3):
+    """ Returns a list of {rows, apply_ms, vectorized_ms, speedup} (best of repeat runs). """
+
+    results = []
+    for rows in sizes:
+        df = make_sample_pbp(rows)
+        df["is_corsi"] = np.where(df.event.isin(["SHOT", "BLOCK", "MISS", "GOAL"]), 1, 0)
+
+        # The row-wise version takes seconds on large frames - run it once there
+        apply_repeat = 1 if rows > 10000 else repeat
+        apply_s = min(
+            timeit.repeat(lambda: df.apply(clean_pbp.dfapply_danger_area, axis=1), number=1, repeat=apply_repeat)
+        )
+        vectorized_s = min(
+            timeit.repeat(lambda: clean_pbp.danger_area(df.xc, df.yc, df.is_corsi, df.ev_zone), number=1, repeat=repeat)
+        )
+        results.append(
+            {
+                "rows": rows,
+                "apply_ms": round(apply_s * 1000, 2),
+                "vectorized_ms": round(vectorized_s * 1000, 2),
+                "speedup": round(apply_s / vectorized_s, 1),
+            }
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    for result in benchmark_all_stats():
+        print(f"calc_all_stats: {result}")
+    for result in benchmark_danger_area():
+        print(f"danger_area: {result}")
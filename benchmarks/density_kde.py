@@ -0,0 +1,93 @@
+"""
+Speed & visual error of the grid-based FFT KDE (density.kde_grid) against the seaborn
+kdeplot(bw=0.2, cut=100) the shotmaps used (needs scipy & seaborn < 0.11 installed locally).
+
+Usage: python -m benchmarks.density_kde
+"""
+
+import timeit
+
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
+from scipy.stats import gaussian_kde
+from seaborn.distributions import _scipy_bivariate_kde
+
+from tests import lambdas
+from tests.shotmap_data import sample_shots
+
+lambdas.add_paths()
+
+import density  # noqa: E402
+import raster  # noqa: E402
+
+
+def benchmark_density(n_shots=(20, 60, 150), resolution: float = 2.0, bw=0.2, nbins: int = 10, repeat: int = 5):
+    """ Compares kde_grid with the seaborn kdeplot(bw=0.2, cut=100) output the shotmaps used.
+        seaborn (without statsmodels) evaluates scipy's gaussian_kde on a 100x100 grid covering the
+        shots +/- 20ft & contourf draws it - that grid is rebuilt here with seaborn's own helper.
+
+    Args:
+        n_shots: shot counts to test
+        resolution, bw, nbins: kde_grid settings & number of contour bands
+
+    Returns:
+        list: per shot count - timings (ms), the max error vs the exact KDE & vs seaborn's grid
+              (relative to the peak density) and the share of rink cells drawn in the same band
+    """
+
+    grid_x, grid_y = density.rink_grid(resolution)
+    gx, gy = np.meshgrid(grid_x, grid_y)
+
+    results = []
+    for n in n_shots:
+        x, y = sample_shots(n)
+
+        ours = density.kde_grid(x, y, resolution=resolution, bw=bw)
+        exact = gaussian_kde(np.vstack([x, y]), bw_method=bw)([gx.ravel(), gy.ravel()]).reshape(gx.shape)
+
+        # seaborn's grid, linearly interpolated onto the rink grid (contourf interpolates linearly too)
+        xx, yy, zz = _scipy_bivariate_kde(x, y, bw, 100, 100, [(-np.inf, np.inf), (-np.inf, np.inf)])
+        inside = (gx >= xx[0, 0]) & (gx <= xx[0, -1]) & (gy >= yy[0, 0]) & (gy <= yy[-1, 0])
+        interpolator = RegularGridInterpolator((yy[:, 0], xx[0, :]), zz)
+        seaborn_grid = np.zeros_like(ours)
+        seaborn_grid[inside] = interpolator(np.column_stack([gy[inside], gx[inside]]))
+
+        # Contour bands on the same levels - this is what is actually visible on the shotmap
+        levels = raster.nice_levels(zz.max(), nbins)
+        ours_band = np.clip(np.searchsorted(levels, ours, side="right") - 1, 0, len(levels) - 2)
+        seaborn_band = np.clip(np.searchsorted(levels, seaborn_grid, side="right") - 1, 0, len(levels) - 2)
+
+        def best(func):
+            return round(min(timeit.repeat(func, number=1, repeat=repeat)) * 1000, 2)
+
+        results.append({
+            "shots": n,
+            "kde_grid_ms": best(lambda: density.kde_grid(x, y, resolution=resolution, bw=bw)),
+            "seaborn_kde_ms": best(lambda: _scipy_bivariate_kde(x, y, bw, 100, 100, [(-np.inf, np.inf)] * 2)),
+            "seaborn_kdeplot_ms": best(lambda: seaborn_kdeplot(x, y, bw)),
+            "max_error_vs_exact": round(float(np.abs(ours - exact).max() / exact.max()), 4),
+            "max_error_vs_seaborn": round(float(np.abs(ours - seaborn_grid)[inside].max() / zz.max()), 4),
+            "same_band_share": round(float((ours_band == seaborn_band).mean()), 4),
+        })
+
+    return results
+
+
+def seaborn_kdeplot(x, y, bw):
+    """ Runs the original seaborn call (shaded kdeplot on an Agg figure) for the timing comparison. """
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fig, ax = plt.subplots(figsize=(1024 / 96, 440 / 96), dpi=96)
+    sns.kdeplot(x, y, cmap="Reds", shade=True, bw=bw, cut=100, shade_lowest=False, alpha=0.9, ax=ax)
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+if __name__ == "__main__":
+    for result in benchmark_density():
+        print(result)
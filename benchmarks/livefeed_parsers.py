@@ -0,0 +1,42 @@
+"""
+Parse time & peak memory of json.load vs nhl_fetch.extract_paths on a recorded live feed.
+
+Usage: python -m benchmarks.livefeed_parsers --feed recorded.json [--path liveData.linescore ...]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from tests import lambdas
+
+lambdas.add_paths()
+
+import nhl_fetch  # noqa: E402
+
+
+def compare_parsers(feed_file, paths):
+    """ Returns {parser: (milliseconds, peak MB)} for both parsers. """
+
+    results = dict()
+    for name, parse in (("json.load", json.load), ("extract_paths", lambda f: nhl_fetch.extract_paths(f, paths))):
+        with open(feed_file, "rb") as f:
+            tracemalloc.start()
+            start = time.perf_counter()
+            parse(f)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        results[name] = (elapsed * 1000, peak / 1024 / 1024)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--feed", required=True, help="a recorded live feed (JSON file)")
+    parser.add_argument("--path", help="dotted path to extract", action="append", dest="paths")
+    args = parser.parse_args()
+
+    for name, (ms, peak_mb) in compare_parsers(args.feed, args.paths or ["gameData.status", "liveData.linescore"]).items():
+        print(f"{name:<16} {ms:8.1f} ms  {peak_mb:8.2f} MB peak")
@@ -0,0 +1,63 @@
+"""
+Payload size & encode / decode time of the old full-frame to_json payload vs each
+codec of payload_codec.encode_pbp (generator columns only).
+
+Usage: python -m benchmarks.payload_codecs [--pbp recorded.csv] [--rows N]
+"""
+
+import argparse
+import timeit
+
+import pandas as pd
+
+from tests import lambdas
+from tests.pbp_data import make_sample_pbp
+
+lambdas.add_paths()
+
+import payload_codec  # noqa: E402
+
+
+def benchmark_codecs(pbp: pd.DataFrame, repeat: int = 5) -> list:
+    """ Returns {codec, payload_bytes, encode_ms, decode_ms} per codec (best of repeat runs).
+        No store is passed, so every payload is encoded inline (never offloaded).
+    """
+
+    def best(func):
+        return round(min(timeit.repeat(func, number=1, repeat=repeat)) * 1000, 2)
+
+    # The old payload - every scraped column as pbp.to_json()
+    old_json = pbp.to_json()
+    results = [{
+        "codec": "to_json (all columns, before)",
+        "payload_bytes": len(old_json),
+        "encode_ms": best(pbp.to_json),
+        "decode_ms": best(lambda: pd.read_json(old_json)),
+    }]
+
+    for codec in (payload_codec.CODEC_JSON, payload_codec.CODEC_COLUMNAR):
+        fields = payload_codec.encode_pbp(pbp, codec=codec)
+        results.append({
+            "codec": codec,
+            "payload_bytes": len(fields.get("pbp_data", fields.get("pbp_json"))),
+            "encode_ms": best(lambda: payload_codec.encode_pbp(pbp, codec=codec)),
+            "decode_ms": best(lambda: payload_codec.decode_pbp(fields)),
+        })
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pbp", help="recorded hockey_scraper pbp CSV (defaults to a synthetic game)")
+    parser.add_argument("--rows", type=int, default=1500, help="rows of the synthetic game")
+    args = parser.parse_args()
+
+    if args.pbp:
+        frame = pd.read_csv(args.pbp)
+        frame.columns = map(str.lower, frame.columns)
+    else:
+        frame = make_sample_pbp(args.rows, wide=True)
+
+    for result in benchmark_codecs(frame):
+        print(result)
@@ -0,0 +1,39 @@
+"""
+API calls & trigger delays of a fixed poll interval vs the adaptive poll schedule (poll_schedule).
+Replays a simulated game, or snapshots recorded from a real one (one JSON object per line with
+"ts", "game_state", "linescore" & "start_time").
+
+Usage: python -m benchmarks.poll_replay [--snapshots recorded.jsonl] [--fixed 60]
+"""
+
+import argparse
+import json
+
+from tests import lambdas
+from tests.poll_data import replay, simulate_game
+
+lambdas.add_paths()
+
+import poll_schedule  # noqa: E402
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--snapshots", help="recorded snapshots (one JSON object per line)")
+    parser.add_argument("--fixed", help="fixed poll interval to compare against", type=int, default=60)
+    args = parser.parse_args()
+
+    if args.snapshots:
+        with open(args.snapshots) as f:
+            snapshots = [json.loads(line) for line in f if line.strip()]
+    else:
+        snapshots = simulate_game()
+
+    strategies = {
+        f"fixed ({args.fixed}s)": lambda snapshot, now: args.fixed,
+        "adaptive": lambda snapshot, now: poll_schedule.next_poll_delay(
+            snapshot["game_state"], snapshot["linescore"], start_time=snapshot.get("start_time"), now=now
+        ),
+    }
+    for name, strategy in strategies.items():
+        print(f"{name:<14} {replay(snapshots, strategy)}")
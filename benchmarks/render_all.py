@@ -0,0 +1,53 @@
+"""
+Wall clock of render_executor.render_all for the two production jobs (All & 5v5) - serial vs
+parallel processes. The parallel path is taken even on a single CPU. Uses a plain white rink &
+matplotlib's bundled font.
+
+Usage: python -m benchmarks.render_all
+"""
+
+import logging
+import os
+import tempfile
+import time
+
+from tests.shotmap_data import RINK_KEY, sample_jobs, write_assets
+
+import render_executor  # noqa: E402 (put on the path by tests.shotmap_data)
+import shotmap  # noqa: E402
+
+
+def benchmark_render_all(repeat: int = 3):
+    """ Returns {"cpus", "serial_ms", "parallel_ms"} (best of repeat runs). """
+
+    jobs = sample_jobs()
+    cpu_count = render_executor._cpu_count
+    results = {"cpus": cpu_count()}
+
+    # Warm up (imports, font & rink caches) so neither mode pays for it
+    shotmap.generate_shotmap(**jobs[0])
+
+    render_executor._cpu_count = lambda: max(cpu_count(), 2)
+    try:
+        for mode in ("serial", "parallel"):
+            os.environ["RENDER_PARALLEL"] = str(mode == "parallel").lower()
+            timings = list()
+            for _ in range(repeat):
+                start = time.perf_counter()
+                render_executor.render_all(jobs)
+                timings.append(time.perf_counter() - start)
+            results[f"{mode}_ms"] = round(min(timings) * 1000, 1)
+    finally:
+        render_executor._cpu_count = cpu_count
+        os.environ.pop("RENDER_PARALLEL", None)
+
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        write_assets(tmp_dir)
+        os.environ["ASSETS_DIR"], os.environ["SHOTMAP_BLANK"] = tmp_dir, RINK_KEY
+        print(shotmap.SHOTMAP_BACKEND, benchmark_render_all())
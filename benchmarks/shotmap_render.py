@@ -0,0 +1,114 @@
+"""
+Time & peak RSS of the matplotlib backend before (400 DPI PNG in /tmp, re-opened & resized)
+& after (rendered at the output size, in memory). Every variant runs in its own forked process
+so the peak RSS numbers do not mix.
+
+Usage: python -m benchmarks.shotmap_render [blank rink PNG] - a plain white rink is generated if none is given
+"""
+
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from PIL import Image
+
+from tests import lambdas
+from tests.shotmap_data import sample_shots
+
+lambdas.add_paths()
+
+import assets  # noqa: E402
+import shotmap  # noqa: E402
+
+
+def plot_shotmap_400dpi(home_df: pd.DataFrame, away_df: pd.DataFrame):
+    """ The previous matplotlib output path (400 DPI PNG in /tmp, re-opened & resized). """
+
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(1024 / 96, 440 / 96), dpi=96)
+    ax = fig.add_subplot(111)
+    ax.imshow(assets.get_rink_image(os.environ.get("SHOTMAP_BLANK")), extent=[-100, 100, -42.5, 42.5])
+    shotmap.plot_density(ax, home_df, cmap="Reds")
+    shotmap.plot_density(ax, away_df, cmap="Blues")
+    ax.set_xlim(-100, 100)
+    ax.set_ylim(-42, 42)
+    ax.axis("off")
+
+    completed_path = os.path.join("/tmp", f"completed-shotmap-{os.getpid()}.png")
+    fig.savefig(completed_path, dpi=400, bbox_inches="tight")
+    plt.close(fig)
+
+    output_img = Image.open(completed_path)
+    w, h = output_img.size
+    width = shotmap.SHOTMAP_WIDTH
+    resized = output_img.resize((width, int(h * width / w)), resample=Image.BILINEAR)
+    os.remove(completed_path)
+    return resized
+
+
+def peak_rss_worker(conn, render, home_df, away_df, repeat):
+    """ Runs a render in a forked child & sends back (best seconds, peak RSS growth in MB, size). """
+
+    # Resets VmHWM so the child's peak only covers the renders (Linux only, falls back to ru_maxrss)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+    start_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        img = render(home_df, away_df)
+        timings.append(time.perf_counter() - start)
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    conn.send((min(timings), (peak_kb - start_kb) / 1024, img.size))
+    conn.close()
+
+
+def benchmark_matplotlib_render(n_shots: int = 60, repeat: int = 3):
+    """ Returns variant -> {"ms", "peak_rss_mb", "size"} (fastest of repeat renders per variant). """
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    home_x, home_y = sample_shots(n_shots, seed=1)
+    away_x, away_y = sample_shots(n_shots, seed=2)
+    home_df = pd.DataFrame({"xc": home_x, "yc": home_y, "event": "SHOT"})
+    away_df = pd.DataFrame({"xc": -away_x, "yc": away_y, "event": "SHOT"})
+
+    # Decode the rink once in the parent, like a warm container
+    assets.get_rink_image(os.environ.get("SHOTMAP_BLANK"))
+
+    ctx = multiprocessing.get_context("fork")
+    results = dict()
+    for name, render in (("400dpi_resize", plot_shotmap_400dpi), ("output_size", shotmap.plot_shotmap)):
+        parent_conn, child_conn = ctx.Pipe(duplex=False)
+        process = ctx.Process(target=peak_rss_worker, args=(child_conn, render, home_df, away_df, repeat))
+        process.start()
+        child_conn.close()
+        seconds, peak_rss_mb, size = parent_conn.recv()
+        process.join()
+        results[name] = {"ms": round(seconds * 1000, 1), "peak_rss_mb": round(peak_rss_mb, 1), "size": size}
+
+    return results
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if len(sys.argv) > 1:
+            os.environ["ASSETS_DIR"], os.environ["SHOTMAP_BLANK"] = os.path.split(os.path.abspath(sys.argv[1]))
+        else:
+            Image.new("RGBA", (2400, 1020), (255, 255, 255, 255)).save(os.path.join(tmp_dir, "rink.png"))
+            os.environ["ASSETS_DIR"], os.environ["SHOTMAP_BLANK"] = tmp_dir, "rink.png"
+
+        for variant, result in benchmark_matplotlib_render().items():
+            print(variant, result)
@@ -0,0 +1,75 @@
+"""
+Per-invocation latency of a DynamoDB GetItem & an HTTP GET against a local server - new
+clients every invocation (the old behaviour) vs the shared module-level clients (clients.py).
+Localhost has no TLS handshake or network round trip, so real savings are larger.
+
+Usage: python -m benchmarks.warm_clients [--invocations N]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from tests import lambdas
+from tests.local_http import LocalHTTPServer
+
+lambdas.add_paths()
+
+import boto3  # noqa: E402
+import requests  # noqa: E402
+
+import clients  # noqa: E402
+
+
+def benchmark_warm_invocation(url: str, invocations: int = 50):
+    """ Returns {"boto3" / "http": {"new_ms", "shared_ms", "saved_ms"}} (median per invocation). """
+
+    key = {"gameId": {"N": "1"}}
+
+    def new_dynamodb():
+        boto3.session.Session().client("dynamodb", endpoint_url=url).get_item(TableName="t", Key=key)
+
+    def shared_dynamodb():
+        clients.get_client("dynamodb", endpoint_url=url).get_item(TableName="t", Key=key)
+
+    def new_http():
+        with requests.Session() as session:
+            session.get(url, timeout=5).raise_for_status()
+
+    def shared_http():
+        clients.get_http_session().get(url, timeout=5).raise_for_status()
+
+    def median_ms(func):
+        func()  # first call (cold start) is not part of a warm invocation
+        timings = list()
+        for _ in range(invocations):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000
+
+    results = dict()
+    for name, new, shared in (("boto3", new_dynamodb, shared_dynamodb), ("http", new_http, shared_http)):
+        new_ms, shared_ms = median_ms(new), median_ms(shared)
+        results[name] = {
+            "new_ms": round(new_ms, 2),
+            "shared_ms": round(shared_ms, 2),
+            "saved_ms": round(new_ms - shared_ms, 2),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--invocations", type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+    empty_json = lambda method, path, headers: (200, {"Content-Type": "application/x-amz-json-1.0"}, b"{}")
+    with LocalHTTPServer(empty_json) as server:
+        for client, result in benchmark_warm_invocation(server.url + "/", args.invocations).items():
+            print(client, result)
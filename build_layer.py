@@ -0,0 +1,42 @@
+"""
+Builds the shotmaps-shared Lambda layer - the modules used by more than one Lambda
+(scraper, generator & v1) live in shotmaps_shared/ once and are deployed as a layer
+(python/ in the zip ends up on sys.path under /opt/python) instead of being copied
+into every function package. Modules the root pollers import as well (nhl_fetch)
+stay in the project root & are added to the layer from there.
+"""
+
+import argparse
+import glob
+import os
+import zipfile
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+SHARED_DIR = os.path.join(PROJECT_ROOT, "shotmaps_shared")
+
+# Project root modules shared by the pollers & the Lambdas
+ROOT_MODULES = ["nhl_fetch.py"]
+
+
+def layer_modules():
+    """ Returns the paths of every module that goes into the layer. """
+
+    shared = [path for path in glob.glob(os.path.join(SHARED_DIR, "*.py")) if not path.endswith("__init__.py")]
+    return sorted(shared + [os.path.join(PROJECT_ROOT, name) for name in ROOT_MODULES])
+
+
+def build_layer(output: str):
+    """ Writes the layer zip (every shared module under python/). """
+
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as layer:
+        for path in layer_modules():
+            layer.write(path, os.path.join("python", os.path.basename(path)))
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", help="layer zip to write", default="shotmaps-shared-layer.zip")
+    args = parser.parse_args()
+
+    print(f"Built {build_layer(args.output)} with {[os.path.basename(path) for path in layer_modules()]}")
@@ -0,0 +1,198 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+
+import yaml
+
+import lambda_trigger
+import poll_schedule
+
+SLEEP_TIME = 60
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(PROJECT_ROOT, "config.yml")
+LOGS_PATH = os.path.join(PROJECT_ROOT, "logs")
+STATE_PATH = os.path.join(PROJECT_ROOT, "state")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--date", help="the schedule date to poll (YYYY-MM-DD)", action="store")
+    arguments = parser.parse_args()
+    return arguments
+
+
+def get_schedule(date):
+    """ Gets every game (with its linescore) for a date in a single request. """
+
+    url = f"https://statsapi.web.nhl.com/api/v1/schedule?date={date}&expand=schedule.linescore"
+    logging.info("Getting the latest schedule & linescores from URL : %s", url)
+    schedule = lambda_trigger.http_session.get(url, timeout=30).json()
+
+    if schedule["totalGames"] == 0:
+        return list()
+
+    return schedule["dates"][0]["games"]
+
+
+def load_state(state_file):
+    """ Loads the triggers already fired today so a restarted poller does not re-trigger them. """
+
+    try:
+        with open(state_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return dict()
+
+
+def save_state(state_file, state):
+    os.makedirs(os.path.dirname(state_file), exist_ok=True)
+    temp_file = f"{state_file}.tmp"
+    with open(temp_file, "w") as f:
+        json.dump(state, f)
+    os.replace(temp_file, state_file)
+
+
+def get_game_trigger(game, game_state):
+    """ Works out if a game needs a trigger right now.
+
+    Args:
+        game: game dictionary from the schedule endpoint (with linescore)
+        game_state: this game's persisted state ({"fired": [...]})
+
+    Returns:
+        str: the trigger key ("1", "2", ... for intermissions or "final") or None
+    """
+
+    status = game["status"]["abstractGameState"]
+    linescore = game["linescore"]
+
+    if status == "Final":
+        return "final" if "final" not in game_state["fired"] else None
+
+    if status != "Live":
+        return None
+
+    is_intermission = linescore.get("intermissionInfo", {}).get("inIntermission", False)
+    period = str(linescore.get("currentPeriod"))
+    if is_intermission and period not in game_state["fired"]:
+        return period
+
+    return None
+
+
+async def dispatch_trigger(loop, game, lambda_arn):
+    game_id = game["gamePk"]
+    linescore = game["linescore"]
+    home_score = linescore["teams"]["home"]["goals"]
+    away_score = linescore["teams"]["away"]["goals"]
+    period = linescore.get("currentPeriod")
+
+    return await loop.run_in_executor(
+        None,
+        lambda: lambda_trigger.trigger_lambda(
+            game_id=game_id, lambda_arn=lambda_arn, home_score=home_score, away_score=away_score, period=period
+        ),
+    )
+
+
+async def poll(date, lambda_arn, state_file, min_poll, max_poll):
+    """ Polls every game on the date from a single event loop until all games are final. """
+
+    loop = asyncio.get_running_loop()
+    state = load_state(state_file)
+    # Created before any trigger is dispatched to the executor threads
+    lambda_trigger.get_lambda_client()
+
+    while True:
+        try:
+            games = await loop.run_in_executor(None, get_schedule, date)
+        except Exception as e:
+            logging.warning("Ran into an exception getting the schedule - sleep & try again.")
+            logging.warning(e)
+            await asyncio.sleep(SLEEP_TIME)
+            continue
+
+        if not games:
+            logging.info("No games scheduled on %s - nothing to poll. Exiting now.", date)
+            return
+
+        # Work out every trigger for this cycle first, then dispatch them all at once
+        triggers = list()
+        for game in games:
+            game_state = state.setdefault(str(game["gamePk"]), {"fired": list()})
+            trigger = get_game_trigger(game, game_state)
+            if trigger is not None:
+                triggers.append((game, game_state, trigger))
+
+        results = await asyncio.gather(
+            *[dispatch_trigger(loop, game, lambda_arn) for game, _, _ in triggers], return_exceptions=True
+        )
+
+        for (game, game_state, trigger), result in zip(triggers, results):
+            if isinstance(result, Exception):
+                logging.warning("Trigger %s for %s failed - will retry next cycle: %s", trigger, game["gamePk"], result)
+                continue
+            logging.info("Triggered %s for %s: %s", trigger, game["gamePk"], result)
+            game_state["fired"].append(trigger)
+
+        if triggers:
+            save_state(state_file, state)
+
+        # Every game is final (& has sent its end of game shotmap) or was postponed
+        if all(
+            "final" in state[str(game["gamePk"])]["fired"] or game["status"]["detailedState"] == "Postponed"
+            for game in games
+        ):
+            logging.info("All games on %s are final - exiting now.", date)
+            return
+
+        # Sleep until the game that needs attention soonest (ex: closest to a period ending)
+        sleep_time = min(
+            (
+                poll_schedule.next_poll_delay(
+                    game["status"]["abstractGameState"],
+                    game["linescore"],
+                    start_time=game["gameDate"],
+                    min_poll=min_poll,
+                    max_poll=max_poll,
+                )
+                for game in games
+                if game["status"]["abstractGameState"] != "Final" and game["status"]["detailedState"] != "Postponed"
+            ),
+            default=SLEEP_TIME,
+        )
+
+        live_games = [game["gamePk"] for game in games if game["status"]["abstractGameState"] == "Live"]
+        logging.info("Live games: %s - sleeping for %s seconds.", live_games, sleep_time)
+        logging.info("-" * 60)
+        await asyncio.sleep(sleep_time)
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    date = args.date or f"{datetime.now():%Y-%m-%d}"
+
+    # Load Configuration File
+    with open(CONFIG_PATH) as ymlfile:
+        config = yaml.load(ymlfile, Loader=yaml.FullLoader)
+
+    LAMBDA_ARN = config["script"]["aws_lambda_arn"]
+
+    # Setup basic logging functionality
+    log_file_name = datetime.now().strftime(config["script"]["poller_log_file"] + "-" + date + ".log")
+    log_file = os.path.join(LOGS_PATH, log_file_name)
+    logging.basicConfig(
+        filename=log_file,
+        level=logging.INFO,
+        datefmt="%Y-%m-%d %H:%M:%S",
+        format="%(asctime)s - %(module)s - %(levelname)s - %(message)s",
+    )
+
+    state_file = os.path.join(STATE_PATH, f"poller-{date}.json")
+    min_poll = config["script"].get("min_poll_seconds", poll_schedule.MIN_POLL_SECONDS)
+    max_poll = config["script"].get("max_poll_seconds", poll_schedule.MAX_POLL_SECONDS)
+    asyncio.run(poll(date, LAMBDA_ARN, state_file, min_poll, max_poll))
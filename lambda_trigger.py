@@ -3,6 +3,7 @@ import json
 import logging
 import os
 import sys
+import threading
 import time
 from datetime import datetime
 
@@ -13,12 +14,27 @@ import yaml
 from crontab import CronTab
 from dateutil import tz
 
+import nhl_fetch
+import poll_schedule
+
 SLEEP_TIME = 60
 
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 CONFIG_PATH = os.path.join(PROJECT_ROOT, "config.yml")
 LOGS_PATH = os.path.join(PROJECT_ROOT, "logs")
 
+# Shared HTTP session & Lambda client (keep-alive connections across poll loops)
+# The poller invokes Lambdas from executor threads, so the client is created under a lock
+http_session = requests.Session()
+lambda_client = None
+lambda_client_lock = threading.Lock()
+
+# Live feeds are fetched via diff patches / conditional requests (see nhl_fetch)
+# Only the game status & linescore are ever read, so nothing else is built from the feed
+livefeed_fetcher = nhl_fetch.LiveFeedFetcher(
+    session=http_session, paths=["gameData.status", "gameData.datetime", "liveData.linescore"]
+)
+
 
 def parse_arguments():
     parser = argparse.ArgumentParser()
@@ -28,9 +44,9 @@ def parse_arguments():
 
 
 def get_livefeed(game_id):
-    url = f"https://statsapi.web.nhl.com/api/v1/game/{game_id}/feed/live"
-    logging.info("Getting the latest livefeed payload from URL : %s", url)
-    r = requests.get(url).json()
+    logging.info("Getting the latest livefeed payload for %s.", game_id)
+    r = livefeed_fetcher.fetch(game_id)
+    logging.info("Livefeed transfer stats for %s: %s", game_id, livefeed_fetcher.stats(game_id))
     return r
 
 
@@ -43,11 +59,27 @@ def get_intermission_info(livefeed):
     return is_intermission, intermission_info
 
 
-def trigger_lambda(game_id, lambda_arn, home_score, away_score):
+def get_lambda_client():
+    """ Returns the shared Lambda client (created once, safe to call from several threads). """
+
+    global lambda_client
+
+    with lambda_client_lock:
+        if lambda_client is None:
+            lambda_client = boto3.client("lambda")
+    return lambda_client
+
+
+def trigger_lambda(game_id, lambda_arn, home_score, away_score, period=None):
     logging.info("Triggering the AWS Shotmaps Lambda now!")
-    lambda_client = boto3.client("lambda")
-    payload = {"game_id": game_id, "testing": False, "home_score": home_score, "away_score": away_score}
-    invoke_response = lambda_client.invoke(
+    payload = {
+        "game_id": game_id,
+        "testing": False,
+        "home_score": home_score,
+        "away_score": away_score,
+        "period": period,
+    }
+    invoke_response = get_lambda_client().invoke(
         FunctionName=lambda_arn, InvocationType="RequestResponse", Payload=json.dumps(payload)
     )
 
@@ -63,6 +95,8 @@ if __name__ == "__main__":
         config = yaml.load(ymlfile, Loader=yaml.FullLoader)
 
     LAMBDA_ARN = config["script"]["aws_lambda_arn"]
+    MIN_POLL = config["script"].get("min_poll_seconds", poll_schedule.MIN_POLL_SECONDS)
+    MAX_POLL = config["script"].get("max_poll_seconds", poll_schedule.MAX_POLL_SECONDS)
 
     # Setup basic logging functionality
     log_file_name = datetime.now().strftime(config["script"]["trigger_log_file"] + "-" + game_id + ".log")
@@ -90,13 +124,22 @@ if __name__ == "__main__":
 
             if game_state == "Final":
                 logging.info("Game is now final - send one final (end of game) shotmap & exit.")
-                lambda_response = trigger_lambda(game_id=game_id, lambda_arn=LAMBDA_ARN, home_score=home_score, away_score=away_score)
+                period = livefeed["liveData"]["linescore"]["currentPeriod"]
+                lambda_response = trigger_lambda(
+                    game_id=game_id, lambda_arn=LAMBDA_ARN, home_score=home_score, away_score=away_score, period=period
+                )
                 logging.info(lambda_response)
                 sys.exit()
 
+            # The next poll is based on the game state & clock (sparse early, tight near the horn)
+            start_time = livefeed["gameData"].get("datetime", {}).get("dateTime")
+            sleep_time = poll_schedule.next_poll_delay(
+                game_state, linescore, start_time=start_time, min_poll=MIN_POLL, max_poll=MAX_POLL
+            )
+
             if game_state == "Preview":
-                logging.info("Game is in Preview - sleep for designated game time before looping.")
-                time.sleep(SLEEP_TIME)
+                logging.info("Game is in Preview - sleep for %s seconds before looping.", sleep_time)
+                time.sleep(sleep_time)
                 continue
 
             period = livefeed["liveData"]["linescore"]["currentPeriod"]
@@ -106,14 +149,14 @@ if __name__ == "__main__":
             is_intermission, intermission_info = get_intermission_info(livefeed)
             if is_intermission:
                 lambda_response = trigger_lambda(
-                    game_id=game_id, lambda_arn=LAMBDA_ARN, home_score=home_score, away_score=away_score
+                    game_id=game_id, lambda_arn=LAMBDA_ARN, home_score=home_score, away_score=away_score, period=period
                 )
                 logging.info(lambda_response)
 
                 logging.info(
                     "Game is currently in intermission. Add 300 seconds (5 minutes) to intermission time to avoid a re-trigger."
                 )
-                sleep_time = intermission_info["intermissionTimeRemaining"] + 300
+                sleep_time = sleep_time + 300
                 logging.info("Sleeping for %s seconds now.", sleep_time)
                 time.sleep(sleep_time)
             else:
@@ -123,8 +166,9 @@ if __name__ == "__main__":
                     period_ordinal,
                 )
 
+                logging.info("Sleeping for %s seconds now.", sleep_time)
                 logging.info("-" * 60)
-                time.sleep(SLEEP_TIME)
+                time.sleep(sleep_time)
         except Exception as e:
             logging.warning("Ran into an exception during this loop iteration - sleep & try again.")
             logging.warning(e)
@@ -0,0 +1,276 @@
+"""
+This module fetches NHL live feeds for the trigger path with as little data
+transferred as possible. After the first full download, a game's feed is kept
+up to date with the feed/live/diffPatch endpoint (JSON patch operations since
+the last timecode). Full downloads use gzip & conditional requests (ETag /
+Last-Modified) so an unchanged feed costs a 304. Bytes transferred are tracked
+per game so the savings can be reported.
+"""
+
+import copy
+import json
+import logging
+
+import requests
+
+# ijson (C-backed if available) lets us pull single paths out of the feed without building the rest
+try:
+    import ijson
+    import ijson.common
+except ImportError:
+    ijson = None
+
+API_ROOT = "https://statsapi.web.nhl.com/api/v1"
+
+
+def parse_pointer(path):
+    """ Splits a JSON pointer (RFC 6901) into its unescaped tokens. """
+    if not path:
+        return list()
+    return [token.replace("~1", "/").replace("~0", "~") for token in path.lstrip("/").split("/")]
+
+
+def _resolve(document, tokens):
+    """ Returns the container holding the last token of a pointer & that (typed) key. """
+
+    target = document
+    for token in tokens[:-1]:
+        target = target[int(token)] if isinstance(target, list) else target[token]
+
+    key = tokens[-1]
+    if isinstance(target, list):
+        key = len(target) if key == "-" else int(key)
+    return target, key
+
+
+def get_path(document, path):
+    """ Returns the value at a dotted path (ex: liveData.linescore) or None if it does not exist. """
+
+    for key in path.split("."):
+        if not isinstance(document, dict) or key not in document:
+            return None
+        document = document[key]
+    return document
+
+
+def set_path(document, path, value):
+    """ Sets the value at a dotted path, creating any missing parent dictionaries. """
+
+    keys = path.split(".")
+    for key in keys[:-1]:
+        document = document.setdefault(key, dict())
+    document[keys[-1]] = value
+
+
+def extract_paths(stream, paths):
+    """ Stream-parses a JSON document & builds only the values at the requested paths.
+        Parsing stops as soon as every path was found. Falls back to json.load without ijson.
+
+    Args:
+        stream: binary file-like object with the JSON document
+        paths: dotted paths to extract (ex: ["gameData.status", "liveData.linescore"])
+
+    Returns:
+        dict: a partial document containing only the requested paths
+    """
+
+    document = dict()
+
+    if ijson is None:
+        full_document = json.load(stream)
+        for path in paths:
+            value = get_path(full_document, path)
+            if value is not None:
+                set_path(document, path, value)
+        return document
+
+    remaining = set(paths)
+    builder = None
+    active = None
+
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if builder is None:
+            if prefix not in remaining or event in ("map_key", "end_map", "end_array"):
+                continue
+            if event in ("start_map", "start_array"):
+                builder = ijson.common.ObjectBuilder()
+                active = prefix
+                builder.event(event, value)
+            else:
+                set_path(document, prefix, value)
+                remaining.discard(prefix)
+        else:
+            builder.event(event, value)
+            if prefix == active and event in ("end_map", "end_array"):
+                set_path(document, active, builder.value)
+                remaining.discard(active)
+                builder = None
+
+        if not remaining:
+            break
+
+    return document
+
+
+def apply_patch(document, operations, skip_missing=False):
+    """ Applies JSON patch operations (RFC 6902) to a document in place & returns it.
+
+    Args:
+        document: JSON document (dict) to patch
+        operations: list of {"op", "path", "value" / "from"} dictionaries
+        skip_missing: ignore operations on paths that are not in the (partial) document
+
+    Returns:
+        the patched document
+    """
+
+    for operation in operations:
+        op = operation["op"]
+        tokens = parse_pointer(operation["path"])
+
+        if op == "test":
+            continue
+
+        if not tokens:
+            # An operation on the whole document replaces it
+            if op in ("add", "replace"):
+                document = copy.deepcopy(operation["value"])
+            continue
+
+        # A partial document can be missing the parent, the source or (remove) the key itself
+        try:
+            if op in ("move", "copy"):
+                source, source_key = _resolve(document, parse_pointer(operation["from"]))
+                value = source.pop(source_key) if op == "move" else copy.deepcopy(source[source_key])
+            elif op in ("add", "replace"):
+                value = operation["value"]
+
+            target, key = _resolve(document, tokens)
+            if op == "remove":
+                del target[key]
+            elif isinstance(target, list) and op != "replace":
+                target.insert(key, value)
+            else:
+                target[key] = value
+        except (KeyError, IndexError, TypeError):
+            if skip_missing:
+                continue
+            raise
+
+    return document
+
+
+class LiveFeedFetcher:
+    """ Keeps the latest live feed of each game & fetches only what changed since the last call. """
+
+    def __init__(self, session=None, use_diff_patch=True, paths=None):
+        self.session = session or requests.Session()
+        self.use_diff_patch = use_diff_patch
+        self.paths = paths
+        self.games = dict()
+
+    def _game(self, game_id):
+        return self.games.setdefault(
+            str(game_id),
+            {"feed": None, "etag": None, "last_modified": None, "timecode": None,
+             "bytes": 0, "requests": 0, "not_modified": 0, "diffs": 0},
+        )
+
+    def _get(self, game, url, headers=None):
+        """ Starts a (streamed) GET - the body is read & counted by _read. """
+
+        headers = dict(headers or {}, **{"Accept-Encoding": "gzip"})
+        response = self.session.get(url, headers=headers, timeout=30, stream=True)
+        response.raw.decode_content = True
+        game["requests"] += 1
+        return response
+
+    def _read(self, game, response, parse=json.load, reuse=True):
+        """ Parses the body straight from response.raw & always closes the response.
+            Bytes are counted from what was actually read off the connection (the compressed
+            body, chunked or not) - a parse that stops early only counts what it read.
+            With reuse the connection goes back to the pool, otherwise the unread rest is dropped with it.
+        """
+
+        with response:
+            try:
+                response.raise_for_status()
+                value = parse(response.raw)
+            finally:
+                game["bytes"] += response.raw.tell()
+            if reuse:
+                response.raw.drain_conn()
+        return value
+
+    def _fetch_diff(self, game_id, game):
+        url = f"{API_ROOT}/game/{game_id}/feed/live/diffPatch?startTimecode={game['timecode']}"
+        patches = self._read(game, self._get(game, url))
+
+        # The endpoint returns a list of {"diff": [operations]} (or plain operations)
+        feed = game["feed"]
+        for patch in patches:
+            operations = patch.get("diff", [patch]) if isinstance(patch, dict) else patch
+            feed = apply_patch(feed, operations, skip_missing=self.paths is not None)
+
+        game["diffs"] += 1
+        return feed
+
+    def _fetch_full(self, game_id, game):
+        url = f"{API_ROOT}/game/{game_id}/feed/live"
+        headers = dict()
+        if game["feed"] is not None and game["etag"]:
+            headers["If-None-Match"] = game["etag"]
+        if game["feed"] is not None and game["last_modified"]:
+            headers["If-Modified-Since"] = game["last_modified"]
+
+        response = self._get(game, url, headers)
+        if response.status_code == 304:
+            # A streamed response holds its connection until it is read & closed - a 304 has no body
+            response.raw.drain_conn()
+            response.close()
+            game["not_modified"] += 1
+            return game["feed"]
+
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if self.paths is None:
+            feed = self._read(game, response)
+        else:
+            # Only the requested paths (plus the timecode needed for diff patches) are built
+            paths = list(self.paths) + ["metaData.timeStamp"]
+            feed = self._read(game, response, lambda raw: extract_paths(raw, paths), reuse=False)
+
+        game["etag"], game["last_modified"] = etag, last_modified
+        return feed
+
+    def fetch(self, game_id):
+        """ Returns the latest live feed for a game (diff patch -> conditional full download).
+
+        Args:
+            game_id: NHL Game ID
+
+        Returns:
+            dict: the live feed
+        """
+
+        game = self._game(game_id)
+        feed = None
+
+        if self.use_diff_patch and game["feed"] is not None and game["timecode"]:
+            try:
+                feed = self._fetch_diff(game_id, game)
+            except Exception as e:
+                logging.warning("Diff patch failed for %s - falling back to the full live feed: %s", game_id, e)
+                # The cached feed may be partially patched - force an unconditional download
+                game["feed"] = None
+
+        if feed is None:
+            feed = self._fetch_full(game_id, game)
+
+        game["feed"] = feed
+        game["timecode"] = feed.get("metaData", {}).get("timeStamp")
+        return feed
+
+    def stats(self, game_id):
+        """ Returns the transfer stats for a game (bytes, requests, 304s & diff patches). """
+        game = self._game(game_id)
+        return {key: game[key] for key in ("bytes", "requests", "not_modified", "diffs")}
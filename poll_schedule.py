@@ -0,0 +1,68 @@
+"""
+This module works out how long a poller should sleep before checking a game again.
+Polls are sparse while the horn is far away (early in a period, long before puck drop)
+& tight near the end of a period. The game clock never runs faster than the wall
+clock, so sleeping for the time left on the clock can never sleep through the horn.
+"""
+
+from datetime import datetime, timezone
+
+import dateutil.parser
+
+# Default bounds (seconds) - can be overridden in config.yml (script: min_poll_seconds / max_poll_seconds)
+MIN_POLL_SECONDS = 10
+MAX_POLL_SECONDS = 300
+
+# Sleep at most this long before puck drop so a delayed start is not missed by much
+MAX_PREVIEW_SECONDS = 1800
+
+
+def clock_to_seconds(clock):
+    """ Converts a period clock (ex: '12:34') to seconds - 'END' (or any non-clock value) is 0. """
+
+    try:
+        minutes, seconds = clock.split(":")
+        return int(minutes) * 60 + int(seconds)
+    except (AttributeError, ValueError):
+        return 0
+
+
+def next_poll_delay(game_state, linescore, start_time=None, now=None,
+                    min_poll=MIN_POLL_SECONDS, max_poll=MAX_POLL_SECONDS):
+    """ Returns the number of seconds to wait before the next poll of a game.
+
+    Args:
+        game_state: abstractGameState (Preview, Live or Final)
+        linescore: the game's linescore dictionary
+        start_time: scheduled start (ISO 8601 string or datetime) - used while in Preview
+        now: current time (defaults to now, UTC)
+        min_poll / max_poll: bounds for the delay in seconds
+
+    Returns:
+        int: seconds until the next poll
+    """
+
+    now = now or datetime.now(timezone.utc)
+
+    if game_state == "Final":
+        return 0
+
+    if game_state == "Preview":
+        if start_time is None:
+            return max_poll
+        start_time = dateutil.parser.parse(start_time) if isinstance(start_time, str) else start_time
+        until_start = (start_time - now).total_seconds()
+
+        # Past the scheduled start (late puck drop) - the first period is 20 minutes long anyway
+        if until_start <= 0:
+            return max_poll
+        return int(min(max(until_start, min_poll), MAX_PREVIEW_SECONDS))
+
+    intermission_info = linescore.get("intermissionInfo", {})
+    if intermission_info.get("inIntermission"):
+        # Poll again once the intermission is over
+        return int(max(intermission_info.get("intermissionTimeRemaining", 0), min_poll))
+
+    period_remaining = clock_to_seconds(linescore.get("currentPeriodTimeRemaining"))
+    return int(min(max(period_remaining, min_poll), max_poll))
+
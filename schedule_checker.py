@@ -22,11 +22,14 @@ to_zone = tz.tzlocal()
 # Get a instance of the current user crontab
 cron = CronTab(user=True)
 
+# Shared HTTP session (keep-alive connections for the NHL API & Slack)
+http_session = requests.Session()
+
 
 def slack_webhook(webhook_url, icon, msg):
     slack_data = {"username": "shotmap cron scheduler", "icon_emoji": icon, "text": msg}
 
-    response = requests.post(
+    response = http_session.post(
         webhook_url, data=json.dumps(slack_data), headers={"Content-Type": "application/json"}
     )
 
@@ -42,7 +45,7 @@ def is_game_today():
     # url = f"https://statsapi.web.nhl.com/api/v1/schedule?date=2019-09-16&expand=schedule.linescore"
     url = f"https://statsapi.web.nhl.com/api/v1/schedule?date={today:%Y-%m-%d}&expand=schedule.linescore"
 
-    schedule = requests.get(url).json()
+    schedule = http_session.get(url, timeout=30).json()
     total_games = schedule["totalGames"]
 
     if total_games == 0:
@@ -73,6 +76,11 @@ if __name__ == "__main__":
     # Remove all old lambda trigger functions
     logging.info("Removing all old Lambda trigger schedules.")
     cron.remove_all(comment="Lambda Shotmap Trigger")
+    cron.remove_all(comment="Lambda Shotmap Poller")
+
+    # In events mode the scraper Lambda is triggered by the period end / game end play events
+    # from the play-by-play SNS topic, so no poller needs to run
+    trigger_mode = config["script"].get("trigger_mode", "poller")
 
     game_today, games = is_game_today()
     if not game_today:
@@ -80,6 +88,9 @@ if __name__ == "__main__":
         cron.write()
         sys.exit()
 
+    # A single poller process tracks every game - it starts with the first game of the day
+    first_game_local = None
+
     for game in games:
         game_id = game["gamePk"]
         game_date = game["gameDate"]
@@ -91,30 +102,36 @@ if __name__ == "__main__":
         # Convert to local time zone
         game_date_local = game_date_parsed.astimezone(to_zone)
         game_date_local_str = datetime.strftime(game_date_local, "%I:%M %p")
-        minute = game_date_local.minute
-        hour = game_date_local.hour
 
         # Generate Slack String
         slack_str = f"{game_date_local_str} - {home_team} vs. {away_team} ({game_id})"
         slack_games.append(slack_str)
 
-        # Generate crontab object
-        logging.info(
-            "Creating crontab object for %s vs. %s (%s) @ %s",
-            home_team,
-            away_team,
-            game_id,
-            game_date_local_str,
+        if first_game_local is None or game_date_local < first_game_local:
+            first_game_local = game_date_local
+
+    slack_msg = "\n".join(slack_games)
+
+    if trigger_mode == "events":
+        logging.info("Trigger mode is events - the scraper Lambda is triggered via SNS, no poller is scheduled.")
+        slack_webhook(
+            webhook_url=config["script"]["slack_webhook"],
+            icon=":alarm_clock:",
+            msg=f"Shotmaps will be triggered by play events for the following games today:\n{slack_msg}",
         )
+        cron.write()
+        sys.exit()
 
-        cmd = f"{PYTHON_EXEC} {PROJECT_ROOT}/lambda_trigger.py --gameid={game_id}"
-        job = cron.new(command=cmd, comment="Lambda Shotmap Trigger")
-        job.minute.on(minute)
-        job.hour.on(hour)
-        logging.info("CRON JOB: %s", job)
+    # Generate crontab object
+    logging.info("Creating poller crontab object for %s games @ %s", len(games), f"{first_game_local:%I:%M %p}")
+
+    cmd = f"{PYTHON_EXEC} {PROJECT_ROOT}/game_poller.py --date={datetime.now():%Y-%m-%d}"
+    job = cron.new(command=cmd, comment="Lambda Shotmap Poller")
+    job.minute.on(first_game_local.minute)
+    job.hour.on(first_game_local.hour)
+    logging.info("CRON JOB: %s", job)
 
     # print(cron)
-    slack_msg = "\n".join(slack_games)
     slack_webhook(
         webhook_url=config["script"]["slack_webhook"],
         icon=":alarm_clock:",
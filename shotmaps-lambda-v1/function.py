@@ -5,12 +5,16 @@ from datetime import datetime
 import boto3
 import matplotlib.image as mpimg
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import requests
 import seaborn as sns
 import tweepy
 from PIL import Image
 
+# Shared with the trigger pollers (shotmaps-shared layer)
+import nhl_fetch
+
 # These are the only events we want to get coordinates for
 MAPPED_EVENTS = ('SHOT', 'MISSED_SHOT', 'GOAL')
 
@@ -50,8 +54,136 @@ def get_game_id(event: dict):
     return {"status": True, "game_id": game_id}
 
 
+def get_livefeed_paths(game_id, paths: list) -> dict:
+    """ Streams the live feed & builds only the values at the requested (dotted) paths
+        (see nhl_fetch.extract_paths - it stops reading as soon as every path was found).
+
+    Args:
+        game_id: NHL Game ID
+        paths: dotted paths to extract (ex: ['liveData.plays.allPlays'])
+
+    Returns:
+        dict: {path: value} for every path that was found
+    """
+
+    url = f'{nhl_fetch.API_ROOT}/game/{game_id}/feed/live'
+
+    with requests.get(url, stream=True, timeout=30) as response:
+        response.raw.decode_content = True
+        document = nhl_fetch.extract_paths(response.raw, paths)
+
+    values = {path: nhl_fetch.get_path(document, path) for path in paths}
+    return {path: value for path, value in values.items() if value is not None}
+
+
 def all_plays_parser(home_team: str, away_team: str, all_plays: dict):
     """ Takes the JSON object of all game events and generates a pandas dataframe.
+        The mapped plays are read into typed arrays in one pass - the coordinate flips
+        & the out of rink filter then run on the whole arrays at once.
+
+    Args:
+        home_team: Home Team name
+        away_team: Away Team Name
+        all_plays: All plays JSON dictionary (allPlays) from livefeed endpoint
+
+    Returns:
+        (home_df, away_df): DataFrames of the mapped events for each team
+    """
+
+    n = len(all_plays)
+    event_type = np.empty(n, dtype=object)
+    is_home = np.zeros(n, dtype=bool)
+    period = np.zeros(n, dtype=np.int16)
+    coords_x = np.empty(n)
+    coords_y = np.empty(n)
+    strength = np.empty(n, dtype=object)
+    count = 0
+
+    # Single pass - only mapped plays with coordinates are kept
+    for play in all_plays:
+        result = play['result']
+        play_type = result['eventTypeId']
+        if play_type not in MAPPED_EVENTS:
+            continue
+
+        coordinates = play.get('coordinates', {})
+        if 'x' not in coordinates or 'y' not in coordinates:
+            continue
+
+        event_type[count] = play_type
+        is_home[count] = play['team']['name'] == home_team
+        period[count] = play['about']['period']
+        coords_x[count] = coordinates['x']
+        coords_y[count] = coordinates['y']
+        strength[count] = result['strength']['code'] if play_type == 'GOAL' else 'N/A'
+        count += 1
+
+    event_type, is_home, period = event_type[:count], is_home[:count], period[:count]
+    coords_x, coords_y, strength = coords_x[:count], coords_y[:count], strength[:count]
+
+    # Flip coordinates if 2nd period (or overtime)
+    period_flip = np.where(period % 2 == 0, -1, 1)
+    coords_x = coords_x * period_flip
+    coords_y = coords_y * period_flip
+
+    # Plays outside of the grid are dropped (unless its a Goal)
+    in_rink = (event_type == 'GOAL') | ((np.abs(coords_x) <= 100) & (np.abs(coords_y) <= 42.5))
+
+    # Home events are shown on the right side (x >= 0) & away events on the left side
+    side_flip = np.where((is_home & (coords_x < 0)) | (~is_home & (coords_x > 0)), -1, 1)
+    coords_x = coords_x * side_flip
+    coords_y = coords_y * side_flip
+
+    events_df = pd.DataFrame({
+        'period': period,
+        'event_type': event_type,
+        'strength': strength,
+        'coords_x': coords_x,
+        'coords_y': coords_y,
+    })
+
+    home_df = events_df.loc[in_rink & is_home].reset_index(drop=True)
+    away_df = events_df.loc[in_rink & ~is_home].reset_index(drop=True)
+
+    return home_df, away_df
+
+
+def benchmark_parsers(home_team: str, away_team: str, all_plays: dict, repeat: int = 20):
+    """ Times all_plays_parser against the per-play reference parser & checks both return the same events.
+
+    Args:
+        home_team: Home Team name
+        away_team: Away Team Name
+        all_plays: All plays JSON dictionary (allPlays) from livefeed endpoint
+        repeat: number of timed runs per parser
+
+    Returns:
+        dict: best run time (ms) per parser, the speedup & whether the outputs match
+    """
+
+    import timeit
+
+    timings = dict()
+    for name, parser in (('loop', all_plays_parser_loop), ('vectorized', all_plays_parser)):
+        runs = timeit.repeat(lambda: parser(home_team, away_team, all_plays), number=1, repeat=repeat)
+        timings[name] = round(min(runs) * 1000, 3)
+
+    matches = all(
+        np.allclose(loop_df[['period', 'coords_x', 'coords_y']].to_numpy(dtype=float),
+                    vectorized_df[['period', 'coords_x', 'coords_y']].to_numpy(dtype=float))
+        and loop_df['event_type'].tolist() == vectorized_df['event_type'].tolist()
+        and loop_df['strength'].tolist() == vectorized_df['strength'].tolist()
+        for loop_df, vectorized_df in zip(all_plays_parser_loop(home_team, away_team, all_plays),
+                                          all_plays_parser(home_team, away_team, all_plays))
+    )
+
+    return {'plays': len(all_plays), **timings, 'speedup': round(timings['loop'] / timings['vectorized'], 2),
+            'outputs_match': matches}
+
+
+def all_plays_parser_loop(home_team: str, away_team: str, all_plays: dict):
+    """ Takes the JSON object of all game events and generates a pandas dataframe one play at a time.
+        Kept as the reference implementation for all_plays_parser (see benchmark_parsers).
 
     Args:
         home_team: Home Team name
@@ -96,7 +228,6 @@ def all_plays_parser(home_team: str, away_team: str, all_plays: dict):
         strength = play['result']['strength']['code'] if event_type == 'GOAL' else 'N/A'
 
         event = {}
-        event['id'] = id
         event['period'] = period
         event['event_type'] = event_type
         event['strength'] = strength
@@ -228,10 +359,13 @@ def lambda_handler(event, context):
     game_id = game_id_dict['game_id']
 
     # Until we have a trigger for this function, just go get the live feed of a particular game.
-    feed = requests.get(f'https://statsapi.web.nhl.com/api/v1/game/{game_id}/feed/live').json()
-    home_team = feed['gameData']['teams']['home']['name']
-    away_team = feed['gameData']['teams']['away']['name']
-    all_plays = feed['liveData']['plays']['allPlays']
+    # Only the team names & plays are needed, so nothing else is built from the feed
+    feed = get_livefeed_paths(
+        game_id, ['gameData.teams.home.name', 'gameData.teams.away.name', 'liveData.plays.allPlays']
+    )
+    home_team = feed['gameData.teams.home.name']
+    away_team = feed['gameData.teams.away.name']
+    all_plays = feed.get('liveData.plays.allPlays', [])
 
     # If all_plays is empty, return a message & exit the script
     if not all_plays:
@@ -254,3 +388,24 @@ def lambda_handler(event, context):
     return_dict['tweet'] = status
 
     return return_dict
+
+
+if __name__ == '__main__':
+    # Benchmark the play parsers on a recorded live feed (ex: python function.py --benchmark feed.json)
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--benchmark', help='recorded live feed JSON', required=True)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.benchmark) as f:
+        recorded_feed = json.load(f)
+
+    print(benchmark_parsers(
+        recorded_feed['gameData']['teams']['home']['name'],
+        recorded_feed['gameData']['teams']['away']['name'],
+        recorded_feed['liveData']['plays']['allPlays'],
+        repeat=args.repeat,
+    ))
@@ -0,0 +1,240 @@
+"""
+This module caches the report pages that hockey_scraper downloads, so warm
+containers (and retries) only download the parts of a game that changed since
+the previous scrape. Pages are stored on disk (/tmp or any other directory) keyed
+by URL - a page younger than the TTL is served without a request, an older page is
+revalidated with its ETag / Last-Modified (a 304 re-uses the stored copy).
+The least recently used pages are evicted once the cache grows past its size cap.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+import clients
+
+HTTP_CACHE_DIR = os.environ.get("HTTP_CACHE_DIR", "/tmp/http-cache")
+HTTP_CACHE_TTL = int(os.environ.get("HTTP_CACHE_TTL", 0))
+HTTP_CACHE_MAX_BYTES = int(os.environ.get("HTTP_CACHE_MAX_MB", 256)) * 1024 * 1024
+
+# hockey_scraper pauses after every page it downloads (kept for requests that reach the server)
+SCRAPE_PAGE_DELAY = float(os.environ.get("SCRAPE_PAGE_DELAY", 1))
+
+
+class HTTPCache:
+    """ Disk-backed HTTP response cache with TTL / ETag validation and an LRU size cap. """
+
+    def __init__(self, directory: str, ttl: int = 0, max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+
+        # Size of every cached body - the file mtime is the last time it was used
+        self._sizes = dict()
+        for name in os.listdir(directory):
+            if name.endswith(".body"):
+                self._sizes[name[: -len(".body")]] = os.path.getsize(os.path.join(directory, name))
+
+    def _paths(self, key):
+        return os.path.join(self.directory, f"{key}.body"), os.path.join(self.directory, f"{key}.meta")
+
+    def _load(self, key):
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def _store(self, key, meta, body=None):
+        """ Writes the meta (and body if given) - temporary files keep concurrent writers from clashing. """
+
+        body_path, meta_path = self._paths(key)
+        suffix = f".{os.getpid()}-{threading.get_ident()}.tmp"
+        files = [(meta_path, json.dumps(meta), "w")]
+        if body is not None:
+            files.append((body_path, body, "wb"))
+
+        for path, data, mode in files:
+            with open(f"{path}{suffix}", mode) as f:
+                f.write(data)
+            os.replace(f"{path}{suffix}", path)
+
+        if body is not None:
+            with self._lock:
+                self._sizes[key] = len(body)
+            self._evict()
+
+    def _touch(self, key):
+        body_path, _ = self._paths(key)
+        try:
+            os.utime(body_path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """ Removes the least recently used pages until the cache fits in max_bytes. """
+
+        with self._lock:
+            total = sum(self._sizes.values())
+            if total <= self.max_bytes:
+                return
+
+            def last_used(key):
+                try:
+                    return os.path.getmtime(self._paths(key)[0])
+                except OSError:
+                    return 0
+
+            for key in sorted(self._sizes, key=last_used):
+                if total <= self.max_bytes:
+                    break
+                for path in self._paths(key):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= self._sizes.pop(key)
+                self.stats["evicted"] += 1
+
+    def get(self, url: str, timeout: int = 5):
+        """ Returns the body of a URL from the cache or the network.
+
+        Args:
+            url: page URL (the cache key)
+            timeout: request timeout in seconds
+
+        Returns:
+            (bytes, encoding, bool): response body, text encoding & whether the server was contacted
+        """
+
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        meta, body = self._load(key)
+
+        if meta is not None and time.time() - meta["stored_at"] < self.ttl:
+            self._touch(key)
+            self._count("hit", bytes_saved=len(body))
+            return body, meta["encoding"], False
+
+        # Conditional request - the server only sends the page again if it changed
+        headers = dict()
+        if meta is not None and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta is not None and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = clients.get_http_session().get(url, headers=headers, timeout=timeout)
+
+        if response.status_code == 304 and meta is not None:
+            meta["stored_at"] = time.time()
+            self._store(key, meta)
+            self._touch(key)
+            self._count("revalidated", bytes_saved=len(body))
+            return body, meta["encoding"], True
+
+        response.raise_for_status()
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            # Same fallback as response.text when the server sends no charset
+            "encoding": response.encoding or response.apparent_encoding,
+            "stored_at": time.time(),
+        }
+        self._store(key, meta, response.content)
+        self._count("miss", bytes_downloaded=len(response.content))
+        return response.content, meta["encoding"], True
+
+    def _count(self, result, bytes_saved=0, bytes_downloaded=0):
+        with self._lock:
+            self.stats[result] += 1
+            self.stats["bytes_saved"] += bytes_saved
+            self.stats["bytes_downloaded"] += bytes_downloaded
+
+    def report(self):
+        """ Returns the hit ratio (fresh hits & 304s) and bytes saved since the last reset. """
+
+        with self._lock:
+            requests_total = self.stats["hit"] + self.stats["revalidated"] + self.stats["miss"]
+            hits = self.stats["hit"] + self.stats["revalidated"]
+            report = dict(self.stats)
+            report["hit_ratio"] = round(hits / requests_total, 3) if requests_total else 0.0
+            return report
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """ Returns the module-level cache (created on first use & kept across warm invocations). """
+
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HTTPCache(HTTP_CACHE_DIR, ttl=HTTP_CACHE_TTL)
+    return _cache
+
+
+def cached_scrape_page(url):
+    """ Drop-in replacement for hockey_scraper.utils.shared.scrape_page that reads through the cache.
+
+    Args:
+        url: url for page
+
+    Returns:
+        str: the page text or None if it could not be retrieved
+    """
+
+    import requests
+
+    try:
+        body, encoding, is_network = get_cache().get(url)
+    except (requests.exceptions.HTTPError, requests.exceptions.ConnectionError):
+        time.sleep(SCRAPE_PAGE_DELAY)
+        return None
+    except requests.exceptions.ReadTimeout:
+        # Same as hockey_scraper - a schedule timeout is fatal, any other page is just missing
+        if "schedule" in url:
+            raise Exception("Timeout Error: The NHL API took too long to respond to our request.")
+        logging.error("Timeout Error: The server took too long to respond to our request (%s).", url)
+        return None
+
+    if is_network:
+        time.sleep(SCRAPE_PAGE_DELAY)
+
+    return body.decode(encoding or "utf-8", errors="replace")
+
+
+def install():
+    """ Routes every page hockey_scraper downloads through the cache (disable with HTTP_CACHE=false). """
+
+    if os.environ.get("HTTP_CACHE", "true").lower() == "false":
+        return False
+
+    from hockey_scraper.utils import shared
+
+    if not hasattr(shared, "scrape_page"):
+        logging.warning("This hockey_scraper version has no shared.scrape_page - the HTTP cache is not used.")
+        return False
+
+    shared.scrape_page = cached_scrape_page
+    return True
+
+
+def log_stats():
+    logging.info("HTTP cache stats: %s", get_cache().report())
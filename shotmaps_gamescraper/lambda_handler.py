@@ -2,16 +2,48 @@ import argparse
 import json
 import logging
 import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from boto3 import client as boto3_client
 import hockey_scraper
 
-lambda_client = boto3_client("lambda")
+import clients
+import http_cache
+import livefeed_pbp
+import payload_codec
+import payload_store
 
 logger = logging.getLogger()
 logger.setLevel(logging.DEBUG) if os.environ.get("LOGLEVEL") == "DEBUG" else logger.setLevel(logging.INFO)
 
+# Events trigger mode - only period end / game end play events from the play-by-play SNS topic start a scrape
+# Off by default: every play event is processed (ex: the SNS subscription already has a filter policy)
+SNS_EVENT_FILTER = os.environ.get("SNS_EVENT_FILTER", "false").lower() == "true"
+
+# Play event types (result.eventTypeId) that trigger a scrape when SNS_EVENT_FILTER is on
+SNS_TRIGGER_EVENTS = os.environ.get("SNS_TRIGGER_EVENTS", "PERIOD_END,GAME_END")
+TRIGGER_EVENT_TYPES = {e.strip() for e in SNS_TRIGGER_EVENTS.split(",") if e.strip()}
+
+# Seconds an invocation owns a game-period before another invocation may take it over
+LEASE_SECONDS = int(os.environ.get("LEASE_SECONDS", 900))
+
+# Report pages are read through the local HTTP cache (only changed pages are downloaded again)
+HTTP_CACHE_INSTALLED = http_cache.install()
+
+# Where the play by play comes from - hockey_scraper (report pages) or livefeed (one feed/live request)
+# Can be overridden per invocation with the "source" field of a direct event
+PBP_SOURCE = os.environ.get("PBP_SOURCE", "hockey_scraper")
+
+# Maximum number of games scraped at the same time in one invocation (1 scrapes one game at a time)
+SCRAPE_WORKERS = int(os.environ.get("SCRAPE_WORKERS", 4))
+
+# hockey_scraper keeps module-level state (game_scraper's broken / missing lists, config.DOCS_DIR &
+# config.RESCRAPE) that every scrape_games call resets - only one hockey_scraper scrape runs at a time
+HOCKEY_SCRAPER_LOCK = threading.Lock()
+
 # Test-based global variables
 TESTING = False
 TEST_TOPICS = [
@@ -21,7 +53,7 @@ TEST_TOPICS = [
 
 
 def get_game_id(event: dict):
-    """ Takes the event & tries to determine & validate the Game ID.
+    """ Takes a direct (non-SNS) event & tries to determine & validate the Game ID.
 
     Args:
         event: event passed into the AWS Lambda
@@ -42,18 +74,18 @@ def get_game_id(event: dict):
     trigger_testing = event.get("testing")
     TESTING = trigger_testing if trigger_testing is not None else TESTING
 
-    if not game_id and event.get("Records") is not None:
-        logging.info(
-            "Game ID is still none - this is an SNS message & the gameId is contained in the message field."
-        )
-        sns_record = event.get("Records")
-        sns_record = sns_record[0]
-        sns_event = sns_record.get("Sns")
-        topic = sns_event.get("TopicArn")
+    return validate_game_id(game_id)
+
 
-        msg = sns_event.get("Message")
-        msg_json = json.loads(msg)
-        game_id = msg_json.get("gamePk")
+def validate_game_id(game_id):
+    """ Validates that a Game ID meets all criteria to actually run this script.
+
+    Args:
+        game_id: NHL Game ID (str or int)
+
+    Returns:
+        dict: {status, game_id, msg}
+    """
 
     if not game_id or game_id is None:
         logging.error("An NHL Game ID is required for this script to run.")
@@ -79,71 +111,210 @@ def get_game_id(event: dict):
     return {"status": True, "game_id": game_id}
 
 
-def check_db_for_last_period(game_id):
-    dynamo_client = boto3_client("dynamodb")
-    response = dynamo_client.get_item(
-        TableName='nhl-shotmaps-tracking',
-        Key={'gamePk': {'N': game_id}}
-    )
+def is_trigger_event(message: str):
+    """ Checks if a play-by-play SNS message should trigger a scrape - with SNS_EVENT_FILTER on only
+        period end or game end events do. Most plays are not, so a substring check on the raw message
+        filters them out before the JSON is parsed (or any DynamoDB / scrape work is done).
 
-    try:
-        item = response['Item']
-        last_period_processed = int(item['lastPeriodProcessed']['N'])
-    except KeyError:
-        logging.info("NEW Game Detected - record does not exist yet.")
-        last_period_processed = 0
+    Args:
+        message: raw SNS message (JSON string of the play event)
 
-    return last_period_processed
+    Returns:
+        bool: True if this event should trigger a scrape
+    """
 
+    if not SNS_EVENT_FILTER:
+        return True
 
-def is_event_period_newer(game_id, event_period):
-    db_last_period = check_db_for_last_period(game_id)
-    return bool(event_period > db_last_period)
+    if not any(f'"{event_type}"' in message for event_type in TRIGGER_EVENT_TYPES):
+        return False
 
+    # The event type name can also appear in other fields - confirm it on the parsed play
+    play = json.loads(message).get("play", {})
+    return play.get("result", {}).get("eventTypeId") in TRIGGER_EVENT_TYPES
 
-def lambda_handler(event, context):
-    LAMBDA_GENERATOR = os.environ.get("LAMBDA_GENERATOR")
-    IS_SNS_TRIGGER = bool(event.get("Records"))
 
-    game_id_dict = get_game_id(event)
-    game_id_status = game_id_dict["status"]
+def get_record_message(record: dict):
+    """ Returns the play event message (JSON string) of an SNS record or of an SQS record
+        (topic subscribed by a queue - the body is the SNS envelope, or the message itself
+        if raw message delivery is enabled).
 
-    if IS_SNS_TRIGGER:
-        msg = event['Records'][0]['Sns']['Message']
-
-        # Convert Message back to JSON Object
-        msg = json.loads(msg)
-
-        game_id = msg['gamePk']
-        period = msg['play']['about']['period']
-        goals = msg['play']['about']['goals']
-        home_score = goals['home']
-        away_score = goals['away']
-    else:
-        # Get scores directly from event payload
-        home_score = event.get("home_score")
-        away_score = event.get("away_score")
-
-    if not game_id_status:
-        logging.error(game_id_dict["msg"])
-        return {"status": False, "msg": game_id_dict["msg"]}
+    Args:
+        record: one of event['Records'] passed into the AWS Lambda
 
-    # If status is True, set the game_id variable
-    game_id = game_id_dict["game_id"]
+    Returns:
+        str: the play event message or None for a record from any other source
+    """
 
-    # Check that the event period is greater than the last processed period
-    is_event_newer = is_event_period_newer(game_id, period)
-    if not is_event_newer:
-        logging.error("The event received for %s is not newer than the last "
-                      "event recorded in the database - skip this record.", game_id)
+    source = record.get("EventSource") or record.get("eventSource")
+    if source == "aws:sns":
+        return record['Sns']['Message']
 
-        return {
-            'status': 409,
-            'body': 'A shotmap was already produced for this event.'
+    if source == "aws:sqs":
+        body = record['body']
+        envelope = json.loads(body)
+        if isinstance(envelope, dict) and envelope.get("Type") == "Notification" and "Message" in envelope:
+            return envelope["Message"]
+        return body
+
+    logging.error("Skipping a record from an unsupported event source: %s", source)
+    return None
+
+
+def get_sns_events(records: list):
+    """ Decodes every record of an SNS (or SQS) delivery & keeps the play events that trigger a scrape.
+
+    Args:
+        records: event['Records'] passed into the AWS Lambda
+
+    Returns:
+        list: decoded play event messages
+    """
+
+    messages = [get_record_message(record) for record in records]
+    return [json.loads(message) for message in messages if message is not None and is_trigger_event(message)]
+
+
+def coalesce_events(messages: list):
+    """ Keeps only the newest period per game - a burst of events for one game becomes a single scrape.
+
+    Args:
+        messages: decoded play event messages
+
+    Returns:
+        dict: {game_id: {period, home_score, away_score}} for every valid game
+    """
+
+    games = dict()
+    for msg in messages:
+        game_id_dict = validate_game_id(msg.get('gamePk'))
+        if not game_id_dict["status"]:
+            logging.error(game_id_dict["msg"])
+            continue
+
+        game_id = game_id_dict["game_id"]
+        about = msg['play']['about']
+        if game_id in games and games[game_id]["period"] > about['period']:
+            continue
+
+        # For the same period the later event (ex: GAME_END after PERIOD_END) has the final score
+        games[game_id] = {
+            "period": about['period'],
+            "home_score": about['goals']['home'],
+            "away_score": about['goals']['away'],
         }
 
-    # If all of the above checks pass, scrape the game.
-    scraped_data = hockey_scraper.scrape_games([game_id], False, data_format="Pandas")
+    return games
+
+
+def get_last_periods(game_ids: list):
+    """ Looks up the last processed period of every game with batched reads (100 keys per request).
+
+    Args:
+        game_ids: NHL Game IDs
+
+    Returns:
+        dict: {game_id: last_period_processed} - new games (no record yet) are 0
+    """
+
+    dynamo_client = clients.get_client("dynamodb")
+    last_periods = {game_id: 0 for game_id in game_ids}
+
+    for i in range(0, len(game_ids), 100):
+        request = {
+            'nhl-shotmaps-tracking': {
+                'Keys': [{'gamePk': {'N': game_id}} for game_id in game_ids[i : i + 100]],
+                'ProjectionExpression': 'gamePk, lastPeriodProcessed',
+            }
+        }
+
+        # DynamoDB can return part of a batch as unprocessed keys - keep asking until it is done
+        while request:
+            response = dynamo_client.batch_get_item(RequestItems=request)
+            for item in response['Responses'].get('nhl-shotmaps-tracking', []):
+                if 'lastPeriodProcessed' in item:
+                    last_periods[item['gamePk']['N']] = int(item['lastPeriodProcessed']['N'])
+            request = response.get('UnprocessedKeys')
+
+    return last_periods
+
+
+def claim_event_period(game_id, event_period, claim_id):
+    """ Atomically claims the scrape & render work for a game-period (claim-first protocol).
+        The claim only succeeds if the period is newer than the last processed period and no
+        other invocation holds an active lease for this (or a later) period. The generator
+        releases the lease & sets lastPeriodProcessed (the completion marker) once it is done.
+
+    Args:
+        game_id: NHL Game ID
+        event_period: period that just ended
+        claim_id: unique ID of this invocation (lease owner)
+
+    Returns:
+        bool: True if this invocation owns the work for this game-period
+    """
+
+    current_ts = int(time.time())
+    dynamo_client = clients.get_client("dynamodb")
+
+    try:
+        dynamo_client.update_item(
+            TableName='nhl-shotmaps-tracking',
+            Key={'gamePk': {'N': game_id}},
+            UpdateExpression="SET leasePeriod = :period, leaseOwner = :owner, leaseExpires = :expires",
+            ConditionExpression=(
+                "(attribute_not_exists(lastPeriodProcessed) OR lastPeriodProcessed < :period) AND "
+                "(attribute_not_exists(leaseExpires) OR leaseExpires < :now OR leasePeriod < :period)"
+            ),
+            ExpressionAttributeValues={
+                ':period': {'N': str(event_period)},
+                ':owner': {'S': claim_id},
+                ':expires': {'N': str(current_ts + LEASE_SECONDS)},
+                ':now': {'N': str(current_ts)}
+            }
+        )
+    except dynamo_client.exceptions.ConditionalCheckFailedException:
+        return False
+
+    return True
+
+
+def release_event_period(game_id, claim_id):
+    """ Releases a lease early (ex: the scrape failed) so a retry does not have to wait for it to expire. """
+
+    dynamo_client = clients.get_client("dynamodb")
+    try:
+        dynamo_client.update_item(
+            TableName='nhl-shotmaps-tracking',
+            Key={'gamePk': {'N': game_id}},
+            UpdateExpression="REMOVE leasePeriod, leaseOwner, leaseExpires",
+            ConditionExpression="leaseOwner = :owner",
+            ExpressionAttributeValues={':owner': {'S': claim_id}}
+        )
+    except dynamo_client.exceptions.ConditionalCheckFailedException:
+        logging.info("Lease for %s is no longer owned by %s - nothing to release.", game_id, claim_id)
+
+
+def get_pbp(game_id, source=None):
+    """ Scrapes the play by play dataframe (lowercased columns) for a game.
+
+    Args:
+        game_id: NHL Game ID
+        source: hockey_scraper or livefeed (defaults to PBP_SOURCE)
+
+    Returns:
+        DataFrame: the play by play dataframe
+    """
+
+    source = source or PBP_SOURCE
+    if source == "livefeed":
+        return livefeed_pbp.scrape_game(game_id)
+
+    if source != "hockey_scraper":
+        raise ValueError(f"Unknown play by play source: {source}")
+
+    with HOCKEY_SCRAPER_LOCK:
+        scraped_data = hockey_scraper.scrape_games([game_id], False, data_format="Pandas")
     pbp = scraped_data.get("pbp")
 
     # fmt: off
@@ -156,19 +327,224 @@ def lambda_handler(event, context):
 
     pbp = pbp.drop(cols_to_drop, axis=1)
     pbp.columns = map(str.lower, pbp.columns)
+    return pbp
+
+
+def scrape_game(game_id, period, home_score, away_score, claim_id, source=None):
+    """ Claims a game-period, scrapes the game & triggers the generator for it.
+
+    Args:
+        game_id: NHL Game ID
+        period: period that just ended (None skips the claim)
+        home_score, away_score: scores at the time of the event
+        claim_id: unique ID of this invocation (lease owner)
+        source: play by play source (see get_pbp)
+
+    Returns:
+        dict: payload summary sent to the generator or None if the claim was not won
+    """
+
+    LAMBDA_GENERATOR = os.environ.get("LAMBDA_GENERATOR")
+
+    # Claim this game-period before doing any expensive work - only one invocation can hold the claim
+    # (the period has to be newer than the last processed period & not leased by another invocation)
+    is_claimed = period is None or claim_event_period(game_id, period, claim_id)
+    if not is_claimed:
+        logging.error("The event received for %s is not newer than the last event recorded in the "
+                      "database or is already being processed - skip this record.", game_id)
+        return None
+
+    # If all of the above checks pass, scrape the game.
+    # Any failure before the generator is triggered releases the claim so a retry can take it at once
+    try:
+        pbp = get_pbp(game_id, source)
+
+        # Large frames are written to the payload store (if configured) & only a reference is sent
+        # The claimed period & claim_id let the generator complete (and release) exactly this lease
+        pbp_fields = payload_codec.encode_pbp(pbp, store=payload_store.get_payload_store(), game_id=game_id)
+        payload = {
+            **pbp_fields,
+            "game_id": game_id,
+            "period": period,
+            "claim_id": claim_id,
+            "testing": TESTING,
+            "home_score": home_score,
+            "away_score": away_score,
+        }
+
+        logging.info("Scraping completed for %s. Triggering the generator & twitter Lambda.", game_id)
+
+        invoke_response = clients.get_client("lambda").invoke(
+            FunctionName=LAMBDA_GENERATOR, InvocationType="Event", Payload=json.dumps(payload)
+        )
+    except Exception:
+        release_event_period(game_id, claim_id)
+        raise
 
-    pbp_json = pbp.to_json()
-    payload = {"pbp_json": pbp_json, "game_id": game_id, "testing": TESTING, "home_score": home_score, "away_score": away_score}
     small_payload = {"game_id": game_id, "testing": TESTING, "home_score": home_score, "away_score": away_score}
 
-    logging.info("Scraping completed. Triggering the generator & twitter Lambda.")
+    print(invoke_response)
+
+    return small_payload
+
+
+def get_sns_games(records: list):
+    """ Turns a (possibly batched) SNS delivery into the games that need a scrape.
+        Stale events (period already processed) are dropped against one batched state lookup.
+
+    Args:
+        records: event['Records'] passed into the AWS Lambda
+
+    Returns:
+        dict: {game_id: {period, home_score, away_score}}
+    """
+
+    games = coalesce_events(get_sns_events(records))
+    if not games:
+        return games
+
+    last_periods = get_last_periods(list(games))
+    stale = [game_id for game_id, game in games.items() if game["period"] <= last_periods[game_id]]
+    for game_id in stale:
+        logging.info("Period %s of %s was already processed - skip this game.", games[game_id]["period"], game_id)
+        del games[game_id]
+
+    logging.info("%s SNS records -> %s games to scrape.", len(records), len(games))
+    return games
+
+
+def scrape_batch(games: dict, claim_id, source=None):
+    """ Scrapes a batch of games concurrently (bounded by SCRAPE_WORKERS) & triggers one generator
+        invocation per game. A failure only affects its own game (its claim is released by scrape_game).
+        hockey_scraper scrapes themselves run one at a time (see HOCKEY_SCRAPER_LOCK) - the claims,
+        livefeed scrapes, payload encoding & generator invokes of different games still overlap.
+
+    Args:
+        games: {game_id: {period, home_score, away_score}}
+        claim_id: unique ID of this invocation (lease owner)
+        source: play by play source (see get_pbp)
+
+    Returns:
+        dict: {scraped: [small payloads], skipped: [game_ids], errors: {game_id: error}}
+    """
+
+    def safe_scrape(game_id, game):
+        try:
+            return scrape_game(game_id, claim_id=claim_id, source=source, **game), None
+        except Exception as e:
+            logging.exception("Scraping %s failed.", game_id)
+            return None, repr(e)
+
+    batch_start = time.perf_counter()
+    workers = max(1, min(SCRAPE_WORKERS, len(games)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {game_id: executor.submit(safe_scrape, game_id, game) for game_id, game in games.items()}
+        results = {game_id: future.result() for game_id, future in futures.items()}
+    batch_time = time.perf_counter() - batch_start
+
+    report = {"scraped": [], "skipped": [], "errors": {}}
+    for game_id, (small_payload, error) in results.items():
+        if error is not None:
+            report["errors"][game_id] = error
+        elif small_payload is None:
+            report["skipped"].append(game_id)
+        else:
+            report["scraped"].append(small_payload)
+
+    logging.info("Batch of %s games (%s workers) done in %.2fs.", len(games), workers, batch_time)
 
-    invoke_response = lambda_client.invoke(
-        FunctionName=LAMBDA_GENERATOR, InvocationType="Event", Payload=json.dumps(payload)
+    return report
+
+
+def lambda_handler(event, context):
+    # HTTP cache stats are reported per invocation
+    if HTTP_CACHE_INSTALLED:
+        http_cache.get_cache().reset_stats()
+
+    try:
+        return handle_event(event, context)
+    finally:
+        if HTTP_CACHE_INSTALLED:
+            http_cache.log_stats()
+
+
+def handle_event(event, context):
+    global TESTING
+
+    IS_SNS_TRIGGER = bool(event.get("Records"))
+    claim_id = context.aws_request_id if context is not None else uuid.uuid4().hex
+
+    if IS_SNS_TRIGGER:
+        # Every record (SNS or SQS) is decoded - filtered out play events are dropped before any DynamoDB / scrape work
+        games = get_sns_games(event['Records'])
+        if not games:
+            return {
+                'status': 204,
+                'body': 'No new trigger events - nothing to do.'
+            }
+
+        return {
+            'body': scrape_batch(games, claim_id)
+        }
+
+    # Batch mode - a list of Game IDs (ex: several games reached intermission at the same time)
+    if event.get("game_ids"):
+        TESTING = event.get("testing", TESTING)
+
+        games = dict()
+        for game_id in event["game_ids"]:
+            game_id_dict = validate_game_id(game_id)
+            if not game_id_dict["status"]:
+                logging.error(game_id_dict["msg"])
+                continue
+            games[game_id_dict["game_id"]] = {"period": None, "home_score": None, "away_score": None}
+
+        return {
+            'body': scrape_batch(games, claim_id, source=event.get("source"))
+        }
+
+    game_id_dict = get_game_id(event)
+    if not game_id_dict["status"]:
+        logging.error(game_id_dict["msg"])
+        return {"status": False, "msg": game_id_dict["msg"]}
+
+    # Get scores & period directly from event payload
+    small_payload = scrape_game(
+        game_id_dict["game_id"],
+        period=event.get("period"),
+        home_score=event.get("home_score"),
+        away_score=event.get("away_score"),
+        claim_id=claim_id,
+        source=event.get("source"),
     )
 
-    print(invoke_response)
+    if small_payload is None:
+        return {
+            'status': 409,
+            'body': 'A shotmap was already produced for this event.'
+        }
 
     return {
         'body': small_payload
     }
+
+
+if __name__ == "__main__":
+    # Replays a recorded SNS / SQS delivery (or a JSON list of them) & shows the invocations / scrapes it causes
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replay", required=True, help="recorded SNS / SQS event(s) JSON file")
+    args = parser.parse_args()
+
+    with open(args.replay) as f:
+        deliveries = json.load(f)
+    deliveries = deliveries if isinstance(deliveries, list) else [deliveries]
+
+    records = [record for delivery in deliveries for record in delivery['Records']]
+    trigger_events = get_sns_events(records)
+    games = coalesce_events(trigger_events)
+
+    print(f"Invocations: {len(deliveries)} - records: {len(records)} ({len(trigger_events)} period / game end events)")
+    print(f"Scrapes (one per period / game end record): {len(trigger_events)}")
+    print(f"Scrapes (coalesced per game): {len(games)} - before the DynamoDB stale check")
+    for game_id, game in games.items():
+        print(f"  {game_id}: period {game['period']}")
@@ -0,0 +1,371 @@
+"""
+This module builds the play by play dataframe straight from the NHL live feed
+(one feed/live request) instead of the report pages hockey_scraper downloads.
+The output uses the same (lowercased) columns & values as the hockey_scraper
+frame the generator expects (see payload_codec.GENERATOR_COLUMNS).
+
+The plays are read into typed column arrays in one pass & everything derived
+(event names, zones, strength) is calculated with array operations.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+import clients
+
+LIVEFEED_URL = "https://statsapi.web.nhl.com/api/v1/game/{game_id}/feed/live"
+
+# Live feed event types (result.eventTypeId) -> hockey_scraper (html report) event names
+EVENT_NAMES = {
+    "PERIOD_START": "PSTR",
+    "FACEOFF": "FAC",
+    "BLOCKED_SHOT": "BLOCK",
+    "GAME_END": "GEND",
+    "GIVEAWAY": "GIVE",
+    "GOAL": "GOAL",
+    "HIT": "HIT",
+    "MISSED_SHOT": "MISS",
+    "PERIOD_END": "PEND",
+    "SHOT": "SHOT",
+    "STOP": "STOP",
+    "TAKEAWAY": "TAKE",
+    "PENALTY": "PENL",
+    "EARLY_INT_START": "EISTR",
+    "EARLY_INT_END": "EIEND",
+    "SHOOTOUT_COMPLETE": "SOC",
+    "CHALLENGE": "CHL",
+}
+
+# Feed events that are not in the html reports (hockey_scraper drops them too)
+IGNORED_EVENTS = ("GAME_SCHEDULED", "PERIOD_READY", "PERIOD_OFFICIAL", "GAME_OFFICIAL")
+
+# Unblocked shot attempts - used to work out which end each team attacks
+UNBLOCKED_EVENTS = ("SHOT", "MISS", "GOAL")
+
+# Blue lines are 25ft from center ice
+BLUE_LINE_X = 25
+
+# Penalty lengths (minutes) that take a skater off the ice - misconducts (10) do not
+MANPOWER_PENALTY_MINUTES = (2, 4, 5)
+
+# Columns in the same order as the generator reads them
+COLUMNS = [
+    "period", "event", "seconds_elapsed", "strength", "ev_zone", "ev_team", "home_team", "away_team",
+    "p1_name", "p1_id", "p2_name", "p2_id", "home_score", "away_score", "xc", "yc",
+]
+
+
+def get_livefeed(game_id) -> dict:
+    """ Downloads the live feed for a game (shared keep-alive session). """
+
+    response = clients.get_http_session().get(LIVEFEED_URL.format(game_id=game_id), timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+
+def clock_to_seconds(clock: np.ndarray) -> np.ndarray:
+    """ Converts an array of 'MM:SS' period clocks to seconds. """
+
+    parts = np.char.partition(clock.astype(str), ":")
+    return parts[:, 0].astype(int) * 60 + parts[:, 2].astype(int)
+
+
+def extract_columns(all_plays: list) -> dict:
+    """ Reads the plays into typed column arrays. The JSON has to be walked play by play, so this
+        is one Python loop over the plays (about a millisecond for a full game) - every derived
+        column (event names, zones, strength) is then calculated with array operations.
+        Only the first two non-goalie players are kept (hockey_scraper's p1 & p2).
+
+    Args:
+        all_plays: liveData.plays.allPlays from the live feed
+
+    Returns:
+        dict: {column: ndarray} - one entry per play
+    """
+
+    n = len(all_plays)
+    event_type = np.empty(n, dtype=object)
+    period = np.zeros(n, dtype=np.int16)
+    period_time = np.empty(n, dtype=object)
+    team = np.empty(n, dtype=object)
+    xc = np.full(n, np.nan)
+    yc = np.full(n, np.nan)
+    home_score = np.zeros(n, dtype=np.int16)
+    away_score = np.zeros(n, dtype=np.int16)
+    penalty_minutes = np.zeros(n, dtype=np.int16)
+    p1_name = np.empty(n, dtype=object)
+    p1_id = np.full(n, np.nan)
+    p2_name = np.empty(n, dtype=object)
+    p2_id = np.full(n, np.nan)
+
+    for i, play in enumerate(all_plays):
+        result = play["result"]
+        about = play["about"]
+        event_type[i] = result["eventTypeId"]
+        period[i] = about["period"]
+        period_time[i] = about["periodTime"]
+        home_score[i] = about["goals"]["home"]
+        away_score[i] = about["goals"]["away"]
+        penalty_minutes[i] = result.get("penaltyMinutes", 0)
+
+        if "team" in play:
+            team[i] = play["team"]["triCode"]
+
+        coordinates = play.get("coordinates")
+        if coordinates and "x" in coordinates and "y" in coordinates:
+            xc[i] = coordinates["x"]
+            yc[i] = coordinates["y"]
+
+        # Only the first two skaters are read (no list of all players per play)
+        skaters = (p["player"] for p in play.get("players", ()) if p["playerType"] != "Goalie")
+        skater = next(skaters, None)
+        if skater is not None:
+            p1_name[i], p1_id[i] = skater["fullName"].upper(), skater["id"]
+            skater = next(skaters, None)
+            if skater is not None:
+                p2_name[i], p2_id[i] = skater["fullName"].upper(), skater["id"]
+
+    return {
+        "event_type": event_type, "period": period, "period_time": period_time, "team": team,
+        "xc": xc, "yc": yc, "home_score": home_score, "away_score": away_score,
+        "penalty_minutes": penalty_minutes, "p1_name": p1_name, "p1_id": p1_id, "p2_name": p2_name, "p2_id": p2_id,
+    }
+
+
+def home_attack_sign(period: np.ndarray, event: np.ndarray, ev_team: np.ndarray, xc: np.ndarray,
+                     home_team: str) -> np.ndarray:
+    """ Works out which end the home team attacks in each event's period (+1 = positive x) from
+        where both teams took their unblocked shots. Periods without shots follow the usual
+        alternation (ends switch every period).
+
+    Returns:
+        ndarray: +1 / -1 per event
+    """
+
+    is_shot = np.isin(event, UNBLOCKED_EVENTS) & ~np.isnan(xc)
+    # Away shots count towards the opposite end
+    signed_x = np.where(ev_team == home_team, xc, -xc)
+
+    periods = np.unique(period)
+    index = np.searchsorted(periods, period)
+    shot_sum = np.bincount(index[is_shot], weights=signed_x[is_shot], minlength=len(periods))
+    sign = np.sign(shot_sum)
+
+    # Fill periods without shots from the nearest known period (alternating ends)
+    known = np.flatnonzero(sign)
+    if len(known) == 0:
+        sign = np.where(periods % 2 == 1, 1.0, -1.0)
+    else:
+        nearest = known[np.abs(np.arange(len(periods))[:, None] - known[None, :]).argmin(axis=1)]
+        sign = sign[nearest] * np.where((periods - periods[nearest]) % 2 == 0, 1, -1)
+
+    return sign[index]
+
+
+def event_zones(ev_team: np.ndarray, xc: np.ndarray, home_team: str, attack_sign: np.ndarray) -> np.ndarray:
+    """ Returns the zone (Off / Neu / Def) relative to the event team - blocks are recorded for the
+        blocking team, so they are (like in the html reports) in its defensive zone.
+    """
+
+    team_x = xc * np.where(ev_team == home_team, attack_sign, -attack_sign)
+    zones = np.select([team_x > BLUE_LINE_X, team_x < -BLUE_LINE_X], ["Off", "Def"], default="Neu").astype(object)
+    zones[np.isnan(xc) | pd.isna(ev_team)] = None
+    return zones
+
+
+def event_strength(game_seconds: np.ndarray, period: np.ndarray, event: np.ndarray, ev_team: np.ndarray,
+                   penalty_minutes: np.ndarray, home_team: str, is_regular_season: bool) -> np.ndarray:
+    """ Rebuilds the skater strength ('5x4' = home skaters x away skaters) from the penalties.
+        Coincidental penalties cancel out, minors end early on a goal by the other team, and
+        regular season overtime is 3 on 3 (a penalty adds a skater to the other team).
+        The live feed has no on-ice players, so pulled goalies are not counted.
+
+    Returns:
+        ndarray: strength string per event
+    """
+
+    is_penalty = (event == "PENL") & np.isin(penalty_minutes, MANPOWER_PENALTY_MINUTES)
+    pen_start = game_seconds[is_penalty]
+    pen_minutes = penalty_minutes[is_penalty]
+    pen_home = ev_team[is_penalty] == home_team
+
+    # Coincidental penalties (same time & length, one per team) do not change the manpower
+    keep = np.ones(len(pen_start), dtype=bool)
+    keys = pen_start * 10 + pen_minutes
+    for key in np.unique(keys):
+        same = keys == key
+        home_idx = np.flatnonzero(same & pen_home)
+        away_idx = np.flatnonzero(same & ~pen_home)
+        matched = min(len(home_idx), len(away_idx))
+        keep[home_idx[:matched]] = False
+        keep[away_idx[:matched]] = False
+    pen_start, pen_minutes, pen_home = pen_start[keep], pen_minutes[keep], pen_home[keep]
+    pen_end = pen_start + pen_minutes * 60
+
+    # A minor ends at the first goal scored against the penalized team while it is served
+    is_goal = event == "GOAL"
+    goal_seconds = game_seconds[is_goal]
+    goal_home = ev_team[is_goal] == home_team
+    scored_on = (goal_seconds[None, :] > pen_start[:, None]) & (goal_seconds[None, :] <= pen_end[:, None])
+    scored_on &= goal_home[None, :] != pen_home[:, None]
+    scored_on &= (pen_minutes == 2)[:, None]
+    first_goal = np.where(scored_on, goal_seconds[None, :], np.inf).min(axis=1, initial=np.inf)
+    ended_by_goal = first_goal < pen_end
+    pen_end = np.minimum(pen_end, first_goal)
+
+    # Penalties being served at every event - the power play goal itself is still scored on the power play
+    active = (game_seconds[:, None] >= pen_start[None, :]) & (game_seconds[:, None] < pen_end[None, :])
+    active |= is_goal[:, None] & ended_by_goal[None, :] & (game_seconds[:, None] == pen_end[None, :])
+    home_penalties = (active & pen_home[None, :]).sum(axis=1)
+    away_penalties = (active & ~pen_home[None, :]).sum(axis=1)
+
+    home_skaters = np.maximum(5 - home_penalties, 3)
+    away_skaters = np.maximum(5 - away_penalties, 3)
+
+    if is_regular_season:
+        is_overtime = period == 4
+        home_ot = np.minimum(3 + np.maximum(away_penalties - home_penalties, 0), 5)
+        away_ot = np.minimum(3 + np.maximum(home_penalties - away_penalties, 0), 5)
+        home_skaters = np.where(is_overtime, home_ot, home_skaters)
+        away_skaters = np.where(is_overtime, away_ot, away_skaters)
+
+    return np.char.add(np.char.add(home_skaters.astype(str), "x"), away_skaters.astype(str)).astype(object)
+
+
+def livefeed_to_pbp(feed: dict) -> pd.DataFrame:
+    """ Builds the play by play dataframe from a live feed.
+
+    Args:
+        feed: the live feed JSON
+
+    Returns:
+        DataFrame: play by play dataframe with the columns hockey_scraper (lowercased) would produce
+    """
+
+    game_id = str(feed["gamePk"])
+    home_team = feed["gameData"]["teams"]["home"]["triCode"]
+    away_team = feed["gameData"]["teams"]["away"]["triCode"]
+    all_plays = [play for play in feed["liveData"]["plays"]["allPlays"]
+                 if play["result"]["eventTypeId"] not in IGNORED_EVENTS]
+
+    cols = extract_columns(all_plays)
+    event_type = cols["event_type"]
+    event = np.array([EVENT_NAMES.get(e, e) for e in event_type], dtype=object)
+    period = cols["period"].astype(int)
+    ev_team = cols["team"]
+    xc = cols["xc"]
+
+    seconds_elapsed = clock_to_seconds(cols["period_time"]) if len(all_plays) else np.zeros(0, dtype=int)
+    game_seconds = seconds_elapsed + 1200 * (period - 1)
+
+    # The feed's score on a goal includes it - hockey_scraper (html reports) has the score before the goal
+    is_goal = event == "GOAL"
+    home_score = cols["home_score"] - (is_goal & (ev_team == home_team))
+    away_score = cols["away_score"] - (is_goal & (ev_team == away_team))
+
+    attack_sign = home_attack_sign(period, event, ev_team, xc, home_team)
+    ev_zone = event_zones(ev_team, xc, home_team, attack_sign)
+    strength = event_strength(game_seconds, period, event, ev_team, cols["penalty_minutes"], home_team,
+                              is_regular_season=game_id[4:6] == "02")
+
+    return pd.DataFrame(
+        {
+            "period": period,
+            "event": event,
+            "seconds_elapsed": seconds_elapsed,
+            "strength": strength,
+            "ev_zone": ev_zone,
+            "ev_team": ev_team,
+            "home_team": home_team,
+            "away_team": away_team,
+            "p1_name": cols["p1_name"],
+            "p1_id": cols["p1_id"],
+            "p2_name": cols["p2_name"],
+            "p2_id": cols["p2_id"],
+            "home_score": home_score,
+            "away_score": away_score,
+            "xc": xc,
+            "yc": cols["yc"],
+        },
+        columns=COLUMNS,
+    )
+
+
+def scrape_game(game_id) -> pd.DataFrame:
+    """ Downloads the live feed for a game & builds the play by play dataframe from it. """
+
+    logging.info("Building the play by play for %s from the live feed.", game_id)
+    return livefeed_to_pbp(get_livefeed(game_id))
+
+
+def parity_report(livefeed_df: pd.DataFrame, scraper_df: pd.DataFrame,
+                  events=("SHOT", "MISS", "BLOCK", "GOAL")) -> dict:
+    """ Compares a live feed frame with the (lowercased) hockey_scraper frame of the same game.
+        Events are matched on (period, seconds_elapsed, event, ev_team) and every other column
+        is compared on the matched events.
+
+    Args:
+        livefeed_df (DataFrame): livefeed_to_pbp output
+        scraper_df (DataFrame): hockey_scraper pbp with lowercased columns
+        events: event types to compare (the ones the shotmaps are built from by default)
+
+    Returns:
+        dict: event counts per source, matched events & the agreement rate per column
+    """
+
+    keys = ["period", "seconds_elapsed", "event", "ev_team"]
+    team_corrections = {"L.A": "LAK", "N.J": "NJD", "S.J": "SJS", "T.B": "TBL"}
+
+    frames = []
+    for df in (livefeed_df, scraper_df):
+        df = df.loc[df["event"].isin(events), COLUMNS].copy()
+        df = df.replace({"ev_team": team_corrections, "home_team": team_corrections, "away_team": team_corrections})
+        df["period"] = df["period"].astype(int)
+        df["seconds_elapsed"] = df["seconds_elapsed"].astype(int)
+        # Same timestamps can repeat (ex: two shots in one second) - match them in order
+        df["occurrence"] = df.groupby(keys).cumcount()
+        frames.append(df)
+
+    merged = frames[0].merge(frames[1], on=keys + ["occurrence"], suffixes=("_feed", "_scraper"))
+
+    agreement = dict()
+    for column in COLUMNS:
+        if column in keys:
+            continue
+        feed_values = merged[f"{column}_feed"]
+        scraper_values = merged[f"{column}_scraper"]
+        if column in ("xc", "yc", "p1_id", "p2_id", "home_score", "away_score"):
+            feed_values = pd.to_numeric(feed_values, errors="coerce")
+            scraper_values = pd.to_numeric(scraper_values, errors="coerce")
+        same = (feed_values == scraper_values) | (feed_values.isna() & scraper_values.isna())
+        agreement[column] = round(float(same.mean()), 4) if len(merged) else None
+
+    return {
+        "livefeed_events": frames[0]["event"].value_counts().to_dict(),
+        "scraper_events": frames[1]["event"].value_counts().to_dict(),
+        "matched": len(merged),
+        "unmatched_livefeed": len(frames[0]) - len(merged),
+        "unmatched_scraper": len(frames[1]) - len(merged),
+        "agreement": agreement,
+    }
+
+
+if __name__ == "__main__":
+    # Parity report for recorded games: a saved live feed (JSON) & hockey_scraper's pbp (CSV) per game
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--feed", help="recorded live feed JSON", action="append", required=True)
+    parser.add_argument("--scraped", help="hockey_scraper pbp CSV (same order as --feed)", action="append",
+                        required=True)
+    args = parser.parse_args()
+
+    for feed_path, scraped_path in zip(args.feed, args.scraped):
+        with open(feed_path) as f:
+            feed_df = livefeed_to_pbp(json.load(f))
+        scraped_df = pd.read_csv(scraped_path)
+        scraped_df.columns = map(str.lower, scraped_df.columns)
+        print(feed_path, json.dumps(parity_report(feed_df, scraped_df), indent=2))
@@ -0,0 +1,124 @@
+"""
+This module loads the static shotmap assets (blank rink image & fonts) and keeps
+them in memory so warm Lambda invocations do not download or decode them again.
+Lookup order: in-memory cache -> bundled assets (ASSETS_DIR) -> /tmp (validated
+against the S3 ETag & size) -> download from S3.
+"""
+
+import json
+import logging
+import os
+from collections import Counter
+
+import numpy as np
+from PIL import Image, ImageFont
+
+import clients
+
+FONT_OPENSANS_BOLD = "OpenSans-Bold.ttf"
+
+# Local paths & decoded assets kept across warm invocations
+_path_cache = dict()
+_rink_cache = dict()
+_font_cache = dict()
+
+# Hit / miss counters (memory_hit, disk_hit, bundled, download)
+CACHE_STATS = Counter()
+
+
+def get_asset_path(key: str) -> str:
+    """ Returns a local path for an asset, downloading it from S3 only if needed.
+
+    Args:
+        key: key (filename) in the S3_BUCKET bucket
+
+    Returns:
+        str: local file path of the asset
+    """
+
+    if key in _path_cache:
+        return _path_cache[key]
+
+    _path_cache[key] = _find_asset_path(key)
+    return _path_cache[key]
+
+
+def _find_asset_path(key: str) -> str:
+    # Bundled mode - assets ship inside the deployment package & S3 is never used
+    assets_dir = os.environ.get("ASSETS_DIR")
+    if assets_dir:
+        CACHE_STATS["bundled"] += 1
+        return os.path.join(assets_dir, key)
+
+    s3_bucket = os.environ.get("S3_BUCKET")
+    local_path = os.path.join("/tmp/", key)
+    meta_path = f"{local_path}.meta"
+
+    s3_client = clients.get_client("s3")
+    head = s3_client.head_object(Bucket=s3_bucket, Key=key)
+    remote_meta = {"etag": head["ETag"], "size": head["ContentLength"]}
+
+    # Re-use the copy in /tmp if it matches the object in S3
+    try:
+        with open(meta_path) as f:
+            local_meta = json.load(f)
+        if local_meta == remote_meta and os.path.getsize(local_path) == remote_meta["size"]:
+            CACHE_STATS["disk_hit"] += 1
+            return local_path
+    except (OSError, ValueError):
+        pass
+
+    logging.info("Downloading asset %s from S3 bucket %s.", key, s3_bucket)
+    CACHE_STATS["download"] += 1
+    s3_client.download_file(s3_bucket, key, local_path)
+    with open(meta_path, "w") as f:
+        json.dump(remote_meta, f)
+
+    return local_path
+
+
+def get_rink_image(key: str) -> np.ndarray:
+    """ Returns the decoded blank rink image as an RGBA array.
+
+    Args:
+        key: key (filename) of the blank rink image
+
+    Returns:
+        ndarray: (height, width, 4) uint8 array
+    """
+
+    if key in _rink_cache:
+        CACHE_STATS["memory_hit"] += 1
+        return _rink_cache[key]
+
+    with Image.open(get_asset_path(key)) as img:
+        rink = np.asarray(img.convert("RGBA"))
+
+    # Shared between renders, so make sure nobody draws on it
+    rink.setflags(write=False)
+    _rink_cache[key] = rink
+    return rink
+
+
+def get_font(size: int, key: str = FONT_OPENSANS_BOLD) -> ImageFont.FreeTypeFont:
+    """ Returns a loaded TrueType font at the given size.
+
+    Args:
+        size: font size
+        key: key (filename) of the font file
+
+    Returns:
+        ImageFont.FreeTypeFont: the loaded font
+    """
+
+    if (key, size) in _font_cache:
+        CACHE_STATS["memory_hit"] += 1
+        return _font_cache[(key, size)]
+
+    font = ImageFont.truetype(get_asset_path(key), size)
+    _font_cache[(key, size)] = font
+    return font
+
+
+def log_cache_stats():
+    logging.info("Asset cache stats: %s", dict(CACHE_STATS))
@@ -54,23 +54,113 @@ def run_all_stats(pbp_df):
     pbp_df - pbp_df with all fixes and stats applied
     """
 
-    # Run all cleaning & stat generation functions
-    pbp_df = fix_seconds_elapsed(pbp_df)
-    pbp_df = fixed_blocked_shots(pbp_df)
-    pbp_df = calc_time_diff(pbp_df)
-    pbp_df = calc_shot_metrics(pbp_df)
-    pbp_df = calc_distance_togoal(pbp_df)
-    pbp_df = calc_score_diff(pbp_df)
-    pbp_df = calc_rebound(pbp_df)
-    pbp_df = calc_rush_shot(pbp_df)
-    pbp_df = calc_is_home(pbp_df)
-    pbp_df = calc_was_tied(pbp_df)
-    pbp_df = calc_shot_quality_area(pbp_df)
-    pbp_df = calc_shot_danger(pbp_df)
-    pbp_df = calc_is_scoring_chance(pbp_df)
-    pbp_df = calc_team_strength(pbp_df)
+    return calc_all_stats(pbp_df)
 
-    return pbp_df
+
+def calc_all_stats(pbp_df):
+    """
+    This function performs every fix & stat of the calc_* functions below in a
+    single pass - the source columns are pulled into arrays once, the shared
+    masks & shifted values are computed once and all derived columns are
+    attached to the dataframe in one assignment.
+
+    Inputs:
+    pbp_df - basic scraped pbp_df
+
+    Outputs:
+    pbp_df - pbp_df with all fixes and stats applied
+    """
+
+    logging.info("Calculating all stats within dataframe (single pass).")
+
+    corsi = ["SHOT", "BLOCK", "MISS", "GOAL"]
+    fenwick = ["SHOT", "MISS", "GOAL"]
+    shot = ["SHOT", "GOAL"]
+    even = ["5x5", "4x4", "3x3"]
+    home_pp = ["6x4", "5x4", "5x3", "4x3"]
+    home_pk = ["4x6", "4x5", "3x5", "3x4"]
+    flipped_zones = {"Off": "Def", "Neu": "Neu", "Def": "Off"}
+
+    # Pull all source columns out of the dataframe once
+    event = pbp_df["event"].to_numpy()
+    ev_team = pbp_df["ev_team"].to_numpy()
+    xc = pbp_df["xc"].to_numpy()
+    yc = pbp_df["yc"].to_numpy()
+    seconds_elapsed = pbp_df["seconds_elapsed"].to_numpy() + (1200 * (pbp_df["period"].to_numpy() - 1))
+    strength = pbp_df["strength"]
+
+    # Shared event masks
+    is_block = event == "BLOCK"
+    is_goal = event == "GOAL"
+    is_corsi = pbp_df["event"].isin(corsi).to_numpy()
+
+    # Shared shift(1) values - the first event never has a previous event
+    prev_team_match = np.zeros(len(event), dtype=bool)
+    prev_team_match[1:] = (ev_team[1:] == ev_team[:-1]) & pd.notna(ev_team[1:])
+    prev_corsi = np.zeros(len(event), dtype=bool)
+    prev_corsi[1:] = is_corsi[:-1]
+    prev_xc = np.full(len(event), np.nan)
+    prev_xc[1:] = xc[:-1]
+    time_diff = np.full(len(event), np.nan)
+    time_diff[1:] = seconds_elapsed[1:] - seconds_elapsed[:-1]
+
+    # Blocked shots list the blocker as p1 - switch them back to the shooter
+    # (all four swapped arrays are built before any is assigned - to_numpy can return
+    # views of the frame's own data, so assigning p1 first would change what p2 reads)
+    p1_name, p2_name = pbp_df["p1_name"].to_numpy(), pbp_df["p2_name"].to_numpy()
+    p1_id, p2_id = pbp_df["p1_id"].to_numpy(), pbp_df["p2_id"].to_numpy()
+    swapped = {
+        "p1_name": np.where(is_block, p2_name, p1_name),
+        "p2_name": np.where(is_block, p1_name, p2_name),
+        "p1_id": np.where(is_block, p2_id, p1_id),
+        "p2_id": np.where(is_block, p1_id, p2_id),
+    }
+    pbp_df.loc[:, "seconds_elapsed"] = seconds_elapsed
+    for column, values in swapped.items():
+        pbp_df.loc[:, column] = values
+    pbp_df.loc[:, "ev_zone"] = pbp_df["ev_zone"].replace(flipped_zones)
+    ev_zone = pbp_df["ev_zone"].to_numpy()
+
+    score_diff = np.clip(pbp_df["home_score"].to_numpy() - pbp_df["away_score"].to_numpy(), -3, 3)
+    prev_score_tied = np.zeros(len(event), dtype=bool)
+    prev_score_tied[1:] = score_diff[:-1] == 0
+
+    shot_quality_blocked = np.where(is_block, -1, 0)
+    is_rebound = np.where((time_diff < 4) & is_corsi & prev_corsi & prev_team_match, 1, 0)
+    with np.errstate(invalid="ignore"):
+        is_rush = np.where(
+            (time_diff < 5) & is_corsi & ((prev_xc * xc < 0) | (np.abs(prev_xc) <= 26)), 1, 0
+        )
+    shot_quality_area = danger_area(xc, yc, is_corsi.astype(int), ev_zone)
+    shot_danger = np.nan_to_num(shot_quality_area) + is_rush + is_rebound + shot_quality_blocked
+
+    # Column order matches the order the stepwise functions add them in
+    stats = {
+        "shot_quality_blocked": shot_quality_blocked,
+        "time_diff": time_diff,
+        "is_corsi": np.where(is_corsi, 1, 0),
+        "is_fenwick": np.where(pbp_df["event"].isin(fenwick), 1, 0),
+        "is_shot": np.where(pbp_df["event"].isin(shot), 1, 0),
+        "is_goal": np.where(is_goal, 1, 0),
+        "distance_togoal": np.sqrt((87.95 - np.abs(xc)) ** 2 + yc ** 2),
+        "score_diff": score_diff,
+        "is_rebound": is_rebound,
+        "is_rush": is_rush,
+        "is_home": np.where(ev_team == pbp_df["home_team"].to_numpy(), 1, 0),
+        "was_tied": np.where(is_goal & prev_score_tied, 1, 0),
+        "shot_quality_area": shot_quality_area,
+        "shot_danger": shot_danger,
+        "is_scoring_chance": np.where(shot_danger >= 2, 1, 0),
+        "is_even_strength": np.where(strength.isin(even), 1, 0),
+        "is_home_pp": np.where(strength.isin(home_pp), 1, 0),
+        "is_home_pk": np.where(strength.isin(home_pk), 1, 0),
+        "is_away_pp": np.where(strength.isin(home_pk), 1, 0),
+        "is_away_pk": np.where(strength.isin(home_pp), 1, 0),
+    }
+
+    pbp_df = pbp_df.drop(columns=list(stats), errors="ignore")
+    stats_df = pd.DataFrame(stats, index=pbp_df.index)
+    return pd.concat([pbp_df, stats_df], axis=1)
 
 
 # ------------------------------------------------------------------------------
@@ -129,6 +219,51 @@ def dfapply_danger_area(row):
         return 0
 
 
+def points_in_triangle(x, y, triangle):
+    """Vectorized version of point_in_triangle - returns a boolean array that
+    is True for every (x, y) pair that falls inside the triangle.
+    - The arguments *x* and *y* are equal length arrays of coordinates.
+    - The argument *triangle* is a tuple with three elements each
+    element consisting of a tuple of X,Y coordinates.
+    """
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    ax, ay = triangle[0]
+    bx, by = triangle[1]
+    cx, cy = triangle[2]
+
+    # Same edge tests as point_in_triangle, computed for the whole column
+    side_1 = (x - bx) * (ay - by) - (ax - bx) * (y - by) < 0.0
+    side_2 = (x - cx) * (by - cy) - (bx - cx) * (y - cy) < 0.0
+    side_3 = (x - ax) * (cy - ay) - (cx - ax) * (y - ay) < 0.0
+    return (side_1 == side_2) & (side_2 == side_3)
+
+
+def danger_area(xc, yc, is_corsi, ev_zone):
+    """Vectorized version of dfapply_danger_area - scores every event at once.
+    Non-corsi events are NaN, corsi events outside the offensive zone are 0,
+    otherwise 3 (high), 2 (medium) or 1 (low) danger.
+    """
+
+    x = np.abs(np.asarray(xc, dtype=float))
+    y = np.abs(np.asarray(yc, dtype=float))
+    corsi = np.asarray(is_corsi) == 1
+    offensive = np.asarray(ev_zone) == "Off"
+    md_triangle = ((70, 23), (90, 8), (70, 8))
+
+    high = (x >= 69) & (x <= 89) & (y <= 9)
+    medium = (
+        ((x >= 44) & (x <= 54) & (y <= 9))
+        | ((x >= 54) & (x <= 69) & (y <= 22))
+        | points_in_triangle(x, y, md_triangle)
+    )
+
+    area = np.select([high, medium], [3, 2], default=1).astype(float)
+    area = np.where(offensive, area, 0)
+    return np.where(corsi, area, np.nan)
+
+
 # ------------------------------------------------------------------------------
 # ------------------------------------------------------------------------------
 # PBP Cleaning Methods
@@ -378,7 +513,7 @@ def calc_shot_quality_area(pbp_df):
     pbp_df - play by play dataframe with shot_quality_area calculated
     """
     logging.info("Calculating shot quality danger by area within the dataframe.")
-    pbp_df["shot_quality_area"] = pbp_df.apply(dfapply_danger_area, axis=1)
+    pbp_df["shot_quality_area"] = danger_area(pbp_df.xc, pbp_df.yc, pbp_df.is_corsi, pbp_df.ev_zone)
 
     return pbp_df
 
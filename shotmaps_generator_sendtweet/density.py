@@ -0,0 +1,147 @@
+"""
+This module calculates the shot density (Gaussian KDE) for a shotmap on a fixed
+grid covering the whole rink. Shots are linearly binned onto the grid & the bins
+are convolved with the Gaussian kernel via FFT, so the cost depends on the grid
+size instead of (number of shots x number of grid points).
+"""
+
+import numpy as np
+
+# Rink extent in feet (x: -100 -> 100, y: -42.5 -> 42.5)
+RINK_X = (-100.0, 100.0)
+RINK_Y = (-42.5, 42.5)
+
+# Kernel is truncated at this many standard deviations
+KERNEL_SIGMAS = 4
+
+
+def rink_grid(resolution: float = 1.0):
+    """ Returns the x & y coordinates of the rink grid.
+
+    Args:
+        resolution: grid points per foot
+
+    Returns:
+        (x, y): 1-D arrays of the grid coordinates along each axis
+    """
+
+    nx = int(round((RINK_X[1] - RINK_X[0]) * resolution)) + 1
+    ny = int(round((RINK_Y[1] - RINK_Y[0]) * resolution)) + 1
+    return np.linspace(RINK_X[0], RINK_X[1], nx), np.linspace(RINK_Y[0], RINK_Y[1], ny)
+
+
+def kernel_covariance(x: np.ndarray, y: np.ndarray, bw=0.2) -> np.ndarray:
+    """ Returns the covariance of the Gaussian kernel. String & float bandwidths follow
+        scipy.stats.gaussian_kde's bw_method (which seaborn's kdeplot(bw=...) used), so
+        the default of 0.2 matches the look of the original shotmaps.
+
+    Args:
+        x, y: shot coordinates
+        bw: "scott", "silverman", a scaling factor of the data covariance (float)
+            or ("ft", value) for a fixed bandwidth in feet
+
+    Returns:
+        ndarray: 2x2 kernel covariance matrix
+    """
+
+    if isinstance(bw, tuple) and bw[0] == "ft":
+        return np.eye(2) * float(bw[1]) ** 2
+
+    n = len(x)
+    if bw in ("scott", "silverman"):
+        # Both rules reduce to n ** (-1 / 6) for two dimensions
+        factor = n ** (-1.0 / 6)
+    else:
+        factor = float(bw)
+
+    data_cov = np.atleast_2d(np.cov(np.vstack([x, y])))
+    # Guard against a singular covariance (ex: all shots on a single line)
+    data_cov = data_cov + np.eye(2) * 1e-6
+    return data_cov * factor ** 2
+
+
+def linear_binning(x: np.ndarray, y: np.ndarray, grid_x: np.ndarray, grid_y: np.ndarray) -> np.ndarray:
+    """ Spreads each shot over its four neighbouring grid points (bilinear weights).
+        Shots outside of the grid are dropped.
+
+    Returns:
+        ndarray: (len(grid_y), len(grid_x)) array of bin weights
+    """
+
+    step_x = grid_x[1] - grid_x[0]
+    step_y = grid_y[1] - grid_y[0]
+    fx = (x - grid_x[0]) / step_x
+    fy = (y - grid_y[0]) / step_y
+
+    inside = (fx >= 0) & (fx <= len(grid_x) - 1) & (fy >= 0) & (fy <= len(grid_y) - 1)
+    fx, fy = fx[inside], fy[inside]
+
+    ix = np.minimum(np.floor(fx).astype(int), len(grid_x) - 2)
+    iy = np.minimum(np.floor(fy).astype(int), len(grid_y) - 2)
+    wx = fx - ix
+    wy = fy - iy
+
+    bins = np.zeros((len(grid_y), len(grid_x)))
+    np.add.at(bins, (iy, ix), (1 - wx) * (1 - wy))
+    np.add.at(bins, (iy, ix + 1), wx * (1 - wy))
+    np.add.at(bins, (iy + 1, ix), (1 - wx) * wy)
+    np.add.at(bins, (iy + 1, ix + 1), wx * wy)
+    return bins
+
+
+def gaussian_kernel(cov: np.ndarray, step_x: float, step_y: float, max_x: int, max_y: int) -> np.ndarray:
+    """ Evaluates the Gaussian pdf on a grid of offsets, truncated at KERNEL_SIGMAS.
+
+    Returns:
+        ndarray: (2 * half_y + 1, 2 * half_x + 1) kernel array
+    """
+
+    half_x = min(max_x, int(np.ceil(KERNEL_SIGMAS * np.sqrt(cov[0, 0]) / step_x)))
+    half_y = min(max_y, int(np.ceil(KERNEL_SIGMAS * np.sqrt(cov[1, 1]) / step_y)))
+    dx, dy = np.meshgrid(np.arange(-half_x, half_x + 1) * step_x, np.arange(-half_y, half_y + 1) * step_y)
+
+    inv_cov = np.linalg.inv(cov)
+    exponent = inv_cov[0, 0] * dx ** 2 + 2 * inv_cov[0, 1] * dx * dy + inv_cov[1, 1] * dy ** 2
+    return np.exp(-0.5 * exponent) / (2 * np.pi * np.sqrt(np.linalg.det(cov)))
+
+
+def fft_convolve(bins: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """ Convolves the bins with the kernel & crops the result back to the grid ("same" mode). """
+
+    shape = (bins.shape[0] + kernel.shape[0] - 1, bins.shape[1] + kernel.shape[1] - 1)
+    full = np.fft.irfft2(np.fft.rfft2(bins, shape) * np.fft.rfft2(kernel, shape), shape)
+    top = (kernel.shape[0] - 1) // 2
+    left = (kernel.shape[1] - 1) // 2
+    return full[top : top + bins.shape[0], left : left + bins.shape[1]]
+
+
+def kde_grid(x, y, resolution: float = 1.0, bw=0.2) -> np.ndarray:
+    """ Calculates the Gaussian KDE of the shot coordinates on the rink grid.
+
+    Args:
+        x, y: shot coordinates (feet)
+        resolution: grid points per foot
+        bw: bandwidth (see kernel_covariance)
+
+    Returns:
+        ndarray: (ny, nx) density array (rows are y, columns are x - see rink_grid)
+    """
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    grid_x, grid_y = rink_grid(resolution)
+
+    # A KDE needs at least two shots to estimate a covariance
+    if len(x) < 2 and not (isinstance(bw, tuple) and len(x)):
+        return np.zeros((len(grid_y), len(grid_x)))
+
+    cov = kernel_covariance(x, y, bw)
+    bins = linear_binning(x, y, grid_x, grid_y)
+    step_x = grid_x[1] - grid_x[0]
+    step_y = grid_y[1] - grid_y[0]
+    kernel = gaussian_kernel(cov, step_x, step_y, len(grid_x) - 1, len(grid_y) - 1)
+
+    density = fft_convolve(bins, kernel) / len(x)
+    # FFT round-off can leave tiny negative values
+    return np.clip(density, 0, None)
+
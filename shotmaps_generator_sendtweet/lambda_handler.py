@@ -1,111 +1,80 @@
 import datetime
-import json
 import logging
 import math
-import os
 import time
 
-import requests
-import tweepy
 import pandas as pd
-from boto3 import client as boto3_client
 
 # Custom Imports
+# boto3, requests & tweepy are imported where they are used - every invocation still reaches them,
+# so that moves their import cost from init to the first invocation instead of removing it
+import assets
 import clean_pbp
-import shotmap
+import clients
+import payload_codec
+import publisher
+import render_executor
+import startup
+import stats_cache
+
+# matplotlib is only imported inside the render functions - configure it before any of them run
+startup.configure()
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 ordinal = lambda n: "%d%s" % (n, "tsnrhtdd"[(math.floor(n / 10) % 10 != 1) * (n % 10 < 4) * n % 10 :: 4])
 
-def db_upsert_event(game_id, event_period):
+def db_upsert_event(game_id, event_period, claim_id=None):
+    """ Marks the game-period as completed (lastPeriodProcessed) & releases the scraper's lease.
+        Never moves lastPeriodProcessed backwards. With a claim_id the lease for event_period has to
+        still be owned by that scraper invocation (it may have expired & been taken over) - without
+        one (the scrape was not claimed) only a lease held for a later period is left alone.
+    """
+
     current_ts = int(time.time())
 
     current_dt = datetime.datetime.fromtimestamp(current_ts)
     ttl_dt = current_dt + datetime.timedelta(days=90)
     ttl_ts = int(ttl_dt.timestamp())
 
-    dynamo_client = boto3_client("dynamodb")
-    response = dynamo_client.update_item(
-        TableName='nhl-shotmaps-tracking',
-        Key={'gamePk': {'N': game_id}},
-        UpdateExpression="SET lastPeriodProcessed = :period, #ts = :ts, tsPlusTTL = :ts_ttl",
-        ExpressionAttributeNames={
-            "#ts": "timestamp"
-        },
-        ExpressionAttributeValues={
-            ':period': {'N': str(event_period)},
-            ':ts': {'N': str(current_ts)},
-            ':ts_ttl': {'N': str(ttl_ts)}
-        },
-        ReturnValues="ALL_NEW"
-    )
-
-    logging.info("DynamoDB Record Updated: %s", response)
-
-
-def send_shotmap_discord(testing: bool, images: list, text: str):
-    """ Takes a completed shotmap path & some text and sends out a message to a Discord webhook.
-        Discord webhook URLs are stored in environment variables.
-
-    Args:
-        images: A list of paths to the completed shotmap(s)
-        text: Any text to send alongside the images
-
-    Returns:
-        True if Discord sent or error if failed
-    """
-
-    # Create an empty list of files
-    files = dict()
-
-    webhook_url = os.environ.get("DISCORD_URL") if not testing else os.environ.get("DEBUG_DISCORD_URL")
-    payload = {"content": text}
-
-    for idx, image in enumerate(images):
-        files_key = f"file{idx}"
-        files[files_key] = open(image, "rb")
-
-    response = requests.post(webhook_url, files=files, data=payload)
-
-
-def send_shotmap_tweet(testing: bool, images: list, tweet_text: str):
-    """ Takes a completed shotmap path & some text and sends out a tweet.
-        Twitter keys are stored in environment variables.
-
-    Args:
-        images: A list of paths to the completed shotmap(s)
-        tweet_text: Any text to send alongside the string
-
-    Returns:
-        True if tweet sent or TweepyError if failed
-    """
-
-    # Get keys from environment variables based on if this is a "test-run" or not.
-    if testing:
-        consumer_key = os.environ.get("DEBUG_TWTR_CONSUMER_KEY")
-        consumer_secret = os.environ.get("DEBUG_TWTR_CONSUMER_SECRET")
-        access_token = os.environ.get("DEBUG_TWTR_ACCESS_TOKEN")
-        access_secret = os.environ.get("DEBUG_TWTR_ACCESS_SECRET")
+    expression_values = {
+        ':period': {'N': str(event_period)},
+        ':ts': {'N': str(current_ts)},
+        ':ts_ttl': {'N': str(ttl_ts)}
+    }
+    if claim_id:
+        lease_condition = "leaseOwner = :claim_id AND leasePeriod = :period"
+        expression_values[':claim_id'] = {'S': claim_id}
     else:
-        consumer_key = os.environ.get("TWTR_CONSUMER_KEY")
-        consumer_secret = os.environ.get("TWTR_CONSUMER_SECRET")
-        access_token = os.environ.get("TWTR_ACCESS_TOKEN")
-        access_secret = os.environ.get("TWTR_ACCESS_SECRET")
-
-    auth = tweepy.OAuthHandler(consumer_key, consumer_secret)
-    auth.set_access_token(access_token, access_secret)
-    api = tweepy.API(auth)
+        lease_condition = "(attribute_not_exists(leasePeriod) OR leasePeriod <= :period)"
 
+    dynamo_client = clients.get_client("dynamodb")
     try:
-        # For multiple images, use the media upload API
-        # https://github.com/tweepy/tweepy/issues/724#issuecomment-215927647
-        media_ids = [api.media_upload(i).media_id_string for i in images]
-        if api.update_status(status=tweet_text, media_ids=media_ids):
-            return True
-    except tweepy.error.TweepError as e:
-        return e
+        response = dynamo_client.update_item(
+            TableName='nhl-shotmaps-tracking',
+            Key={'gamePk': {'N': game_id}},
+            UpdateExpression=(
+                "SET lastPeriodProcessed = :period, #ts = :ts, tsPlusTTL = :ts_ttl "
+                "REMOVE leasePeriod, leaseOwner, leaseExpires"
+            ),
+            ConditionExpression=(
+                f"(attribute_not_exists(lastPeriodProcessed) OR lastPeriodProcessed < :period) AND {lease_condition}"
+            ),
+            ExpressionAttributeNames={
+                "#ts": "timestamp"
+            },
+            ExpressionAttributeValues=expression_values,
+            ReturnValues="ALL_NEW"
+        )
+    except dynamo_client.exceptions.ConditionalCheckFailedException:
+        logging.warning(
+            "Period %s of %s is already processed or the lease is no longer owned by %s - not updating.",
+            event_period, game_id, claim_id
+        )
+        return
+
+    logging.info("DynamoDB Record Updated: %s", response)
 
 
 def get_team_from_abbreviation(abbreviation: str):
@@ -161,10 +130,8 @@ def lambda_handler(event, context):
     game_id = event.get("game_id")
     logging
 
-    # Get the JSON-serialized DataFrame from the payload & convert back to a DataFrame
-    pbp_json = event.get("pbp_json")
-    pbp_json = json.dumps(pbp_json) if isinstance(pbp_json, dict) else pbp_json
-    pbp_df = pd.read_json(pbp_json)
+    # Get the serialized DataFrame from the payload & convert back to a DataFrame
+    pbp_df = payload_codec.decode_pbp(event)
 
     # Fix Team Abbreviations (in both DFs)
     team_corrections = {"L.A": "LAK", "N.J": "NJD", "S.J": "SJS", "T.B": "TBL"}
@@ -186,7 +153,8 @@ def lambda_handler(event, context):
     pbp_df = clean_pbp.clean_df(pbp_df)
 
     # Then run all other cleaning & stat generation functions at once
-    pbp_df = clean_pbp.run_all_stats(pbp_df)
+    # (only events added since the last processed period are calculated if a stats cache is configured)
+    pbp_df = stats_cache.run_all_stats_cached(pbp_df, game_id, stats_cache.get_stats_store())
 
     # Get the final event (period end or game end)
     game_end_events = len(pbp_df.loc[pbp_df["event"] == "GEND"])
@@ -233,11 +201,12 @@ def lambda_handler(event, context):
         "period": period_ordinal,
         "game_end": game_end,
     }
-    completed_path = shotmap.generate_shotmap(
-        home_df=home_df, away_df=away_df, details=shotmap_details, strength="All"
-    )
-    completed_path_5v5 = shotmap.generate_shotmap(
-        home_df=home_df_5v5, away_df=away_df_5v5, details=shotmap_details, strength="5v5"
+    # Both strength variants are rendered concurrently (results come back in this order)
+    completed_shotmap, completed_shotmap_5v5 = render_executor.render_all(
+        [
+            {"home_df": home_df, "away_df": away_df, "details": shotmap_details, "strength": "All"},
+            {"home_df": home_df_5v5, "away_df": away_df_5v5, "details": shotmap_details, "strength": "5v5"},
+        ]
     )
 
     # Generate Tweet Strings Dynamically
@@ -272,13 +241,18 @@ def lambda_handler(event, context):
         )
 
     # Send the completed shotmap tweet
-    shotmap_files = [completed_path, completed_path_5v5]
-    status = send_shotmap_tweet(testing=testing, images=shotmap_files, tweet_text=tweet_text)
-    discord_status = send_shotmap_discord(testing=testing, images=shotmap_files, text=tweet_text)
+    shotmap_files = [completed_shotmap, completed_shotmap_5v5]
+    # Twitter & Discord are published to at the same time
+    publish_report = publisher.publish_all(testing=testing, images=shotmap_files, text=tweet_text)
 
     logging.info("Shotmap Text: %s", tweet_text)
-    logging.info("Twitter Status: %s", status)
-    logging.info("Discord Status: %s", discord_status)
-
-    # Update DynamoDB with last processed period
-    db_upsert_event(game_id, period)
\ No newline at end of file
+    logging.info("Twitter Status: %s", publish_report["twitter"])
+    logging.info("Discord Status: %s", publish_report["discord"])
+    assets.log_cache_stats()
+
+    # Update DynamoDB with last processed period - the period the scraper claimed (if it claimed one)
+    claimed_period = event.get("period")
+    if claimed_period is not None:
+        db_upsert_event(game_id, claimed_period, claim_id=event.get("claim_id"))
+    else:
+        db_upsert_event(game_id, period)
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+This module sends the completed shotmaps out to every destination (Twitter & Discord).
+Destinations are published to concurrently & media for a single destination is
+uploaded in parallel, so the total time is set by the slowest endpoint rather than
+the sum of all of them. Requests get bounded retries with backoff - only for transient
+errors, and posts (tweet / Discord message) only if they never reached the server.
+"""
+
+import io
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import clients
+
+PUBLISH_ATTEMPTS = int(os.environ.get("PUBLISH_ATTEMPTS", 3))
+PUBLISH_BACKOFF = float(os.environ.get("PUBLISH_BACKOFF", 1.0))
+
+# Too Many Requests & server errors (the only HTTP statuses worth retrying)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Twitter API error code for "Status is a duplicate."
+TWITTER_DUPLICATE_STATUS = 187
+
+
+def _status_code(e):
+    """ Returns the HTTP status code of a failed request (requests HTTPError / TweepError) or None. """
+
+    response = getattr(e, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _request_error(e):
+    """ Returns the requests exception behind e (tweepy wraps them in a TweepError) or None. """
+
+    import requests
+
+    while e is not None:
+        if isinstance(e, requests.exceptions.RequestException):
+            return e
+        e = e.__cause__ or e.__context__
+    return None
+
+
+def is_transient(e) -> bool:
+    """ Connection errors, 429s & 5xx are retried - any other error (ex: a 4xx) is not. """
+
+    import requests
+
+    status_code = _status_code(e)
+    if status_code is not None:
+        return status_code in RETRY_STATUS_CODES
+
+    return isinstance(_request_error(e), (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def is_unsent(e) -> bool:
+    """ Errors where the request certainly was not processed by the server (safe to retry a post).
+        A 429 is rejected before processing & a failed connect never sent anything - a 5xx, a read
+        timeout or a dropped connection may come after the post went out, so those are not retried.
+    """
+
+    import requests
+    from urllib3.exceptions import NewConnectionError
+
+    status_code = _status_code(e)
+    if status_code is not None:
+        return status_code == 429
+
+    request_error = _request_error(e)
+    if isinstance(request_error, requests.exceptions.ConnectTimeout):
+        return True
+
+    # Connection refused / DNS failures (requests wraps urllib3's MaxRetryError with the reason)
+    reason = getattr(request_error.args[0], "reason", None) if request_error and request_error.args else None
+    return isinstance(request_error, requests.exceptions.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+def with_retries(func, *args, should_retry=is_transient, **kwargs):
+    """ Calls func & retries errors that should_retry accepts (PUBLISH_ATTEMPTS tries, exponential backoff).
+        Any other error (or the last one if every attempt fails) is raised.
+    """
+
+    for attempt in range(1, PUBLISH_ATTEMPTS + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == PUBLISH_ATTEMPTS or not should_retry(e):
+                raise
+            sleep_time = PUBLISH_BACKOFF * (2 ** (attempt - 1))
+            logging.warning("%s failed (attempt %s) - retrying in %ss: %s", func.__name__, attempt, sleep_time, e)
+            time.sleep(sleep_time)
+
+
+def is_duplicate_status(e) -> bool:
+    """ Twitter rejects a status identical to a recent one - the tweet is already out. """
+
+    api_code = getattr(e, "api_code", None)
+    return api_code == TWITTER_DUPLICATE_STATUS or "status is a duplicate" in str(e).lower()
+
+
+def send_shotmap_discord(testing: bool, images: list, text: str):
+    """ Takes the completed shotmaps & some text and sends out a message to a Discord webhook.
+        Discord webhook URLs are stored in environment variables.
+
+    Args:
+        images: A list of the completed shotmap(s) (in-memory PNGs)
+        text: Any text to send alongside the images
+
+    Returns:
+        True if Discord sent (raises an HTTPError if failed)
+    """
+
+    # Create an empty list of files
+    files = dict()
+
+    webhook_url = os.environ.get("DISCORD_URL") if not testing else os.environ.get("DEBUG_DISCORD_URL")
+    payload = {"content": text}
+
+    for idx, image in enumerate(images):
+        files_key = f"file{idx}"
+        files[files_key] = (image.name, image.getvalue(), "image/png")
+
+    def post():
+        response = clients.get_http_session().post(webhook_url, files=files, data=payload, timeout=30)
+        response.raise_for_status()
+        return True
+
+    # The post is only retried if it never reached Discord (otherwise the message could be sent twice)
+    return with_retries(post, should_retry=is_unsent)
+
+
+def send_shotmap_tweet(testing: bool, images: list, tweet_text: str):
+    """ Takes the completed shotmaps & some text and sends out a tweet.
+        Twitter keys are stored in environment variables.
+
+    Args:
+        images: A list of the completed shotmap(s) (in-memory PNGs)
+        tweet_text: Any text to send alongside the string
+
+    Returns:
+        True if tweet sent or already sent (raises a TweepError if failed)
+    """
+
+    import tweepy
+
+    # Get keys from environment variables based on if this is a "test-run" or not.
+    if testing:
+        consumer_key = os.environ.get("DEBUG_TWTR_CONSUMER_KEY")
+        consumer_secret = os.environ.get("DEBUG_TWTR_CONSUMER_SECRET")
+        access_token = os.environ.get("DEBUG_TWTR_ACCESS_TOKEN")
+        access_secret = os.environ.get("DEBUG_TWTR_ACCESS_SECRET")
+    else:
+        consumer_key = os.environ.get("TWTR_CONSUMER_KEY")
+        consumer_secret = os.environ.get("TWTR_CONSUMER_SECRET")
+        access_token = os.environ.get("TWTR_ACCESS_TOKEN")
+        access_secret = os.environ.get("TWTR_ACCESS_SECRET")
+
+    auth = tweepy.OAuthHandler(consumer_key, consumer_secret)
+    auth.set_access_token(access_token, access_secret)
+    api = tweepy.API(auth)
+
+    def upload(image):
+        return with_retries(api.media_upload, image.name, file=io.BytesIO(image.getvalue())).media_id_string
+
+    # For multiple images, use the media upload API (all images are uploaded at the same time)
+    # https://github.com/tweepy/tweepy/issues/724#issuecomment-215927647
+    with ThreadPoolExecutor(max_workers=len(images)) as executor:
+        media_ids = list(executor.map(upload, images))
+
+    # The status is only retried if it never reached Twitter (otherwise it could be tweeted twice)
+    try:
+        return bool(with_retries(api.update_status, status=tweet_text, media_ids=media_ids, should_retry=is_unsent))
+    except Exception as e:
+        if not is_duplicate_status(e):
+            raise
+        logging.warning("Twitter says the status is a duplicate - it was already tweeted: %s", e)
+        return True
+
+
+def _timed_publish(name, func, *args):
+    """ Runs a single destination & returns its result / latency report.
+        Retries happen inside each destination (per request) so media is never re-uploaded.
+    """
+
+    start = time.time()
+    try:
+        result = func(*args)
+        status = True
+    except Exception as e:
+        result = repr(e)
+        status = False
+
+    return {"destination": name, "status": status, "result": result, "latency": round(time.time() - start, 3)}
+
+
+def publish_all(testing: bool, images: list, text: str) -> dict:
+    """ Publishes the shotmaps to every destination concurrently.
+
+    Args:
+        testing: use the debug accounts / webhooks
+        images: A list of the completed shotmap(s) (in-memory PNGs)
+        text: Any text to send alongside the images
+
+    Returns:
+        dict: {destination: {destination, status, result, latency}}
+    """
+
+    destinations = {"twitter": send_shotmap_tweet, "discord": send_shotmap_discord}
+
+    with ThreadPoolExecutor(max_workers=len(destinations)) as executor:
+        futures = [
+            executor.submit(_timed_publish, name, func, testing, images, text) for name, func in destinations.items()
+        ]
+        reports = [future.result() for future in futures]
+
+    return {report["destination"]: report for report in reports}
+
@@ -0,0 +1,146 @@
+"""
+This module renders a shotmap directly as a raster (NumPy / PIL) without matplotlib.
+Density grids are resampled to the output pixels, split into contour-style bands,
+colored with the Reds / Blues ramps (lowest band transparent) & alpha-blended onto
+the cached blank rink image. Goal markers are stamped on top.
+"""
+
+import numpy as np
+from PIL import Image
+
+import assets
+import density
+
+# ColorBrewer ramps that the matplotlib Reds & Blues colormaps are built from
+REDS = ["#fff5f0", "#fee0d2", "#fcbba1", "#fc9272", "#fb6a4a", "#ef3b2c", "#cb181d", "#a50f15", "#67000d"]
+BLUES = ["#f7fbff", "#deebf7", "#c6dbef", "#9ecae1", "#6baed6", "#4292c6", "#2171b5", "#08519c", "#08306b"]
+
+# Visible extent of the shotmap (matches the matplotlib x / y limits)
+EXTENT_X = (-100.0, 100.0)
+EXTENT_Y = (-42.0, 42.0)
+
+DENSITY_ALPHA = 0.9
+GOAL_COLOR = (0x33, 0x33, 0x33)
+GOAL_ALPHA = 0.5
+
+
+def colormap_lut(ramp: list, size: int = 256) -> np.ndarray:
+    """ Linearly interpolates a list of hex colors into a (size, 3) float lookup table. """
+
+    colors = np.array([[int(c[i : i + 2], 16) for i in (1, 3, 5)] for c in ramp], dtype=float)
+    positions = np.linspace(0, 1, len(ramp))
+    samples = np.linspace(0, 1, size)
+    return np.stack([np.interp(samples, positions, colors[:, i]) for i in range(3)], axis=1)
+
+
+def nice_levels(max_value: float, nbins: int) -> np.ndarray:
+    """ Returns evenly spaced contour levels from 0 with a 'nice' step (1, 2, 2.5, 5 or 10 x 10^n). """
+
+    raw_step = max_value / nbins
+    magnitude = 10 ** np.floor(np.log10(raw_step))
+    step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw_step)
+    return np.arange(0, max_value + step, step)
+
+
+def resample_grid(grid: np.ndarray, grid_x: np.ndarray, grid_y: np.ndarray, width: int, height: int):
+    """ Bilinearly resamples a (ny, nx) grid onto the output pixel centers (row 0 is the top of the image). """
+
+    px = EXTENT_X[0] + (np.arange(width) + 0.5) * (EXTENT_X[1] - EXTENT_X[0]) / width
+    py = EXTENT_Y[1] - (np.arange(height) + 0.5) * (EXTENT_Y[1] - EXTENT_Y[0]) / height
+
+    # Fractional grid indices for every output column & row
+    fx = np.clip((px - grid_x[0]) / (grid_x[1] - grid_x[0]), 0, len(grid_x) - 1)
+    fy = np.clip((py - grid_y[0]) / (grid_y[1] - grid_y[0]), 0, len(grid_y) - 1)
+    ix = np.minimum(fx.astype(int), len(grid_x) - 2)
+    iy = np.minimum(fy.astype(int), len(grid_y) - 2)
+    wx = fx - ix
+    wy = (fy - iy)[:, None]
+
+    rows = grid[iy] * (1 - wy) + grid[iy + 1] * wy
+    return rows[:, ix] * (1 - wx) + rows[:, ix + 1] * wx
+
+
+def blend_density(canvas: np.ndarray, values: np.ndarray, lut: np.ndarray, nbins: int):
+    """ Colors the density values as filled contour bands & alpha-blends them onto the canvas (in place). """
+
+    max_value = values.max()
+    if max_value <= 0:
+        return
+
+    levels = nice_levels(max_value, nbins)
+    band = np.clip(np.searchsorted(levels, values, side="right") - 1, 0, len(levels) - 2)
+
+    # Each band is colored at its midpoint (like contourf) - band 0 stays transparent
+    midpoints = (levels[:-1] + levels[1:]) / 2 / levels[-1]
+    band_colors = lut[np.round(midpoints * (len(lut) - 1)).astype(int)]
+
+    mask = band > 0
+    canvas[mask] = canvas[mask] * (1 - DENSITY_ALPHA) + band_colors[band[mask]] * DENSITY_ALPHA
+
+
+def stamp_goals(canvas: np.ndarray, x, y, radius: float):
+    """ Stamps a small translucent marker onto the canvas (in place) for each goal. """
+
+    height, width = canvas.shape[:2]
+    cols = (np.asarray(x, dtype=float) - EXTENT_X[0]) / (EXTENT_X[1] - EXTENT_X[0]) * width
+    rows = (EXTENT_Y[1] - np.asarray(y, dtype=float)) / (EXTENT_Y[1] - EXTENT_Y[0]) * height
+
+    offsets = np.arange(-int(np.ceil(radius)), int(np.ceil(radius)) + 1)
+    dy, dx = np.meshgrid(offsets, offsets, indexing="ij")
+    disc = (dx ** 2 + dy ** 2) <= radius ** 2
+
+    for col, row in zip(cols.astype(int), rows.astype(int)):
+        rr, cc = row + dy[disc], col + dx[disc]
+        inside = (rr >= 0) & (rr < height) & (cc >= 0) & (cc < width)
+        rr, cc = rr[inside], cc[inside]
+        canvas[rr, cc] = canvas[rr, cc] * (1 - GOAL_ALPHA) + np.array(GOAL_COLOR) * GOAL_ALPHA
+
+
+def rink_canvas(rink_key: str, width: int, height: int) -> np.ndarray:
+    """ Returns the blank rink (cropped to the visible extent) as a float RGB canvas of the given size. """
+
+    rink = assets.get_rink_image(rink_key)
+    # Transparent parts of the rink image are shown on white (like the matplotlib figure)
+    rink_img = Image.fromarray(rink, "RGBA")
+    rink_img = Image.alpha_composite(Image.new("RGBA", rink_img.size, "white"), rink_img).convert("RGB")
+
+    # The rink image covers +/- 42.5ft while the shotmap shows +/- 42ft
+    full_height = int(round(height * (2 * density.RINK_Y[1]) / (EXTENT_Y[1] - EXTENT_Y[0])))
+    top = (full_height - height) // 2
+    rink_img = rink_img.resize((width, full_height), resample=Image.BILINEAR)
+    return np.asarray(rink_img.crop((0, top, width, top + height)), dtype=float)
+
+
+def render_shotmap(home_df, away_df, rink_key: str, width: int = 1024, resolution: float = 2.0,
+                   bw=0.2, nbins: int = 10) -> Image.Image:
+    """ Renders the home (Reds) & away (Blues) densities and goals onto the blank rink.
+
+    Args:
+        home_df (DataFrame): the DataFrame of Home Team events
+        away_df (DataFrame): the DataFrame of Away Team events
+        rink_key: key (filename) of the blank rink image
+        width: output width in pixels (height keeps the rink aspect ratio)
+        resolution: density grid points per foot
+        bw: density bandwidth (see density.kernel_covariance)
+        nbins: number of contour bands
+
+    Returns:
+        Image: the rendered shotmap as a PIL RGB image
+    """
+
+    height = int(round(width * (EXTENT_Y[1] - EXTENT_Y[0]) / (EXTENT_X[1] - EXTENT_X[0])))
+    canvas = rink_canvas(rink_key, width, height)
+    grid_x, grid_y = density.rink_grid(resolution)
+
+    for df, ramp in ((home_df, REDS), (away_df, BLUES)):
+        density_grid = density.kde_grid(df.xc, df.yc, resolution=resolution, bw=bw)
+        values = resample_grid(density_grid, grid_x, grid_y, width, height)
+        blend_density(canvas, values, colormap_lut(ramp), nbins)
+
+    # Goal markers are sized relative to the output width
+    radius = max(1.0, width / 512)
+    for df in (home_df, away_df):
+        goals_df = df.loc[df["event"] == "GOAL"]
+        stamp_goals(canvas, goals_df.xc, goals_df.yc, radius)
+
+    return Image.fromarray(np.clip(np.round(canvas), 0, 255).astype(np.uint8), "RGB")
@@ -0,0 +1,100 @@
+"""
+This module renders multiple shotmap variants (ex: All & 5v5) concurrently.
+Each variant runs in its own process (the GIL & matplotlib's global state rule
+out threads). multiprocessing.Pool & concurrent.futures are not usable on AWS
+Lambda (no /dev/shm for their semaphores), so plain Processes & Pipes are used.
+"""
+
+import io
+import logging
+import multiprocessing
+import os
+import time
+
+import assets
+import shotmap
+
+
+def _render_worker(conn, kwargs):
+    """ Renders one shotmap in a child process & sends (status, result) back through the pipe. """
+
+    try:
+        shotmap_buffer = shotmap.generate_shotmap(**kwargs)
+        conn.send((True, (shotmap_buffer.name, shotmap_buffer.getvalue())))
+    except Exception as e:
+        conn.send((False, repr(e)))
+    finally:
+        conn.close()
+
+
+def _to_buffer(name: str, data: bytes) -> io.BytesIO:
+    shotmap_buffer = io.BytesIO(data)
+    shotmap_buffer.name = name
+    return shotmap_buffer
+
+
+def _cpu_count() -> int:
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+
+
+def render_all(jobs: list) -> list:
+    """ Renders every shotmap variant & returns the results in the same order as the jobs.
+        Falls back to rendering one at a time if only one CPU is available
+        (or RENDER_PARALLEL is set to false).
+
+    Args:
+        jobs: a list of keyword argument dictionaries for shotmap.generate_shotmap
+
+    Returns:
+        list: the completed shotmaps (in-memory PNGs), one per job
+    """
+
+    start = time.time()
+    cpu_count = _cpu_count()
+    is_parallel = os.environ.get("RENDER_PARALLEL", "true").lower() != "false"
+
+    if not is_parallel or len(jobs) < 2 or (cpu_count or 1) < 2:
+        results = [shotmap.generate_shotmap(**kwargs) for kwargs in jobs]
+        logging.info("Rendered %s shotmaps serially in %.2fs.", len(jobs), time.time() - start)
+        return results
+
+    # Load the assets once in the parent so every forked child starts with a warm cache
+    assets.get_rink_image(os.environ.get("SHOTMAP_BLANK"))
+    for size in shotmap.FONT_SIZES:
+        assets.get_font(size)
+
+    # Start every render before waiting on any of them
+    context = multiprocessing.get_context("fork")
+    workers = list()
+    for kwargs in jobs:
+        parent_conn, child_conn = context.Pipe(duplex=False)
+        process = context.Process(target=_render_worker, args=(child_conn, kwargs))
+        process.start()
+        child_conn.close()
+        workers.append((process, parent_conn))
+
+    results = list()
+    try:
+        for process, parent_conn in workers:
+            try:
+                status, result = parent_conn.recv()
+            except EOFError:
+                # The child died without sending anything (ex: killed for running out of memory)
+                process.join()
+                raise RuntimeError(f"Shotmap render child process died (exit code {process.exitcode}).")
+
+            process.join()
+            if not status:
+                raise RuntimeError(f"Shotmap render failed in a child process: {result}")
+            results.append(_to_buffer(*result))
+    finally:
+        # Never leave children running (or unreaped) behind when a render fails
+        for process, parent_conn in workers:
+            parent_conn.close()
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+    logging.info("Rendered %s shotmaps in parallel in %.2fs.", len(jobs), time.time() - start)
+    return results
+
@@ -1,14 +1,31 @@
+import io
 import logging
 import os
 import time
+import uuid
 
-import boto3
-import matplotlib.pyplot as plt
 import pandas as pd
-import seaborn as sns
-from PIL import Image, ImageFont, ImageOps, ImageDraw
+from PIL import Image, ImageOps, ImageDraw
 
+import assets
 import clean_pbp
+import density
+import raster
+
+# Density (KDE) settings - grid points per foot, bandwidth & number of contour levels
+DENSITY_RESOLUTION = float(os.environ.get("DENSITY_RESOLUTION", 2))
+DENSITY_BW = 0.2
+DENSITY_LEVELS = 10
+
+# Render backend - "matplotlib" or "raster" (NumPy / PIL - opt-in until its output is signed off)
+SHOTMAP_BACKEND = os.environ.get("SHOTMAP_BACKEND", "matplotlib")
+
+# Final shotmap width & how much larger than that the rink is rendered before being resized
+SHOTMAP_WIDTH = 1024
+SHOTMAP_OVERSAMPLE = float(os.environ.get("SHOTMAP_OVERSAMPLE", 1))
+
+# Title, subtitle & legend font sizes
+FONT_SIZES = (28, 15, 12)
 
 
 def generate_goals_df(df):
@@ -62,37 +79,25 @@ def shotmap_image(shotmap_file, shotmap_desc, stats_string, details):
     """
     Resizes the shotmap image and adds title, other text & shape legends.
 
-    :param shotmap_file: location of the shotmap file image
+    :param shotmap_file: location of the shotmap file image (or an already loaded PIL Image)
     :param shotmap_desc: shotmap description text (joined opts dictionary)
 
-    :return shotmap_final: final version of the shotmap image
+    :return shotmap_final: final version of the shotmap image (in-memory PNG, BytesIO with a .name)
     """
 
-    # Load Font Files from S3
-    s3 = boto3.resource("s3")
-    s3_bucket = os.environ.get("S3_BUCKET")
-    bucket = s3.Bucket(s3_bucket)
-    fontpath_opensans_bold = os.path.join("/tmp/", "OpenSans-Bold.ttf")
-    bucket.download_file("OpenSans-Bold.ttf", fontpath_opensans_bold)
-
     # Add text to our Image (title, subtitles, etc)
-    # Setup Fonts, Constants & Sizing
+    # Setup Fonts, Constants & Sizing (fonts are cached across warm invocations)
     FONT_COLOR_BLACK = (0, 0, 0)
-    # FONT_OPENSANS_BOLD = os.path.join(PROJECT_ROOT, 'resources/fonts/OpenSans-Bold.ttf')
-    FONT_OPENSANS_BOLD = fontpath_opensans_bold
-    # FONT_DEJAVU_SANS = os.path.join(PROJECT_ROOT, 'resources/fonts/DejaVuSans.ttf')
-    TITLE_FONT = ImageFont.truetype(FONT_OPENSANS_BOLD, 28)
-    SUBTITLE_FONT = ImageFont.truetype(FONT_OPENSANS_BOLD, 15)
-    LEGEND_FONT = ImageFont.truetype(FONT_OPENSANS_BOLD, 12)
-
-    # Re-Load our Saved Image, Crop & Resize
-    output_img = Image.open(shotmap_file)
+    TITLE_FONT, SUBTITLE_FONT, LEGEND_FONT = [assets.get_font(size) for size in FONT_SIZES]
+
+    # Re-Load our Saved Image (if needed), Crop & Resize
+    output_img = shotmap_file if isinstance(shotmap_file, Image.Image) else Image.open(shotmap_file)
     w, h = output_img.size
 
     # Resize the Image (Width = 1024, Height = Ratio'd)
-    resize_ratio = 1024 / w
+    resize_ratio = SHOTMAP_WIDTH / w
     resize_wh = (int(w * resize_ratio), int(h * resize_ratio))
-    resized = output_img.resize(resize_wh, resample=Image.BILINEAR)
+    resized = output_img if resize_wh == (w, h) else output_img.resize(resize_wh, resample=Image.BILINEAR)
     resized_w, resized_h = resized.size
 
     # Set Padding & Re-Cropping Sizes
@@ -139,10 +144,22 @@ def shotmap_image(shotmap_file, shotmap_desc, stats_string, details):
 
     draw_centered_text(draw, 0, 75, resized_w, stats_string, FONT_COLOR_BLACK, LEGEND_FONT)
 
-    filename = f"Rink-Shotmap-Generated-{int(time.time())}-Final.png"
-    final_shotmap = os.path.join("/tmp/", filename)
-    resized.save(final_shotmap)
-    logging.info("Returning filename - %s", final_shotmap)
+    # Every render gets its own buffer (unique name) so concurrent renders never clobber each other
+    filename = f"Rink-Shotmap-Generated-{int(time.time())}-{uuid.uuid4().hex[:8]}-Final.png"
+    final_shotmap = io.BytesIO()
+    resized.save(final_shotmap, format="PNG")
+    final_shotmap.name = filename
+    final_shotmap.seek(0)
+
+    # Optionally keep a copy on disk for debugging
+    debug_dir = os.environ.get("SHOTMAP_DEBUG_DIR")
+    if debug_dir:
+        debug_path = os.path.join(debug_dir, filename)
+        with open(debug_path, "wb") as f:
+            f.write(final_shotmap.getvalue())
+        logging.info("Saved debug copy of the shotmap - %s", debug_path)
+
+    logging.info("Returning shotmap buffer - %s", filename)
     return final_shotmap
 
 
@@ -155,7 +172,7 @@ def generate_shotmap(home_df: pd.DataFrame, away_df: pd.DataFrame, details: dict
         away_df (DataFrame): the DataFrame of Away Team events
 
     Returns:
-        completed_path: The path to the completed shotmap
+        shotmap_file_final: The completed shotmap (in-memory PNG, BytesIO with a .name)
     """
 
     # Get Home & Away team names from DF
@@ -208,7 +225,7 @@ def generate_shotmap(home_df: pd.DataFrame, away_df: pd.DataFrame, details: dict
         f"HDCF - {hdcf}, HDCA - {hdca}"
     )
 
-    completed_path = plot_shotmap(home_df=home_df, away_df=away_df)
+    completed_img = render_shotmap(home_df=home_df, away_df=away_df)
 
     # Break down shotmap_info dictionary into multiple parts
     home_team_names = details["home"]
@@ -223,30 +240,62 @@ def generate_shotmap(home_df: pd.DataFrame, away_df: pd.DataFrame, details: dict
     shotmap_title = (
         f"{home_team_names['team_name']} vs. {away_team_names['team_name']}\n{description}\n{shotmap_credit}"
     )
-    shotmap_file_final = shotmap_image(completed_path, shotmap_title, stats_string, details)
-    logging.info("Shotmap Final File - %s", shotmap_file_final)
+    shotmap_file_final = shotmap_image(completed_img, shotmap_title, stats_string, details)
+    logging.info("Shotmap Final File - %s", shotmap_file_final.name)
 
     return shotmap_file_final
 
 
-def get_image_from_s3(bucket: str, key: str) -> Image:
-    """ Gets the base image from S3 bucket.
+def render_shotmap(home_df: pd.DataFrame, away_df: pd.DataFrame):
+    """ Renders the shotmap with the configured backend (SHOTMAP_BACKEND).
+
+    Args:
+        home_df (DataFrame): the DataFrame of Home Team events
+        away_df (DataFrame): the DataFrame of Away Team events
+
+    Returns:
+        completed_img: The completed shotmap (PIL Image) at SHOTMAP_WIDTH x SHOTMAP_OVERSAMPLE wide
+    """
+
+    if SHOTMAP_BACKEND == "matplotlib":
+        return plot_shotmap(home_df=home_df, away_df=away_df)
+
+    shotmap_blank_rink = os.environ.get("SHOTMAP_BLANK")
+    return raster.render_shotmap(
+        home_df,
+        away_df,
+        shotmap_blank_rink,
+        width=int(SHOTMAP_WIDTH * SHOTMAP_OVERSAMPLE),
+        resolution=DENSITY_RESOLUTION,
+        bw=DENSITY_BW,
+        nbins=DENSITY_LEVELS,
+    )
+
+
+def plot_density(ax, df: pd.DataFrame, cmap: str):
+    """ Draws the filled density contours of a team's shots onto the axes.
+        The lowest contour level is left unshaded (like seaborn's shade_lowest=False).
 
     Args:
-        bucket: S3 Bucket name
-        key: key (filename) in the corresponding S3 bucket
+        ax: matplotlib Axes to draw on
+        df (DataFrame): the DataFrame of a team's events
+        cmap: name of the matplotlib colormap
 
     Returns:
-        Image: a PIL.Image instance
+        None
     """
 
-    temp_file_path = os.path.join("/tmp/", key)
-    s3 = boto3.resource("s3")
-    bucket = s3.Bucket(bucket)
-    bucket.download_file(key, temp_file_path)
-    img = Image.open(temp_file_path)
+    from matplotlib.ticker import MaxNLocator
+
+    density_grid = density.kde_grid(df.xc, df.yc, resolution=DENSITY_RESOLUTION, bw=DENSITY_BW)
+    if not density_grid.any():
+        return
 
-    return img
+    grid_x, grid_y = density.rink_grid(DENSITY_RESOLUTION)
+    levels = MaxNLocator(nbins=DENSITY_LEVELS).tick_values(0, density_grid.max())
+    ax.contourf(
+        grid_x, grid_y, density_grid, levels=levels[1:], cmap=cmap, vmin=levels[0], vmax=levels[-1], alpha=0.9
+    )
 
 
 def plot_shotmap(home_df: pd.DataFrame, away_df: pd.DataFrame):
@@ -257,11 +306,13 @@ def plot_shotmap(home_df: pd.DataFrame, away_df: pd.DataFrame):
         away_df (DataFrame): the DataFrame of Away Team events
 
     Returns:
-        completed_path: The path to the completed shotmap
+        completed_img: The completed shotmap (PIL Image)
     """
 
-    # S3 Bucket & Key for the blank shotmap image
-    s3_bucket = os.environ.get("S3_BUCKET")
+    # matplotlib is only imported when this backend is used
+    import matplotlib.pyplot as plt
+
+    # S3 Key for the blank shotmap image
     shotmap_blank_rink = os.environ.get("SHOTMAP_BLANK")
 
     MY_DPI = 96
@@ -273,25 +324,12 @@ def plot_shotmap(home_df: pd.DataFrame, away_df: pd.DataFrame):
     ax = fig.add_subplot(111)
 
     ax_extent = [-100, 100, -42.5, 42.5]
-    img = get_image_from_s3(s3_bucket, shotmap_blank_rink)
+    img = assets.get_rink_image(shotmap_blank_rink)
     ax.imshow(img, extent=ax_extent)
 
     # Draw the heatmap portion of the graph
-    sns.set_style("white")
-    sns.kdeplot(
-        home_df.xc, home_df.yc, cmap="Reds", shade=True, bw=0.2, cut=100, shade_lowest=False, alpha=0.9, ax=ax
-    )
-    sns.kdeplot(
-        away_df.xc,
-        away_df.yc,
-        cmap="Blues",
-        shade=True,
-        bw=0.2,
-        cut=100,
-        shade_lowest=False,
-        alpha=0.9,
-        ax=ax,
-    )
+    plot_density(ax, home_df, cmap="Reds")
+    plot_density(ax, away_df, cmap="Blues")
 
     home_goals_df = generate_goals_df(home_df)
     away_goals_df = generate_goals_df(away_df)
@@ -303,13 +341,31 @@ def plot_shotmap(home_df: pd.DataFrame, away_df: pd.DataFrame):
     ax.set_ylim(-42, 42)
 
     # Hide all axes & bounding boxes
-    ax.collections[0].set_alpha(0)
     ax.axes.get_xaxis().set_visible(False)
     ax.axes.get_yaxis().set_visible(False)
     ax.set_frame_on(False)
     ax.axis("off")
 
-    completed_path = os.path.join("/tmp", "completed-shotmap.png")
-    fig.savefig(completed_path, dpi=400, bbox_inches="tight")
+    # Pick the DPI so the tightly cropped figure comes out at the final width (x oversample)
+    # instead of saving at 400 DPI and shrinking the image back down afterwards.
+    # pad_inches=0 - the default 0.1in pad would be added on top of the measured width
+    tight_bbox = fig.get_tightbbox(fig.canvas.get_renderer())
+    render_dpi = (SHOTMAP_WIDTH * SHOTMAP_OVERSAMPLE) / tight_bbox.width
+
+    buffer = io.BytesIO()
+    fig.savefig(
+        buffer,
+        format="png",
+        dpi=render_dpi,
+        bbox_inches="tight",
+        pad_inches=0,
+        pil_kwargs={"compress_level": 1},
+    )
+    plt.close(fig)
+
+    buffer.seek(0)
+    completed_img = Image.open(buffer)
+    completed_img.load()
+
+    return completed_img
 
-    return completed_path
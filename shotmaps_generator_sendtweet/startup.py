@@ -0,0 +1,122 @@
+"""
+This module configures matplotlib for the generator (configure is called by the
+handler at init): it forces the non-interactive backend & points matplotlib at a
+font cache that is built into the deployment package, so the first render does not
+have to build one. It can also report the import time of the heavy modules so
+cold start regressions can be tracked per release.
+
+Build the font cache before packaging:  python startup.py --build-font-cache
+Print the import time report:           python startup.py --import-report
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+MPL_CONFIG_PATH = os.path.join(PROJECT_ROOT, "mplconfig")
+
+# Modules that are imported on the generator's hot path (or lazily on demand)
+REPORT_MODULES = ["lambda_handler", "pandas", "numpy", "PIL.Image", "boto3", "requests", "tweepy", "matplotlib.pyplot"]
+
+
+def configure():
+    """ Forces the Agg backend & uses the packaged font cache (or /tmp if it was not built).
+        Must run before matplotlib is imported anywhere.
+    """
+
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    if os.path.isdir(MPL_CONFIG_PATH):
+        os.environ.setdefault("MPLCONFIGDIR", MPL_CONFIG_PATH)
+    else:
+        os.environ.setdefault("MPLCONFIGDIR", "/tmp/matplotlib")
+
+
+def build_font_cache():
+    """ Imports matplotlib with MPLCONFIGDIR pointed at the package so the font cache ships with it. """
+
+    os.makedirs(MPL_CONFIG_PATH, exist_ok=True)
+    os.environ["MPLCONFIGDIR"] = MPL_CONFIG_PATH
+    os.environ["MPLBACKEND"] = "Agg"
+
+    import matplotlib.font_manager
+
+    matplotlib.font_manager.findfont("DejaVu Sans")
+    print(f"Built the matplotlib font cache in {MPL_CONFIG_PATH}")
+
+
+def _import_times(code: str):
+    """ Runs code in a fresh interpreter with -X importtime & totals the cumulative import
+        time (microseconds) of each top-level package. Returns (totals, return code).
+    """
+
+    env = dict(os.environ, MPLBACKEND="Agg")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+    )
+
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    # Only the outermost import of each package is counted (no leading spaces on the name)
+    totals = dict()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if name.startswith("  "):
+            continue
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + int(cumulative)
+
+    return totals, result.returncode
+
+
+def import_time_report(module: str) -> list:
+    """ Imports a module in a fresh interpreter & reports what it costs on top of interpreter startup.
+
+    Args:
+        module: module to import
+
+    Returns:
+        list: (package, cumulative microseconds) tuples, slowest first
+    """
+
+    baseline, _ = _import_times("pass")
+    totals, return_code = _import_times(f"import {module}")
+    if return_code != 0:
+        raise ImportError(f"Unable to import {module} for the import time report.")
+
+    report = [(package, us) for package, us in totals.items() if package not in baseline]
+    return sorted(report, key=lambda item: item[1], reverse=True)
+
+
+def print_import_report():
+    for module in REPORT_MODULES:
+        try:
+            report = import_time_report(module)
+        except ImportError as e:
+            print(e)
+            continue
+
+        total = sum(us for _, us in report)
+        print(f"import {module}: {total / 1000:.1f} ms")
+        for package, us in report[:5]:
+            print(f"    {package:<24} {us / 1000:8.1f} ms")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--build-font-cache", help="build the packaged matplotlib font cache", action="store_true")
+    parser.add_argument("--import-report", help="print the import time report", action="store_true")
+    arguments = parser.parse_args()
+    return arguments
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    if args.build_font_cache:
+        build_font_cache()
+
+    if args.import_report:
+        print_import_report()
@@ -0,0 +1,223 @@
+"""
+This module caches the enriched play by play dataframe (the output of
+clean_pbp.run_all_stats) per game so each intermission run only needs to
+calculate stats for the events that were added since the last run.
+
+Entries are stored as gzipped typed column buffers (payload_codec's columnar
+layout) instead of pickles - loading an entry never executes code, so a shared
+or tampered bucket can at worst cause a cache miss.
+"""
+
+import gzip
+import io
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+import clean_pbp
+import clients
+import payload_codec
+
+# Bumped whenever the entry layout changes - entries with another version are ignored
+CACHE_FORMAT_VERSION = 1
+
+
+class StatsStore:
+    """ Base class for a per-game stats cache store. Stores & returns raw bytes keyed by Game ID. """
+
+    def get(self, game_id: str):
+        raise NotImplementedError
+
+    def put(self, game_id: str, data: bytes):
+        raise NotImplementedError
+
+
+class LocalStatsStore(StatsStore):
+    """ Stats cache store backed by a local directory (ex: /tmp or a mounted volume). """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, game_id):
+        return os.path.join(self.directory, f"{game_id}-stats.bin")
+
+    def get(self, game_id: str):
+        try:
+            with open(self._path(game_id), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, game_id: str, data: bytes):
+        # Write to a temporary file first so a failed write never leaves a partial cache
+        path = self._path(game_id)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+
+class S3StatsStore(StatsStore):
+    """ Stats cache store backed by an S3 (or S3-compatible) bucket. """
+
+    def __init__(self, bucket: str, prefix: str = "stats-cache/", endpoint_url: str = None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.s3_client = clients.get_client("s3", endpoint_url=endpoint_url)
+
+    def _key(self, game_id):
+        return f"{self.prefix}{game_id}-stats.bin"
+
+    def get(self, game_id: str):
+        from botocore.exceptions import ClientError
+
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=self._key(game_id))
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return None
+            raise
+        return response["Body"].read()
+
+    def put(self, game_id: str, data: bytes):
+        self.s3_client.put_object(Bucket=self.bucket, Key=self._key(game_id), Body=data)
+
+
+def get_stats_store():
+    """ Builds the stats cache store from the STATS_CACHE environment variable.
+        An s3://bucket/prefix value uses S3, any other value is used as a local directory.
+
+    Returns:
+        StatsStore: the configured store or None if caching is disabled
+    """
+
+    location = os.environ.get("STATS_CACHE")
+    if not location:
+        return None
+
+    if location.startswith("s3://"):
+        bucket, _, prefix = location[len("s3://") :].partition("/")
+        endpoint_url = os.environ.get("STATS_CACHE_ENDPOINT")
+        return S3StatsStore(bucket, prefix=prefix, endpoint_url=endpoint_url)
+
+    return LocalStatsStore(location)
+
+
+def hash_rows(df: pd.DataFrame):
+    """ Returns one hash per row so a cached prefix can be validated against a new scrape. """
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def dump_entry(entry: dict) -> bytes:
+    """ Serializes a cache entry: JSON header, then the row hashes & the stats frame as column buffers. """
+
+    header = json.dumps(
+        {"version": CACHE_FORMAT_VERSION, "last_index": entry["last_index"], "columns": entry["columns"]}
+    ).encode("utf-8")
+
+    raw = (
+        len(header).to_bytes(4, "little")
+        + header
+        + payload_codec.write_columnar(pd.DataFrame({"row_hash": entry["row_hashes"]}))
+        + payload_codec.write_columnar(entry["stats_df"])
+    )
+    return gzip.compress(raw, compresslevel=5)
+
+
+def load_entry(data: bytes):
+    """ Deserializes a cache entry written by dump_entry.
+
+    Returns:
+        dict: the cache entry or None if it is unreadable (truncated, corrupt or another format version)
+    """
+
+    try:
+        with gzip.GzipFile(fileobj=io.BytesIO(data)) as stream:
+            header_length = int.from_bytes(stream.read(4), "little")
+            header = json.loads(stream.read(header_length))
+            if header.get("version") != CACHE_FORMAT_VERSION:
+                logging.warning("Stats cache entry has format version %s - ignoring it.", header.get("version"))
+                return None
+
+            row_hashes = payload_codec.read_columnar(stream)["row_hash"].to_numpy()
+            stats_df = payload_codec.read_columnar(stream)
+    except Exception as e:
+        logging.warning("Stats cache entry could not be read (%s) - ignoring it.", e)
+        return None
+
+    if len(row_hashes) != header["last_index"] + 1 or len(stats_df.index) != len(row_hashes):
+        logging.warning("Stats cache entry is incomplete - ignoring it.")
+        return None
+
+    return {
+        "last_index": header["last_index"],
+        "columns": header["columns"],
+        "row_hashes": row_hashes,
+        "stats_df": stats_df,
+    }
+
+
+def run_all_stats_cached(pbp_df: pd.DataFrame, game_id: str, store: StatsStore):
+    """ Runs clean_pbp.run_all_stats only on the events that are not in the cache yet.
+        The last cached event is re-processed alongside the new events because the
+        shift(1) stats (time_diff, rebound, rush, was_tied) depend on the previous event.
+        Any problem reading or writing the cache falls back to (or keeps) a full recompute.
+
+    Args:
+        pbp_df (DataFrame): cleaned (but not yet enriched) play by play dataframe
+        game_id: NHL Game ID used as the cache key
+        store (StatsStore): store holding the cached enriched dataframe
+
+    Returns:
+        pbp_df (DataFrame): pbp_df with all fixes and stats applied
+    """
+
+    if store is None:
+        return clean_pbp.run_all_stats(pbp_df)
+
+    pbp_df = pbp_df.reset_index(drop=True)
+    row_hashes = hash_rows(pbp_df)
+
+    try:
+        cached = store.get(game_id)
+    except Exception as e:
+        logging.warning("Stats cache for %s could not be fetched (%s) - treating it as a miss.", game_id, e)
+        cached = None
+    cache_entry = load_entry(cached) if cached else None
+
+    # The cache is only usable if the already processed events are unchanged in this scrape
+    last_index = cache_entry["last_index"] if cache_entry else -1
+    is_cache_valid = (
+        cache_entry is not None
+        and cache_entry["columns"] == list(pbp_df.columns)
+        and 0 <= last_index < len(pbp_df)
+        and np.array_equal(cache_entry["row_hashes"], row_hashes[: last_index + 1])
+    )
+
+    if not is_cache_valid:
+        logging.info("No valid stats cache for %s - calculating stats for all events.", game_id)
+        stats_df = clean_pbp.run_all_stats(pbp_df.copy())
+    elif last_index == len(pbp_df) - 1:
+        logging.info("Stats cache for %s is already up to date.", game_id)
+        stats_df = cache_entry["stats_df"]
+    else:
+        logging.info("Stats cache hit for %s - calculating stats for events after %s.", game_id, last_index)
+        new_df = clean_pbp.run_all_stats(pbp_df.iloc[last_index:].copy())
+        stats_df = pd.concat([cache_entry["stats_df"], new_df.iloc[1:]])
+
+    cache_entry = {
+        "last_index": len(pbp_df) - 1,
+        "columns": list(pbp_df.columns),
+        "row_hashes": row_hashes,
+        "stats_df": stats_df,
+    }
+    try:
+        store.put(game_id, dump_entry(cache_entry))
+    except Exception as e:
+        logging.warning("Stats cache for %s could not be written (%s).", game_id, e)
+
+    return stats_df.copy()
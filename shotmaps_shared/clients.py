@@ -0,0 +1,64 @@
+"""
+This module holds the AWS & HTTP clients shared by the whole Lambda. Clients are
+created on first use and kept at module scope, so warm invocations re-use the same
+clients (and their open keep-alive connections) instead of building new ones per call.
+This module is shared by the scraper & generator Lambdas (shotmaps_shared layer).
+"""
+
+import os
+import threading
+
+MAX_POOL_CONNECTIONS = int(os.environ.get("MAX_POOL_CONNECTIONS", 10))
+
+_clients = dict()
+_http_session = None
+_lock = threading.Lock()
+
+
+def get_client(service: str, **kwargs):
+    """ Returns the shared boto3 client for a service (ex: dynamodb, s3, lambda).
+
+    Args:
+        service: AWS service name
+        kwargs: any extra boto3 client arguments (ex: endpoint_url) - part of the cache key
+
+    Returns:
+        the boto3 client
+    """
+
+    key = (service, tuple(sorted(kwargs.items())))
+    if key in _clients:
+        return _clients[key]
+
+    # boto3 is imported on first use - init skips it, the first call that needs a client pays for it
+    import boto3
+    from botocore.config import Config
+
+    with _lock:
+        if key not in _clients:
+            config = Config(max_pool_connections=MAX_POOL_CONNECTIONS, tcp_keepalive=True)
+            _clients[key] = boto3.session.Session().client(service, config=config, **kwargs)
+
+    return _clients[key]
+
+
+def get_http_session():
+    """ Returns the shared requests Session (keep-alive connection pool for all HTTP calls). """
+
+    global _http_session
+
+    if _http_session is not None:
+        return _http_session
+
+    import requests
+
+    with _lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=MAX_POOL_CONNECTIONS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+
+    return _http_session
+
@@ -0,0 +1,195 @@
+"""
+This module encodes & decodes the play by play dataframe sent from the scraper
+Lambda to the generator & twitter Lambda (inline or via the payload store).
+write_columnar / read_columnar are also used for local storage (ex: the stats cache).
+This module is shared by the scraper & generator Lambdas (shotmaps_shared layer).
+"""
+
+import base64
+import gzip
+import io
+import json
+import logging
+import math
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_extension_array_dtype, is_numeric_dtype
+
+import payload_store
+
+# The only columns the generator reads (after being lowercased)
+GENERATOR_COLUMNS = [
+    "period", "event", "seconds_elapsed", "strength", "ev_zone", "ev_team", "home_team", "away_team",
+    "p1_name", "p1_id", "p2_name", "p2_id", "home_score", "away_score", "xc", "yc",
+]
+
+CODEC_JSON = "json"
+CODEC_COLUMNAR = "columnar-gzip"
+
+# Async invokes are limited to 256KB - leave room for the rest of the payload
+DEFAULT_INLINE_LIMIT = 240000
+
+
+def write_columnar(df: pd.DataFrame) -> bytes:
+    """ Writes a dataframe as (uncompressed) typed column buffers - the layout read_columnar reads.
+        Layout: 4-byte header length, JSON header (row count, column names, dtypes & sizes), column buffers.
+
+    Args:
+        df (DataFrame): dataframe to write
+
+    Returns:
+        bytes: the column buffers
+    """
+
+    header = {"length": len(df.index), "columns": []}
+    buffers = []
+
+    for name in df.columns:
+        values = df[name]
+        # Extension dtypes (ex: Int64, boolean) have no plain buffer - they are written like object columns
+        if (is_numeric_dtype(values) or is_bool_dtype(values)) and not is_extension_array_dtype(values):
+            buffer = np.ascontiguousarray(values.to_numpy()).tobytes()
+            dtype = values.dtype.str
+        else:
+            # Strings & mixed object columns are stored as a JSON list (missing values as null)
+            values = values.astype(object).where(values.notna(), None)
+            buffer = json.dumps(values.tolist(), default=str).encode("utf-8")
+            dtype = "json"
+
+        header["columns"].append({"name": name, "dtype": dtype, "nbytes": len(buffer)})
+        buffers.append(buffer)
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    return len(header_bytes).to_bytes(4, "little") + header_bytes + b"".join(buffers)
+
+
+def read_columnar(stream) -> pd.DataFrame:
+    """ Reads a dataframe from a stream of (uncompressed) typed column buffers.
+        Columns are read one at a time so the whole payload is never held as one buffer.
+
+    Args:
+        stream: binary file-like object
+
+    Returns:
+        DataFrame: the decoded dataframe
+    """
+
+    header_length = int.from_bytes(stream.read(4), "little")
+    header = json.loads(stream.read(header_length))
+
+    columns = dict()
+    for column in header["columns"]:
+        buffer = stream.read(column["nbytes"])
+
+        if column["dtype"] == "json":
+            columns[column["name"]] = pd.Series(json.loads(buffer), dtype=object)
+        else:
+            # Copy out of the read buffer so the column is writeable
+            columns[column["name"]] = np.frombuffer(buffer, dtype=np.dtype(column["dtype"])).copy()
+
+    return pd.DataFrame(columns, index=pd.RangeIndex(header["length"]))
+
+
+def encode_columnar(df: pd.DataFrame) -> bytes:
+    """ Encodes a dataframe as gzipped typed column buffers (see write_columnar).
+
+    Args:
+        df (DataFrame): dataframe to encode
+
+    Returns:
+        bytes: gzip compressed column buffers
+    """
+
+    return gzip.compress(write_columnar(df), compresslevel=6)
+
+
+def decode_columnar(data: str) -> pd.DataFrame:
+    """ Decodes a dataframe from gzipped, base64-encoded typed column buffers.
+
+    Args:
+        data: base64 string of the encode_columnar output
+
+    Returns:
+        DataFrame: the decoded dataframe
+    """
+
+    with gzip.GzipFile(fileobj=io.BytesIO(base64.b64decode(data))) as stream:
+        return read_columnar(stream)
+
+
+def encode_pbp(pbp: pd.DataFrame, codec: str = None, store=None, game_id: str = None) -> dict:
+    """ Encodes the play by play dataframe into the payload fields for the generator.
+        Columns the generator never reads are dropped before encoding. If the encoded
+        frame is larger than PAYLOAD_INLINE_LIMIT bytes and a store is given, the frame
+        is written to the store and only a reference is sent (claim-check).
+
+    Args:
+        pbp (DataFrame): lowercased play by play dataframe
+        codec: CODEC_JSON or CODEC_COLUMNAR (defaults to the PAYLOAD_CODEC environment variable)
+        store (PayloadStore): optional store for oversized payloads
+        game_id: NHL Game ID (used to name the stored payload)
+
+    Returns:
+        dict: payload fields to merge into the generator payload
+    """
+
+    codec = codec or os.environ.get("PAYLOAD_CODEC", CODEC_COLUMNAR)
+    inline_limit = int(os.environ.get("PAYLOAD_INLINE_LIMIT", DEFAULT_INLINE_LIMIT))
+    pbp = pbp[[col for col in GENERATOR_COLUMNS if col in pbp.columns]]
+
+    if codec == CODEC_JSON:
+        pbp_bytes = pbp.to_json().encode("utf-8")
+        inline_size = len(pbp_bytes)
+    elif codec == CODEC_COLUMNAR:
+        pbp_bytes = encode_columnar(pbp)
+        inline_size = 4 * math.ceil(len(pbp_bytes) / 3)
+    else:
+        raise ValueError(f"Unknown payload codec: {codec}")
+
+    if store is not None and inline_size > inline_limit:
+        logging.info("Encoded frame is %s bytes - offloading the payload to the payload store.", inline_size)
+        return {"pbp_codec": codec, "pbp_ref": store.put(game_id, pbp_bytes)}
+
+    if codec == CODEC_JSON:
+        return {"pbp_json": pbp_bytes.decode("utf-8")}
+
+    return {"pbp_codec": codec, "pbp_data": base64.b64encode(pbp_bytes).decode("ascii")}
+
+
+def decode_pbp(event: dict) -> pd.DataFrame:
+    """ Gets the play by play dataframe from the payload, using whichever codec the scraper used.
+        Offloaded payloads (pbp_ref) are streamed from the payload store.
+
+    Args:
+        event: event passed into the AWS Lambda
+
+    Returns:
+        DataFrame: the play by play dataframe
+    """
+
+    codec = event.get("pbp_codec", CODEC_JSON)
+    reference = event.get("pbp_ref")
+
+    if reference is not None:
+        logging.info("Payload was offloaded - streaming the play by play from %s.", reference)
+        body = payload_store.store_from_reference(reference).open(reference)
+        try:
+            if codec == CODEC_COLUMNAR:
+                with gzip.GzipFile(fileobj=body) as stream:
+                    return read_columnar(stream)
+            if codec == CODEC_JSON:
+                return pd.read_json(io.TextIOWrapper(body, encoding="utf-8"))
+        finally:
+            body.close()
+
+    elif codec == CODEC_COLUMNAR:
+        return decode_columnar(event.get("pbp_data"))
+
+    elif codec == CODEC_JSON:
+        pbp_json = event.get("pbp_json")
+        pbp_json = json.dumps(pbp_json) if isinstance(pbp_json, dict) else pbp_json
+        return pd.read_json(pbp_json)
+
+    raise ValueError(f"Unknown payload codec: {codec}")
@@ -0,0 +1,99 @@
+"""
+This module holds play by play payloads that are too large to send inline to
+the generator & twitter Lambda (claim-check). The scraper writes the payload to
+a store and only passes a reference - the generator opens the reference as a stream.
+This module is shared by the scraper & generator Lambdas (shotmaps_shared layer).
+"""
+
+import os
+import uuid
+
+import clients
+
+
+class PayloadStore:
+    """ Base class for a payload store. """
+
+    def put(self, game_id: str, data: bytes) -> dict:
+        """ Stores the payload bytes and returns a JSON-serializable reference. """
+        raise NotImplementedError
+
+    def open(self, reference: dict):
+        """ Opens a stored payload as a binary file-like stream. """
+        raise NotImplementedError
+
+    def delete(self, reference: dict):
+        raise NotImplementedError
+
+
+class LocalPayloadStore(PayloadStore):
+    """ Payload store backed by a local (or shared) directory. """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def put(self, game_id: str, data: bytes) -> dict:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{game_id}-{uuid.uuid4().hex}.bin")
+        with open(path, "wb") as f:
+            f.write(data)
+        return {"type": "local", "path": path}
+
+    def open(self, reference: dict):
+        return open(reference["path"], "rb")
+
+    def delete(self, reference: dict):
+        os.remove(reference["path"])
+
+
+class S3PayloadStore(PayloadStore):
+    """ Payload store backed by an S3 bucket. """
+
+    def __init__(self, bucket: str, prefix: str = "payloads/"):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.s3_client = clients.get_client("s3")
+
+    def put(self, game_id: str, data: bytes) -> dict:
+        key = f"{self.prefix}{game_id}-{uuid.uuid4().hex}.bin"
+        self.s3_client.put_object(Bucket=self.bucket, Key=key, Body=data)
+        return {"type": "s3", "bucket": self.bucket, "key": key}
+
+    def open(self, reference: dict):
+        # The StreamingBody is read in chunks by the caller, never buffered as a whole
+        response = self.s3_client.get_object(Bucket=reference["bucket"], Key=reference["key"])
+        return response["Body"]
+
+    def delete(self, reference: dict):
+        self.s3_client.delete_object(Bucket=reference["bucket"], Key=reference["key"])
+
+
+def get_payload_store():
+    """ Builds the payload store from the PAYLOAD_STORE environment variable.
+        An s3://bucket/prefix value uses S3, any other value is used as a local directory.
+
+    Returns:
+        PayloadStore: the configured store or None if offloading is disabled
+    """
+
+    location = os.environ.get("PAYLOAD_STORE")
+    if not location:
+        return None
+
+    if location.startswith("s3://"):
+        bucket, _, prefix = location[len("s3://") :].partition("/")
+        return S3PayloadStore(bucket, prefix=prefix)
+
+    return LocalPayloadStore(location)
+
+
+def store_from_reference(reference: dict) -> PayloadStore:
+    """ Returns the store that can open a payload reference. """
+
+    if reference["type"] == "s3":
+        return S3PayloadStore(reference["bucket"])
+
+    if reference["type"] == "local":
+        return LocalPayloadStore(os.path.dirname(reference["path"]))
+
+    raise ValueError(f"Unknown payload reference type: {reference['type']}")
@@ -0,0 +1,15 @@
+import pytest
+
+from tests import lambdas
+
+lambdas.add_paths()
+
+
+@pytest.fixture(scope="session")
+def scraper_handler():
+    return lambdas.load_handler(lambdas.SCRAPER_DIR)
+
+
+@pytest.fixture(scope="session")
+def generator_handler():
+    return lambdas.load_handler(lambdas.GENERATOR_DIR)
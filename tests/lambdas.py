@@ -0,0 +1,45 @@
+"""
+Puts the Lambda packages on sys.path the way they are deployed (flat modules plus the
+shotmaps_shared layer). Both packages have a lambda_handler module, so the handlers are
+loaded under their own names (scraper_lambda_handler / generator_lambda_handler / v1_function).
+"""
+
+import importlib.util
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHARED_DIR = os.path.join(PROJECT_ROOT, "shotmaps_shared")
+SCRAPER_DIR = os.path.join(PROJECT_ROOT, "shotmaps_gamescraper")
+GENERATOR_DIR = os.path.join(PROJECT_ROOT, "shotmaps_generator_sendtweet")
+V1_DIR = os.path.join(PROJECT_ROOT, "shotmaps-lambda-v1")
+
+# Package directory -> (module name, handler file)
+HANDLERS = {
+    SCRAPER_DIR: ("scraper_lambda_handler", "lambda_handler.py"),
+    GENERATOR_DIR: ("generator_lambda_handler", "lambda_handler.py"),
+    V1_DIR: ("v1_function", "function.py"),
+}
+
+
+def add_paths():
+    """ Adds the shared layer, both Lambda packages & the project root (pollers, nhl_fetch) to sys.path. """
+
+    for path in (PROJECT_ROOT, GENERATOR_DIR, SCRAPER_DIR, SHARED_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def load_handler(package_dir: str):
+    """ Imports (once) the handler module of a Lambda package under a package-specific name. """
+
+    name, filename = HANDLERS[package_dir]
+    if name in sys.modules:
+        return sys.modules[name]
+
+    add_paths()
+    spec = importlib.util.spec_from_file_location(name, os.path.join(package_dir, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
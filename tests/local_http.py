@@ -0,0 +1,79 @@
+"""
+A keep-alive HTTP server on localhost for tests & benchmarks. Every request is recorded
+and answered by a respond(method, path, headers) function returning (status, headers, body).
+A reply with a "Transfer-Encoding: chunked" header is sent in chunks (no Content-Length).
+"""
+
+import http.server
+import socket
+import threading
+
+
+class LocalHTTPServer:
+    """ Threaded HTTP/1.1 server on 127.0.0.1 (random port) - use as a context manager. """
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = list()
+        # Client (host, port) of every connection that sent a request - one per kept-alive connection
+        self.connections = set()
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers & body are separate writes - without this a kept-alive reply waits on delayed ACKs
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _reply(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                server.requests.append((self.command, self.path))
+                server.connections.add(self.client_address)
+                status, headers, body = server.respond(self.command, self.path, self.headers)
+                headers = headers or {}
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if headers.get("Transfer-Encoding") == "chunked":
+                    self.end_headers()
+                    for i in range(0, len(body or b""), 1024):
+                        chunk = body[i : i + 1024]
+                        self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+                    self.wfile.write(b"0\r\n\r\n")
+                    return
+
+                self.send_header("Content-Length", str(len(body or b"")))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            do_GET = do_POST = _reply
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def closed_port_url():
+    """ Returns a URL on a localhost port nothing listens on (connection refused). """
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}/"
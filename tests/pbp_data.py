@@ -0,0 +1,162 @@
+"""
+Shared play by play test data - a synthetic scraped frame factory, the pre-fusion
+stats pipeline (reference for calc_all_stats) & a column by column frame comparison.
+Used by the tests & the benchmarks.
+"""
+
+import numpy as np
+import pandas as pd
+
+from tests import lambdas
+
+lambdas.add_paths()
+
+import clean_pbp  # noqa: E402
+
+
+def make_sample_pbp(rows, seed=0, wide=False):
+    """
+    Builds a random (but realistic looking) scraped play by play dataframe
+    for the tests & benchmarks.
+
+    Inputs:
+    rows - number of events
+    seed - random seed
+    wide - also add the scraped columns the generator never reads (like the full hockey_scraper frame)
+
+    Outputs:
+    pbp_df - play by play dataframe with the columns the generator reads
+    """
+
+    rng = np.random.default_rng(seed)
+    events = np.array(["SHOT", "MISS", "BLOCK", "GOAL", "FAC", "HIT", "GIVE", "TAKE", "STOP", "PENL"])
+    event_weights = np.array([0.2, 0.12, 0.12, 0.02, 0.16, 0.16, 0.06, 0.06, 0.07, 0.03])
+
+    event = rng.choice(events, size=rows, p=event_weights)
+    period = np.sort(rng.integers(1, 4, size=rows))
+    seconds_elapsed = rng.integers(0, 1200, size=rows)
+    order = np.lexsort((seconds_elapsed, period))
+    is_home = rng.random(rows) < 0.5
+    players = np.array([f"PLAYER {i}" for i in range(40)], dtype=object)
+    p1 = rng.integers(0, 40, size=rows)
+    p2 = rng.integers(0, 40, size=rows)
+
+    pbp_df = pd.DataFrame(
+        {
+            "period": period[order],
+            "event": event,
+            "seconds_elapsed": seconds_elapsed[order],
+            "strength": rng.choice(["5x5", "5x4", "4x5", "4x4", "6x5", "3x3"], size=rows),
+            "ev_zone": rng.choice(["Off", "Neu", "Def"], size=rows),
+            "ev_team": np.where(is_home, "WSH", "BOS"),
+            "home_team": "WSH",
+            "away_team": "BOS",
+            "p1_name": players[p1],
+            "p1_id": 8470000 + p1,
+            "p2_name": players[p2],
+            "p2_id": 8470000 + p2,
+            "home_score": np.cumsum((event == "GOAL") & is_home),
+            "away_score": np.cumsum((event == "GOAL") & ~is_home),
+            "xc": rng.integers(-99, 100, size=rows),
+            "yc": rng.integers(-42, 43, size=rows),
+        }
+    )
+
+    # Events without a second player (like the scraped frames)
+    pbp_df.loc[rng.random(rows) < 0.3, ["p2_name", "p2_id"]] = None
+    if not wide:
+        return pbp_df
+
+    extra_df = pd.DataFrame(
+        {
+            "game_id": 2019020001,
+            "date": "2019-10-02",
+            "description": [f"WSH #{n} PLAYER, Wrist, Off. Zone, {d} ft." for n, d in
+                            zip(rng.integers(1, 99, size=rows), rng.integers(5, 60, size=rows))],
+            "time_elapsed": [f"{s // 60}:{s % 60:02d}" for s in pbp_df.seconds_elapsed],
+            "type": rng.choice(["WRIST SHOT", "SLAP SHOT", "SNAP SHOT", "BACKHAND", ""], size=rows),
+            "home_zone": rng.choice(["Off", "Neu", "Def"], size=rows),
+            "p3_name": players[rng.integers(0, 40, size=rows)],
+            "p3_id": rng.integers(8470000, 8480000, size=rows).astype(float),
+            "awayplayers": 5,
+            "homeplayers": 5,
+            "away_players": 6,
+            "home_players": 6,
+            "away_goalie": "GOALIE A",
+            "away_goalie_id": 8471000.0,
+            "home_goalie": "GOALIE H",
+            "home_goalie_id": 8472000.0,
+        }
+    )
+    extra_df.loc[rng.random(rows) < 0.5, ["p3_name", "p3_id"]] = np.nan
+    return pd.concat([pbp_df, extra_df], axis=1)
+
+
+def run_all_stats_stepwise(pbp_df):
+    """
+    The pre-fusion run_all_stats - runs each of the clean_pbp cleaning & stat
+    generation functions one at a time. It is the reference the fused
+    calc_all_stats is checked against.
+
+    Inputs:
+    pbp_df - basic scraped pbp_df
+
+    Outputs:
+    pbp_df - pbp_df with all fixes and stats applied
+    """
+
+    # Run all cleaning & stat generation functions
+    pbp_df = clean_pbp.fix_seconds_elapsed(pbp_df)
+    pbp_df = clean_pbp.fixed_blocked_shots(pbp_df)
+    pbp_df = clean_pbp.calc_time_diff(pbp_df)
+    pbp_df = clean_pbp.calc_shot_metrics(pbp_df)
+    pbp_df = clean_pbp.calc_distance_togoal(pbp_df)
+    pbp_df = clean_pbp.calc_score_diff(pbp_df)
+    pbp_df = clean_pbp.calc_rebound(pbp_df)
+    pbp_df = clean_pbp.calc_rush_shot(pbp_df)
+    pbp_df = clean_pbp.calc_is_home(pbp_df)
+    pbp_df = clean_pbp.calc_was_tied(pbp_df)
+    pbp_df = clean_pbp.calc_shot_quality_area(pbp_df)
+    pbp_df = clean_pbp.calc_shot_danger(pbp_df)
+    pbp_df = clean_pbp.calc_is_scoring_chance(pbp_df)
+    pbp_df = clean_pbp.calc_team_strength(pbp_df)
+
+    return pbp_df
+
+
+def compare_frames(expected_df, actual_df):
+    """
+    Compares two dataframes column by column (numeric columns with a float
+    tolerance, NaN / None count as equal).
+
+    Inputs:
+    expected_df - reference dataframe
+    actual_df - dataframe to check
+
+    Outputs:
+    mismatches - {column: number of differing rows} for every column that differs
+                 (a column missing from either frame counts as every row)
+    """
+
+    expected_df = expected_df.reset_index(drop=True)
+    actual_df = actual_df.reset_index(drop=True)
+    if len(expected_df.index) != len(actual_df.index):
+        return {"(row count)": abs(len(expected_df.index) - len(actual_df.index))}
+
+    mismatches = dict()
+    for column in set(expected_df.columns) | set(actual_df.columns):
+        if column not in expected_df.columns or column not in actual_df.columns:
+            mismatches[column] = len(expected_df.index)
+            continue
+
+        expected = expected_df[column]
+        actual = actual_df[column]
+        if pd.api.types.is_numeric_dtype(expected) and pd.api.types.is_numeric_dtype(actual):
+            same = np.isclose(expected.to_numpy(dtype=float), actual.to_numpy(dtype=float), equal_nan=True)
+        else:
+            same = (expected == actual).to_numpy() | (expected.isna() & actual.isna()).to_numpy()
+
+        if not same.all():
+            mismatches[column] = int((~same).sum())
+
+    return mismatches
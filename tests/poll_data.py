@@ -0,0 +1,106 @@
+"""
+Game timelines for the poll schedule - a simulated game (one snapshot per wall clock second)
+& a replay of snapshots through a polling strategy. Used by the tests & the benchmarks
+(which can also replay snapshots recorded from a real game).
+"""
+
+from datetime import datetime, timezone
+
+START_TS = 1700000000
+INTERMISSION_SECONDS = 1080
+
+
+def simulate_game(periods=3, preview_seconds=3600, stoppage_every=3):
+    """
+    Builds the snapshots of a game polled every second: preview until puck drop, periods
+    with a clock that stops every few seconds (whistles) & intermissions between periods.
+
+    Returns:
+        list: time-ordered {"ts", "game_state", "linescore", "start_time"} snapshots
+    """
+
+    start_time = datetime.fromtimestamp(START_TS, timezone.utc).isoformat()
+    snapshots = list()
+    ts = START_TS - preview_seconds
+
+    def add(game_state, linescore):
+        nonlocal ts
+        snapshots.append({"ts": ts, "game_state": game_state, "linescore": linescore, "start_time": start_time})
+        ts += 1
+
+    while ts < START_TS:
+        add("Preview", {})
+
+    for period in range(1, periods + 1):
+        remaining = 1200
+        second = 0
+        while remaining > 0:
+            clock = f"{remaining // 60:02d}:{remaining % 60:02d}"
+            add("Live", {"currentPeriod": period, "currentPeriodTimeRemaining": clock})
+            second += 1
+            if second % stoppage_every:
+                remaining -= 1
+
+        if period == periods:
+            for _ in range(INTERMISSION_SECONDS):
+                add("Final", {"currentPeriod": period, "currentPeriodTimeRemaining": "Final"})
+            break
+
+        for intermission_remaining in range(INTERMISSION_SECONDS, 0, -1):
+            add("Live", {
+                "currentPeriod": period,
+                "currentPeriodTimeRemaining": "END",
+                "intermissionInfo": {"inIntermission": True, "intermissionTimeRemaining": intermission_remaining},
+            })
+
+    return snapshots
+
+
+def replay(snapshots, delay_func):
+    """ Replays game snapshots through a polling strategy.
+
+    Args:
+        snapshots: time-ordered list of {"ts" (epoch seconds), "game_state", "linescore", "start_time"}
+        delay_func: function(snapshot, now) -> seconds until the next poll
+
+    Returns:
+        dict: {"api_calls", "trigger_delays"} - trigger delay is the time between the first snapshot
+              showing an intermission / final for a period & the first poll that saw it
+    """
+
+    def trigger_key(snapshot):
+        linescore = snapshot["linescore"]
+        if snapshot["game_state"] == "Final":
+            return "final"
+        if linescore.get("intermissionInfo", {}).get("inIntermission"):
+            return str(linescore.get("currentPeriod"))
+        return None
+
+    # When each trigger first became visible in the timeline
+    first_seen = dict()
+    for snapshot in snapshots:
+        key = trigger_key(snapshot)
+        if key is not None:
+            first_seen.setdefault(key, snapshot["ts"])
+
+    api_calls = 0
+    seen = dict()
+    now = snapshots[0]["ts"]
+    index = 0
+
+    while now <= snapshots[-1]["ts"]:
+        while index + 1 < len(snapshots) and snapshots[index + 1]["ts"] <= now:
+            index += 1
+        snapshot = snapshots[index]
+        api_calls += 1
+
+        key = trigger_key(snapshot)
+        if key is not None:
+            seen.setdefault(key, now)
+        if snapshot["game_state"] == "Final":
+            break
+
+        now += max(1, delay_func(snapshot, datetime.fromtimestamp(now, timezone.utc)))
+
+    trigger_delays = {key: seen[key] - first_seen[key] for key in seen}
+    return {"api_calls": api_calls, "trigger_delays": trigger_delays}
@@ -0,0 +1,73 @@
+"""
+Shotmap inputs - random shots, the generate_shotmap jobs (All & 5v5) built from them & a
+local assets directory (plain white rink, matplotlib's bundled font in place of Open Sans).
+Used by the tests & the benchmarks.
+"""
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from tests import lambdas
+
+lambdas.add_paths()
+
+import assets  # noqa: E402
+
+RINK_KEY = "rink.png"
+
+
+def sample_shots(n: int = 60, seed: int = 0):
+    """ Returns random shot coordinates clustered in front of the right net. """
+
+    rng = np.random.default_rng(seed)
+    x = np.clip(rng.normal(65, 14, n), 26, 99)
+    y = np.clip(rng.normal(0, 14, n), -42, 42)
+    return x, y
+
+
+def write_assets(directory):
+    """ Writes a blank rink & the title font to directory (use as ASSETS_DIR, SHOTMAP_BLANK = RINK_KEY). """
+
+    import matplotlib
+
+    Image.new("RGBA", (2400, 1020), (255, 255, 255, 255)).save(os.path.join(directory, RINK_KEY))
+    font_path = os.path.join(matplotlib.get_data_path(), "fonts", "ttf", "DejaVuSans-Bold.ttf")
+    shutil.copy(font_path, os.path.join(directory, assets.FONT_OPENSANS_BOLD))
+
+
+def sample_jobs(n_shots: int = 60):
+    """ Builds the two generate_shotmap jobs (All & 5v5) from random shots. """
+
+    def team_df(seed, sign):
+        x, y = sample_shots(n_shots, seed=seed)
+        rng = np.random.default_rng(seed)
+        return pd.DataFrame({
+            "home_team": "WSH",
+            "away_team": "BOS",
+            "event": rng.choice(["SHOT", "MISS", "BLOCK", "GOAL"], n_shots, p=[0.5, 0.25, 0.2, 0.05]),
+            "xc": sign * x,
+            "yc": y,
+            "is_goal": rng.random(n_shots) < 0.05,
+            "is_shot": rng.random(n_shots) < 0.55,
+            "is_scoring_chance": rng.random(n_shots) < 0.3,
+            "shot_danger": rng.integers(0, 4, n_shots),
+            "distance_togoal": rng.uniform(5, 60, n_shots),
+            "strength": rng.choice(["5x5", "5x4"], n_shots, p=[0.8, 0.2]),
+        })
+
+    home_df, away_df = team_df(1, 1), team_df(2, -1)
+    team = {"team_name": "Team", "short_name": "TM"}
+    details = {"home": team, "away": team, "period": "2nd", "game_end": False}
+    return [
+        {"home_df": home_df, "away_df": away_df, "details": details, "strength": "All"},
+        {
+            "home_df": home_df.loc[home_df.strength == "5x5"],
+            "away_df": away_df.loc[away_df.strength == "5x5"],
+            "details": details,
+            "strength": "5v5",
+        },
+    ]
@@ -0,0 +1,18 @@
+import os
+import zipfile
+
+import build_layer
+
+
+def test_layer_has_every_shared_module_once(tmp_path):
+    output = build_layer.build_layer(str(tmp_path / "layer.zip"))
+
+    with zipfile.ZipFile(output) as layer:
+        names = layer.namelist()
+
+    assert sorted(names) == sorted(set(names))
+    assert {"python/clients.py", "python/payload_codec.py", "python/payload_store.py", "python/nhl_fetch.py"} <= set(
+        names
+    )
+    assert all(name.startswith("python/") and os.sep not in name[len("python/") :] for name in names)
+    assert "python/__init__.py" not in names
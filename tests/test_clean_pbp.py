@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import clean_pbp
+from tests.pbp_data import compare_frames, make_sample_pbp, run_all_stats_stepwise
+
+
+@pytest.mark.parametrize("rows, seed", [(2, 0), (300, 1), (3000, 2)])
+def test_calc_all_stats_matches_stepwise(rows, seed):
+    pbp_df = make_sample_pbp(rows, seed)
+
+    expected_df = run_all_stats_stepwise(pbp_df.copy())
+    actual_df = clean_pbp.calc_all_stats(pbp_df.copy())
+
+    assert list(actual_df.columns) == list(expected_df.columns)
+    assert compare_frames(expected_df, actual_df) == {}
+
+
+def test_calc_all_stats_swaps_blocked_shot_players():
+    pbp_df = make_sample_pbp(300, 1)
+    blocks = pbp_df.event == "BLOCK"
+
+    stats_df = clean_pbp.calc_all_stats(pbp_df.copy())
+
+    # The shooter (p2) becomes p1 on blocked shots - read from the original (unswapped) columns
+    assert (stats_df.loc[blocks, "p1_name"].values == pbp_df.loc[blocks, "p2_name"].values).all()
+    assert stats_df.loc[blocks, "p2_name"].equals(pbp_df.loc[blocks, "p1_name"])
+
+
+@pytest.mark.parametrize("rows, seed", [(2, 0), (300, 1), (3000, 2)])
+def test_danger_area_matches_row_wise(rows, seed):
+    pbp_df = make_sample_pbp(rows, seed)
+    pbp_df["is_corsi"] = np.where(pbp_df.event.isin(["SHOT", "BLOCK", "MISS", "GOAL"]), 1, 0)
+
+    expected = pbp_df.apply(clean_pbp.dfapply_danger_area, axis=1).to_numpy(dtype=float)
+    actual = clean_pbp.danger_area(pbp_df.xc, pbp_df.yc, pbp_df.is_corsi, pbp_df.ev_zone)
+
+    np.testing.assert_array_equal(actual, expected)
@@ -0,0 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import clients
+
+
+def test_http_session_is_shared_across_threads(monkeypatch):
+    monkeypatch.setattr(clients, "_http_session", None)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        sessions = list(executor.map(lambda _: clients.get_http_session(), range(32)))
+
+    assert all(session is sessions[0] for session in sessions)
+
+
+def test_client_is_cached_per_service_and_arguments(monkeypatch):
+    monkeypatch.setattr(clients, "_clients", dict())
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+
+    first = clients.get_client("dynamodb", endpoint_url="http://127.0.0.1:1")
+    assert clients.get_client("dynamodb", endpoint_url="http://127.0.0.1:1") is first
+    assert clients.get_client("dynamodb", endpoint_url="http://127.0.0.1:2") is not first
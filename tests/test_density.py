@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+import density
+from tests.shotmap_data import sample_shots
+
+
+@pytest.mark.parametrize("shots", [20, 60, 150])
+def test_kde_grid_matches_exact_kde(shots):
+    stats = pytest.importorskip("scipy.stats")
+    x, y = sample_shots(shots)
+    grid_x, grid_y = density.rink_grid(2)
+    gx, gy = np.meshgrid(grid_x, grid_y)
+
+    ours = density.kde_grid(x, y, resolution=2, bw=0.2)
+    exact = stats.gaussian_kde(np.vstack([x, y]), bw_method=0.2)([gx.ravel(), gy.ravel()]).reshape(gx.shape)
+
+    assert ours.shape == exact.shape
+    assert np.abs(ours - exact).max() / exact.max() < 0.01
+
+
+def test_kde_grid_needs_two_shots():
+    x, y = sample_shots(1)
+
+    assert not density.kde_grid(x, y, resolution=2).any()
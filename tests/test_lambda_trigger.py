@@ -0,0 +1,23 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import lambda_trigger
+
+
+def test_lambda_client_is_created_once_across_threads(monkeypatch):
+    created = list()
+
+    def slow_client(service):
+        # Building a boto3 client takes a while - long enough for other threads to get in
+        time.sleep(0.01)
+        created.append(service)
+        return object()
+
+    monkeypatch.setattr(lambda_trigger, "lambda_client", None)
+    monkeypatch.setattr(lambda_trigger.boto3, "client", slow_client)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        lambda_clients = list(executor.map(lambda _: lambda_trigger.get_lambda_client(), range(32)))
+
+    assert created == ["lambda"]
+    assert all(client is lambda_clients[0] for client in lambda_clients)
@@ -0,0 +1,142 @@
+"""
+Claim / complete / release lease protocol between the scraper & the generator.
+
+Runs against DynamoDB Local when DYNAMODB_LOCAL_URL is set (ex: http://localhost:8000).
+Otherwise moto is used in-process - moto does not apply a conditional UpdateItem atomically,
+so its update_item calls are serialized (as DynamoDB applies them per item).
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import clients
+
+TABLE_NAME = "nhl-shotmaps-tracking"
+GAME_ID = "2023020001"
+INVOCATIONS = 8
+
+
+class SerializedDynamoDB:
+    """ Wraps a DynamoDB client so each update_item (condition check + write) runs on its own. """
+
+    def __init__(self, client):
+        self._client = client
+        self._lock = threading.Lock()
+
+    def update_item(self, **kwargs):
+        with self._lock:
+            return self._client.update_item(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class FailingLambda:
+    """ Lambda client stand-in whose invoke always fails (the generator cannot be triggered). """
+
+    def invoke(self, **kwargs):
+        raise RuntimeError("generator invoke failed")
+
+
+@pytest.fixture
+def dynamo_client(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", os.environ.get("AWS_ACCESS_KEY_ID", "testing"))
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", os.environ.get("AWS_SECRET_ACCESS_KEY", "testing"))
+    monkeypatch.setenv("AWS_DEFAULT_REGION", os.environ.get("AWS_DEFAULT_REGION", "us-east-1"))
+
+    import boto3
+
+    local_url = os.environ.get("DYNAMODB_LOCAL_URL")
+    if local_url:
+        client = boto3.client("dynamodb", endpoint_url=local_url)
+        mock = None
+    else:
+        moto = pytest.importorskip("moto")
+        mock = moto.mock_aws()
+        mock.start()
+        client = SerializedDynamoDB(boto3.client("dynamodb"))
+
+    if TABLE_NAME in client.list_tables()["TableNames"]:
+        client.delete_table(TableName=TABLE_NAME)
+    client.create_table(
+        TableName=TABLE_NAME,
+        KeySchema=[{"AttributeName": "gamePk", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "gamePk", "AttributeType": "N"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+    services = {"dynamodb": client, "lambda": FailingLambda()}
+    monkeypatch.setattr(clients, "get_client", lambda service, **kwargs: services[service])
+    try:
+        yield client
+    finally:
+        client.delete_table(TableName=TABLE_NAME)
+        if mock is not None:
+            mock.stop()
+
+
+def get_item(client):
+    return client.get_item(TableName=TABLE_NAME, Key={"gamePk": {"N": GAME_ID}}).get("Item", {})
+
+
+def race(func, args_list):
+    """ Starts every call together (barrier) to provoke races & returns their results in order. """
+
+    barrier = threading.Barrier(len(args_list))
+
+    def run(args):
+        barrier.wait()
+        return func(*args)
+
+    with ThreadPoolExecutor(max_workers=len(args_list)) as executor:
+        return list(executor.map(run, args_list))
+
+
+def test_one_winner_per_period(dynamo_client, scraper_handler, generator_handler):
+    for period in (1, 2, 3):
+        claim_ids = [f"p{period}-{i}" for i in range(INVOCATIONS)]
+        won = race(scraper_handler.claim_event_period, [(GAME_ID, period, claim_id) for claim_id in claim_ids])
+        race(generator_handler.db_upsert_event, [(GAME_ID, period, claim_id) for claim_id in claim_ids])
+
+        item = get_item(dynamo_client)
+        assert sum(won) == 1
+        assert item["lastPeriodProcessed"]["N"] == str(period)
+        assert "leaseOwner" not in item
+
+
+def test_stale_period_cannot_be_claimed(dynamo_client, scraper_handler, generator_handler):
+    assert scraper_handler.claim_event_period(GAME_ID, 2, "winner")
+    generator_handler.db_upsert_event(GAME_ID, 2, "winner")
+
+    won = race(scraper_handler.claim_event_period, [(GAME_ID, period, f"late-{period}") for period in (1, 2)])
+    assert won == [False, False]
+
+
+def test_expired_lease_takeover(dynamo_client, scraper_handler, generator_handler, monkeypatch):
+    # Every lease is already expired, so the second invocation takes over the first one's lease
+    monkeypatch.setattr(scraper_handler, "LEASE_SECONDS", -1)
+    assert scraper_handler.claim_event_period(GAME_ID, 4, "first")
+    assert scraper_handler.claim_event_period(GAME_ID, 4, "second")
+
+    # The old owner cannot complete (or release) the period anymore
+    generator_handler.db_upsert_event(GAME_ID, 4, "first")
+    item = get_item(dynamo_client)
+    assert item["leaseOwner"]["S"] == "second"
+    assert "lastPeriodProcessed" not in item
+
+    generator_handler.db_upsert_event(GAME_ID, 4, "second")
+    assert get_item(dynamo_client)["lastPeriodProcessed"]["N"] == "4"
+
+
+def test_failed_invoke_releases_claim(dynamo_client, scraper_handler, monkeypatch):
+    monkeypatch.setattr(scraper_handler, "get_pbp", lambda game_id, source=None: pd.DataFrame({"period": [5]}))
+
+    with pytest.raises(RuntimeError):
+        scraper_handler.scrape_game(GAME_ID, 5, 0, 0, "failing")
+
+    assert "leaseOwner" not in get_item(dynamo_client)
+    assert scraper_handler.claim_event_period(GAME_ID, 5, "retry")
@@ -0,0 +1,49 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import livefeed_pbp
+
+# The same game as the live feed & as hockey_scraper's pbp CSV. Built by hand in the statsapi layout (the endpoint
+# is retired and can't be recorded anymore) with two differences a real game has: one shot is logged a second
+# later in the html report & one shot has no coordinates in the feed
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+GAME_ID = "2019020001"
+
+
+@pytest.fixture(scope="module")
+def feed_df():
+    with open(os.path.join(FIXTURES_DIR, f"livefeed_{GAME_ID}.json")) as f:
+        return livefeed_pbp.livefeed_to_pbp(json.load(f))
+
+
+@pytest.fixture(scope="module")
+def scraper_df():
+    df = pd.read_csv(os.path.join(FIXTURES_DIR, f"scraper_pbp_{GAME_ID}.csv"))
+    df.columns = map(str.lower, df.columns)
+    return df
+
+
+def test_parity_report_on_recorded_game(feed_df, scraper_df):
+    report = livefeed_pbp.parity_report(feed_df, scraper_df)
+
+    assert report["livefeed_events"] == report["scraper_events"] == {"SHOT": 8, "GOAL": 3, "MISS": 2, "BLOCK": 2}
+    assert report["matched"] == 14
+    assert report["unmatched_livefeed"] == report["unmatched_scraper"] == 1
+    # The shot without coordinates has no zone in the feed
+    assert report["agreement"].pop("ev_zone") == round(13 / 14, 4)
+    assert set(report["agreement"].values()) == {1.0}
+
+
+def test_goal_has_score_before_it(feed_df):
+    goals = feed_df[feed_df["event"] == "GOAL"]
+
+    assert goals[["home_score", "away_score"]].values.tolist() == [[0, 0], [1, 0], [1, 1]]
+
+
+def test_power_play_goal_ends_penalty(feed_df):
+    tor = feed_df[(feed_df["period"] == 1) & (feed_df["ev_team"] == "TOR")]
+
+    assert tor.set_index("seconds_elapsed")["strength"].loc[[630, 650, 690]].tolist() == ["5x4", "5x4", "5x5"]
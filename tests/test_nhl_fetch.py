@@ -0,0 +1,146 @@
+import copy
+import gzip
+import json
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import nhl_fetch
+from tests.local_http import LocalHTTPServer
+
+GAME_ID = "2023020001"
+PATHS = ["gameData.status", "liveData.linescore"]
+
+FEED_V1 = {
+    "metaData": {"timeStamp": "20231010_230000"},
+    "gameData": {"status": {"abstractGameState": "Live"}},
+    "liveData": {
+        "linescore": {"currentPeriod": 1, "powerPlayInfo": {"inSituation": True}},
+        "plays": {"allPlays": [{"id": i} for i in range(300)], "currentPlay": {"id": 1}},
+        "decisions": {"winner": None},
+    },
+}
+# Includes removes of keys outside the requested paths (their parent liveData is in a partial feed)
+PATCH_V2 = [
+    {"op": "replace", "path": "/metaData/timeStamp", "value": "20231010_231500"},
+    {"op": "replace", "path": "/liveData/linescore/currentPeriod", "value": 2},
+    {"op": "remove", "path": "/liveData/linescore/powerPlayInfo"},
+    {"op": "add", "path": "/liveData/plays/allPlays/-", "value": {"id": 300}},
+    {"op": "remove", "path": "/liveData/plays/currentPlay"},
+    {"op": "remove", "path": "/liveData/decisions"},
+]
+FEED_V2 = nhl_fetch.apply_patch(copy.deepcopy(FEED_V1), PATCH_V2)
+
+
+class FakeNHLAPI(LocalHTTPServer):
+    """ Serves feed/live (ETag / 304, gzip & chunked) & feed/live/diffPatch from memory. """
+
+    def __init__(self):
+        super().__init__(self.reply)
+        self.feed = FEED_V1
+        self.patches = dict()
+        self.bodies = list()
+
+    def reply(self, method, path, headers):
+        url = urlparse(path)
+        if url.path.endswith("/feed/live/diffPatch"):
+            timecode = parse_qs(url.query).get("startTimecode", [None])[0]
+            if timecode not in self.patches:
+                return 500, None, None
+            return self.gzip_reply([{"diff": self.patches[timecode]}])
+
+        if url.path.endswith("/feed/live"):
+            etag = f'"{self.feed["metaData"]["timeStamp"]}"'
+            if headers.get("If-None-Match") == etag:
+                return 304, None, None
+            status, reply_headers, body = self.gzip_reply(self.feed)
+            return status, dict(reply_headers, ETag=etag), body
+
+        return 404, None, None
+
+    def gzip_reply(self, document):
+        body = gzip.compress(json.dumps(document).encode("utf-8"))
+        self.bodies.append(body)
+        return 200, {"Content-Encoding": "gzip", "Transfer-Encoding": "chunked"}, body
+
+
+@pytest.fixture
+def api(monkeypatch):
+    with FakeNHLAPI() as server:
+        monkeypatch.setattr(nhl_fetch, "API_ROOT", f"{server.url}/api/v1")
+        yield server
+
+
+def partial(feed):
+    document = dict()
+    for path in PATHS + ["metaData.timeStamp"]:
+        nhl_fetch.set_path(document, path, nhl_fetch.get_path(feed, path))
+    return document
+
+
+MODES = [(None, FEED_V1, FEED_V2), (PATHS, partial(FEED_V1), partial(FEED_V2))]
+
+
+@pytest.mark.parametrize("paths, expected_v1, expected_v2", MODES, ids=["full", "partial"])
+def test_unchanged_feed_is_a_304(api, paths, expected_v1, expected_v2):
+    fetcher = nhl_fetch.LiveFeedFetcher(use_diff_patch=False, paths=paths)
+
+    first, second = fetcher.fetch(GAME_ID), fetcher.fetch(GAME_ID)
+
+    assert first == second == expected_v1
+    assert fetcher.stats(GAME_ID)["not_modified"] == 1
+
+
+@pytest.mark.parametrize("paths, expected_v1, expected_v2", MODES, ids=["full", "partial"])
+def test_changed_feed_is_one_diff_patch(api, paths, expected_v1, expected_v2):
+    fetcher = nhl_fetch.LiveFeedFetcher(paths=paths)
+    fetcher.fetch(GAME_ID)
+    api.feed = FEED_V2
+    api.patches[FEED_V1["metaData"]["timeStamp"]] = PATCH_V2
+
+    feed = fetcher.fetch(GAME_ID)
+
+    stats = fetcher.stats(GAME_ID)
+    assert feed == expected_v2
+    assert (stats["diffs"], stats["requests"]) == (1, 2)
+
+
+@pytest.mark.parametrize("paths, expected_v1, expected_v2", MODES, ids=["full", "partial"])
+def test_diff_patch_error_falls_back_to_full_download(api, paths, expected_v1, expected_v2):
+    fetcher = nhl_fetch.LiveFeedFetcher(paths=paths)
+    fetcher.fetch(GAME_ID)
+    api.feed = FEED_V2
+
+    feed = fetcher.fetch(GAME_ID)
+
+    stats = fetcher.stats(GAME_ID)
+    assert feed == expected_v2
+    assert (stats["diffs"], stats["requests"]) == (0, 3)
+
+
+def test_chunked_gzip_bytes_are_counted(api):
+    fetcher = nhl_fetch.LiveFeedFetcher(use_diff_patch=False)
+
+    fetcher.fetch(GAME_ID)
+
+    assert fetcher.stats(GAME_ID)["bytes"] == len(api.bodies[0])
+
+
+def test_partial_feed_counts_only_what_was_read(api):
+    # liveData.linescore comes before the (large) plays - parsing stops before the rest is read
+    fetcher = nhl_fetch.LiveFeedFetcher(use_diff_patch=False, paths=["liveData.linescore"])
+
+    fetcher.fetch(GAME_ID)
+
+    assert 0 < fetcher.stats(GAME_ID)["bytes"] <= len(api.bodies[0])
+
+
+@pytest.mark.parametrize("paths", [None, PATHS], ids=["full", "partial"])
+def test_not_modified_reuses_the_connection(api, paths):
+    fetcher = nhl_fetch.LiveFeedFetcher(use_diff_patch=False, paths=paths)
+
+    for _ in range(4):
+        fetcher.fetch(GAME_ID)
+
+    assert fetcher.stats(GAME_ID)["not_modified"] == 3
+    assert len(api.connections) == 1
@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+import payload_codec
+import payload_store
+from tests.pbp_data import compare_frames, make_sample_pbp
+
+
+def test_both_lambdas_share_one_codec(scraper_handler, generator_handler):
+    assert scraper_handler.payload_codec is generator_handler.payload_codec is payload_codec
+
+
+@pytest.mark.parametrize("codec", [payload_codec.CODEC_JSON, payload_codec.CODEC_COLUMNAR])
+def test_encode_decode_round_trip(codec):
+    pbp = make_sample_pbp(1500, seed=3, wide=True)
+
+    decoded = payload_codec.decode_pbp(payload_codec.encode_pbp(pbp, codec=codec))
+
+    assert list(decoded.columns) == [col for col in payload_codec.GENERATOR_COLUMNS if col in pbp.columns]
+    assert compare_frames(pbp[decoded.columns], decoded) == {}
+
+
+def test_columnar_keeps_dtypes():
+    pbp = make_sample_pbp(300, seed=1)
+
+    decoded = payload_codec.decode_pbp(payload_codec.encode_pbp(pbp, codec=payload_codec.CODEC_COLUMNAR))
+
+    numeric = pbp.select_dtypes("number").columns
+    assert (decoded[numeric].dtypes == pbp[numeric].dtypes).all()
+
+
+def test_oversized_payload_is_offloaded(tmp_path, monkeypatch):
+    monkeypatch.setenv("PAYLOAD_INLINE_LIMIT", "1000")
+    pbp = make_sample_pbp(3000, seed=2)
+    store = payload_store.LocalPayloadStore(str(tmp_path))
+
+    fields = payload_codec.encode_pbp(pbp, codec=payload_codec.CODEC_COLUMNAR, store=store, game_id="2019020001")
+
+    assert "pbp_data" not in fields and "pbp_ref" in fields
+    assert compare_frames(pbp, payload_codec.decode_pbp(fields)) == {}
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        payload_codec.encode_pbp(pd.DataFrame(), codec="pickle")
@@ -0,0 +1,28 @@
+import pytest
+
+import poll_schedule
+from tests.poll_data import replay, simulate_game
+
+
+def adaptive(snapshot, now):
+    return poll_schedule.next_poll_delay(
+        snapshot["game_state"], snapshot["linescore"], start_time=snapshot.get("start_time"), now=now
+    )
+
+
+@pytest.mark.parametrize("stoppage_every", [2, 3, 1000])
+def test_adaptive_polls_see_every_trigger_within_min_poll(stoppage_every):
+    snapshots = simulate_game(stoppage_every=stoppage_every)
+
+    fixed_result = replay(snapshots, lambda snapshot, now: 60)
+    adaptive_result = replay(snapshots, adaptive)
+
+    assert set(adaptive_result["trigger_delays"]) == {"1", "2", "final"}
+    assert max(adaptive_result["trigger_delays"].values()) < poll_schedule.MIN_POLL_SECONDS
+    assert adaptive_result["api_calls"] < fixed_result["api_calls"] / 4
+
+
+def test_preview_sleeps_until_puck_drop():
+    preview = simulate_game(preview_seconds=600)[:600]
+
+    assert replay(preview, adaptive)["api_calls"] == 1
@@ -0,0 +1,81 @@
+import io
+import os
+
+import pytest
+import requests
+
+import clients
+import publisher
+from tests.local_http import LocalHTTPServer, closed_port_url
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    """ A local server answering with scripted statuses (200 once the script runs out). """
+
+    script = list()
+    server = LocalHTTPServer(lambda method, path, headers: (script.pop(0) if script else 200, None, None))
+    monkeypatch.setattr(publisher, "PUBLISH_BACKOFF", 0)
+    with server:
+        monkeypatch.setenv("DEBUG_DISCORD_URL", f"{server.url}/webhook")
+        yield server, script
+
+
+def post_shotmap():
+    image = io.BytesIO(b"png")
+    image.name = "shotmap.png"
+    return publisher.send_shotmap_discord(True, [image], "text")
+
+
+def get_webhook():
+    response = clients.get_http_session().get(os.environ["DEBUG_DISCORD_URL"], timeout=5)
+    response.raise_for_status()
+    return True
+
+
+@pytest.mark.parametrize(
+    "statuses, func, expected_requests, error",
+    [
+        # A 5xx may come after the message went out - a post is only retried if it was never processed
+        ([503], post_shotmap, 1, requests.HTTPError),
+        ([429], post_shotmap, 2, None),
+        ([400], post_shotmap, 1, requests.HTTPError),
+        ([500, 502], lambda: publisher.with_retries(get_webhook), 3, None),
+        ([404], lambda: publisher.with_retries(get_webhook), 1, requests.HTTPError),
+    ],
+)
+def test_retries(webhook, statuses, func, expected_requests, error):
+    server, script = webhook
+    script.extend(statuses)
+
+    if error is None:
+        assert func() is True
+    else:
+        with pytest.raises(error):
+            func()
+
+    assert len(server.requests) == expected_requests
+
+
+def test_refused_post_is_retried(monkeypatch):
+    monkeypatch.setattr(publisher, "PUBLISH_BACKOFF", 0)
+    url = closed_port_url()
+    calls = list()
+
+    def post():
+        calls.append(url)
+        return clients.get_http_session().post(url, timeout=5)
+
+    with pytest.raises(requests.ConnectionError):
+        publisher.with_retries(post, should_retry=publisher.is_unsent)
+
+    assert len(calls) == publisher.PUBLISH_ATTEMPTS
+
+
+def test_duplicate_status():
+    class DuplicateError(Exception):
+        api_code = publisher.TWITTER_DUPLICATE_STATUS
+
+    assert publisher.is_duplicate_status(DuplicateError("[{'code': 187}]"))
+    assert publisher.is_duplicate_status(Exception("Status is a duplicate."))
+    assert not publisher.is_duplicate_status(Exception("Rate limit exceeded"))
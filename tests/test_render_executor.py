@@ -0,0 +1,51 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+import assets
+import render_executor
+import shotmap
+from tests.shotmap_data import RINK_KEY, sample_jobs, write_assets
+
+
+@pytest.fixture
+def parallel(tmp_path, monkeypatch):
+    """ Local assets & the parallel path, even on a single CPU. """
+
+    write_assets(tmp_path)
+    monkeypatch.setenv("ASSETS_DIR", str(tmp_path))
+    monkeypatch.setenv("SHOTMAP_BLANK", RINK_KEY)
+    for cache in ("_path_cache", "_rink_cache", "_font_cache"):
+        monkeypatch.setattr(assets, cache, dict())
+    monkeypatch.setattr(render_executor, "_cpu_count", lambda: 2)
+
+
+def test_parallel_render_returns_every_shotmap(parallel):
+    jobs = sample_jobs()
+
+    results = render_executor.render_all(jobs)
+
+    assert len(results) == len(jobs)
+    assert all(result.name.endswith(".png") and result.getvalue()[:4] == b"\x89PNG" for result in results)
+
+
+def test_child_death_raises_and_leaves_no_children(parallel, monkeypatch):
+    generate_shotmap = shotmap.generate_shotmap
+
+    def dying_render(**kwargs):
+        if kwargs["strength"] == "All":
+            os._exit(1)
+        time.sleep(5)
+        return generate_shotmap(**kwargs)
+
+    monkeypatch.setattr(shotmap, "generate_shotmap", dying_render)
+    start = time.perf_counter()
+
+    with pytest.raises(RuntimeError, match="died"):
+        render_executor.render_all(sample_jobs())
+
+    # The other child is terminated instead of finishing its (slow) render
+    assert time.perf_counter() - start < 5
+    assert not multiprocessing.active_children()
@@ -0,0 +1,52 @@
+import threading
+import time
+
+import pandas as pd
+
+HOCKEY_SCRAPER_COLUMNS = [
+    f"{side}Player{i}{suffix}" for side in ("away", "home") for i in range(1, 7) for suffix in ("", "_id")
+] + ["Description", "Home_Coach", "Away_Coach", "Period", "Event"]
+
+
+def test_hockey_scraper_scrapes_never_overlap(scraper_handler, monkeypatch):
+    active, overlaps = [0], []
+    lock = threading.Lock()
+
+    def scrape_games(games, if_scrape_shifts, data_format):
+        with lock:
+            active[0] += 1
+            overlaps.append(active[0] > 1)
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return {"pbp": pd.DataFrame([[0] * len(HOCKEY_SCRAPER_COLUMNS)], columns=HOCKEY_SCRAPER_COLUMNS)}
+
+    monkeypatch.setattr(scraper_handler.hockey_scraper, "scrape_games", scrape_games)
+    monkeypatch.setattr(scraper_handler, "SCRAPE_WORKERS", 4)
+    monkeypatch.setattr(
+        scraper_handler,
+        "scrape_game",
+        lambda game_id, claim_id, source, **game: scraper_handler.get_pbp(game_id, "hockey_scraper") is not None
+        and {"game_id": game_id},
+    )
+
+    games = {f"202302000{i}": {"period": None, "home_score": 0, "away_score": 0} for i in range(1, 9)}
+    report = scraper_handler.scrape_batch(games, "claim")
+
+    assert len(report["scraped"]) == 8
+    assert len(overlaps) == 8 and not any(overlaps)
+
+
+def test_failed_game_only_affects_itself(scraper_handler, monkeypatch):
+    def scrape_game(game_id, claim_id, source, **game):
+        if game_id == "2023020002":
+            raise RuntimeError("scrape failed")
+        return {"game_id": game_id}
+
+    monkeypatch.setattr(scraper_handler, "scrape_game", scrape_game)
+    games = {game_id: {"period": 1, "home_score": 0, "away_score": 0} for game_id in ("2023020001", "2023020002")}
+
+    report = scraper_handler.scrape_batch(games, "claim")
+
+    assert report["scraped"] == [{"game_id": "2023020001"}]
+    assert list(report["errors"]) == ["2023020002"]
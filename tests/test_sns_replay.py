@@ -0,0 +1,101 @@
+"""
+Replays SNS, SQS (SNS envelope) & SQS raw deliveries through the scraper's handle_event
+with the DynamoDB state lookup & the scrape patched out.
+"""
+
+import json
+
+import pytest
+
+# A burst for two games: a shot & a goal (dropped by the event filter), two period ends & the game end for one of them
+PLAYS = [
+    (2023020001, "SHOT", 1, 0, 0),
+    (2023020001, "PERIOD_END", 1, 1, 0),
+    (2023020002, "PERIOD_END", 1, 0, 0),
+    (2023020001, "PERIOD_END", 2, 2, 1),
+    (2023020002, "GOAL", 2, 0, 1),
+    (2023020001, "GAME_END", 2, 2, 1),
+]
+EXPECTED_GAMES = {
+    "2023020001": {"period": 2, "home_score": 2, "away_score": 1},
+    "2023020002": {"period": 1, "home_score": 0, "away_score": 0},
+}
+
+
+def play(game_pk, event_type, period, home, away):
+    about = {"period": period, "goals": {"home": home, "away": away}}
+    return {"gamePk": game_pk, "play": {"result": {"eventTypeId": event_type}, "about": about}}
+
+
+def sns(message):
+    return {"EventSource": "aws:sns", "Sns": {"Type": "Notification", "Message": json.dumps(message)}}
+
+
+def sqs(message):
+    body = json.dumps({"Type": "Notification", "Message": json.dumps(message)})
+    return {"eventSource": "aws:sqs", "body": body}
+
+
+def sqs_raw(message):
+    return {"eventSource": "aws:sqs", "body": json.dumps(message)}
+
+
+@pytest.fixture
+def scrapes(scraper_handler, monkeypatch):
+    """ Records the scrapes handle_event starts (no game has been processed yet). """
+
+    scrapes = list()
+    monkeypatch.setattr(scraper_handler, "get_last_periods", lambda game_ids: {game_id: 0 for game_id in game_ids})
+    monkeypatch.setattr(
+        scraper_handler,
+        "scrape_game",
+        lambda game_id, **kwargs: scrapes.append((game_id, kwargs)) or {"game_id": game_id},
+    )
+    return scrapes
+
+
+@pytest.fixture
+def event_filter(scraper_handler, monkeypatch):
+    """ Events trigger mode - only period end / game end play events start a scrape. """
+
+    monkeypatch.setattr(scraper_handler, "SNS_EVENT_FILTER", True)
+
+
+def test_every_play_event_is_processed_without_the_filter(scraper_handler, scrapes):
+    event = {"Records": [sns(play(*message)) for message in PLAYS]}
+
+    response = scraper_handler.handle_event(event, None)
+
+    assert len(scraper_handler.get_sns_events(event["Records"])) == len(PLAYS)
+    assert len(response["body"]["scraped"]) == 2
+    assert {game_id: kwargs["period"] for game_id, kwargs in scrapes} == {"2023020001": 2, "2023020002": 2}
+
+
+@pytest.mark.parametrize("to_record", [sns, sqs, sqs_raw])
+def test_batched_delivery_scrapes_each_game_once(scraper_handler, scrapes, event_filter, to_record):
+    event = {"Records": [to_record(play(*message)) for message in PLAYS]}
+
+    response = scraper_handler.handle_event(event, None)
+
+    assert len(scraper_handler.get_sns_events(event["Records"])) == 4
+    assert len(response["body"]["scraped"]) == 2
+    assert {game_id: {key: kwargs[key] for key in EXPECTED_GAMES[game_id]} for game_id, kwargs in scrapes} == (
+        EXPECTED_GAMES
+    )
+
+
+def test_unbatched_deliveries_scrape_every_trigger_event(scraper_handler, scrapes, event_filter):
+    for message in PLAYS:
+        scraper_handler.handle_event({"Records": [sqs(play(*message))]}, None)
+
+    assert len(scrapes) == 4
+
+
+def test_stale_periods_are_dropped(scraper_handler, scrapes, event_filter, monkeypatch):
+    monkeypatch.setattr(scraper_handler, "get_last_periods", lambda game_ids: {"2023020001": 2, "2023020002": 0})
+    event = {"Records": [sns(play(*message)) for message in PLAYS]}
+
+    response = scraper_handler.handle_event(event, None)
+
+    assert [game_id for game_id, _ in scrapes] == ["2023020002"]
+    assert len(response["body"]["scraped"]) == 1
@@ -0,0 +1,34 @@
+import importlib
+import os
+
+import startup
+
+
+def test_import_has_no_side_effects(monkeypatch):
+    monkeypatch.delenv("MPLBACKEND", raising=False)
+    monkeypatch.delenv("MPLCONFIGDIR", raising=False)
+
+    importlib.reload(startup)
+
+    assert "MPLBACKEND" not in os.environ and "MPLCONFIGDIR" not in os.environ
+
+
+def test_configure_sets_backend_and_font_cache(monkeypatch, tmp_path):
+    monkeypatch.delenv("MPLBACKEND", raising=False)
+    monkeypatch.delenv("MPLCONFIGDIR", raising=False)
+    monkeypatch.setattr(startup, "MPL_CONFIG_PATH", str(tmp_path))
+
+    startup.configure()
+
+    assert os.environ["MPLBACKEND"] == "Agg"
+    assert os.environ["MPLCONFIGDIR"] == str(tmp_path)
+
+
+def test_configure_keeps_explicit_settings(monkeypatch):
+    monkeypatch.setenv("MPLBACKEND", "svg")
+    monkeypatch.setenv("MPLCONFIGDIR", "/tmp/custom")
+
+    startup.configure()
+
+    assert os.environ["MPLBACKEND"] == "svg"
+    assert os.environ["MPLCONFIGDIR"] == "/tmp/custom"
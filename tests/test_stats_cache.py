@@ -0,0 +1,36 @@
+import pytest
+
+import clean_pbp
+import stats_cache
+from tests.pbp_data import compare_frames, make_sample_pbp
+
+
+def run_intermissions(pbp_df, store, splits=(1 / 3, 2 / 3)):
+    """ Runs the cached path on growing prefixes of a game (like the intermission runs). """
+
+    for split in splits:
+        stats_cache.run_all_stats_cached(pbp_df.iloc[: int(len(pbp_df) * split)].copy(), "test", store)
+    return stats_cache.run_all_stats_cached(pbp_df.copy(), "test", store)
+
+
+@pytest.mark.parametrize("rows, seed", [(300, 1), (3000, 2)])
+def test_incremental_matches_full_recompute(tmp_path, rows, seed):
+    pbp_df = make_sample_pbp(rows, seed)
+    store = stats_cache.LocalStatsStore(str(tmp_path))
+
+    incremental_df = run_intermissions(pbp_df, store)
+    full_df = clean_pbp.run_all_stats(pbp_df.copy())
+
+    assert compare_frames(full_df, incremental_df) == {}
+
+
+def test_truncated_entry_is_a_miss(tmp_path):
+    pbp_df = make_sample_pbp(300, 1)
+    store = stats_cache.LocalStatsStore(str(tmp_path))
+    run_intermissions(pbp_df, store)
+
+    store.put("test", store.get("test")[:100])
+    assert stats_cache.load_entry(store.get("test")) is None
+
+    truncated_df = stats_cache.run_all_stats_cached(pbp_df.copy(), "test", store)
+    assert compare_frames(clean_pbp.run_all_stats(pbp_df.copy()), truncated_df) == {}
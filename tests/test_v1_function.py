@@ -0,0 +1,38 @@
+import gzip
+import json
+
+import pytest
+
+import nhl_fetch
+from tests import lambdas
+from tests.local_http import LocalHTTPServer
+
+FEED = {
+    "gameData": {"teams": {"home": {"name": "Washington Capitals"}, "away": {"name": "Boston Bruins"}}},
+    "liveData": {"plays": {"allPlays": [{"result": {"eventTypeId": "SHOT"}}]}},
+}
+PATHS = ["gameData.teams.home.name", "gameData.teams.away.name", "liveData.plays.allPlays", "liveData.missing"]
+
+
+@pytest.fixture
+def v1_function():
+    # The v1 function imports the whole rendering & publishing stack at module level
+    for module in ("matplotlib", "seaborn", "tweepy", "boto3"):
+        pytest.importorskip(module)
+    return lambdas.load_handler(lambdas.V1_DIR)
+
+
+def test_get_livefeed_paths_uses_nhl_fetch(v1_function, monkeypatch):
+    body = gzip.compress(json.dumps(FEED).encode("utf-8"))
+    reply = (200, {"Content-Encoding": "gzip", "Transfer-Encoding": "chunked"}, body)
+
+    with LocalHTTPServer(lambda method, path, headers: reply) as server:
+        monkeypatch.setattr(nhl_fetch, "API_ROOT", f"{server.url}/api/v1")
+        values = v1_function.get_livefeed_paths("2023020001", PATHS)
+
+    assert server.requests == [("GET", "/api/v1/game/2023020001/feed/live")]
+    assert values == {
+        "gameData.teams.home.name": "Washington Capitals",
+        "gameData.teams.away.name": "Boston Bruins",
+        "liveData.plays.allPlays": FEED["liveData"]["plays"]["allPlays"],
+    }